@@ -5,30 +5,124 @@ AWS PDF翻譯器 - ComfyUI節點
 """
 
 import os
+import time
 import logging
 import json
-from typing import List, Tuple, Any
-import torch
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from collections import Counter
+from typing import List, Tuple, Any, Optional, TYPE_CHECKING
+
+# torch / numpy / PIL / PyMuPDF 都在首次使用時才導入，加快ComfyUI啟動
+if TYPE_CHECKING:
+    import torch
 
-# 嘗試導入PDF替換模塊
 try:
-    from .pdf_text_replacer import PDFTextReplacer
+    from .page_triage import triage_document
+    from .status_renderer import render_job_status, render_error_status
+    from .translation_cache import get_translation_cache
+    from .quality_checks import get_quality_checker, LineRisk
+    from .bedrock_streaming import read_claude_stream
+    from .text_chunker import (chunk_text, map_chunks, estimate_tokens, utf8_size, join_translated_chunks,
+                               FILTER_CHUNK_TOKENS, FILTER_MAX_OUTPUT_TOKENS)
+    from .translation_backends import create_backend, BACKEND_NAMES
+    from .document_model import PageRecord
+    from .post_processing import get_post_processor
+    from .document_manifest import DocumentManifest, PageEntry, manifest_path
+    from .term_protection import restore_markers, TermMatcher
+    from .glossary_store import get_glossary_store
+    from .document_handles import get_document_handles
+    from .ocr_policy import get_ocr_policy, document_class, novel_ocr_lines
+    from .service_scheduler import get_scheduler, ScheduledClient, JOB_PRIORITIES
+    from .bilingual_outputs import (parse_output_formats, output_path_for, write_json, write_xliff,
+                                    build_side_by_side, build_interleaved, OUTPUT_FORMATS, PDF_OUTPUT_FORMATS)
+    from .translation_checkpoint import (TranslationCheckpoint, checkpoint_path, page_fingerprint,
+                                         ocr_lines_to_json, align_lines)
+    from .ocr_engine import (choose_ocr_zoom, render_grayscale, render_for_textract,
+                             get_tesseract_pool, TextractAsyncOCR, OCRLine, join_ocr_lines,
+                             textract_line, tesseract_data_lines,
+                             TESSERACT_CONFIG, TEXTRACT_ASYNC_MIN_PAGES)
 except ImportError:
-    try:
-        from pdf_text_replacer import PDFTextReplacer
-    except ImportError:
-        PDFTextReplacer = None
-        logging.warning("PDF文字替換模塊未找到，PDF替換功能將不可用")
+    from page_triage import triage_document
+    from status_renderer import render_job_status, render_error_status
+    from translation_cache import get_translation_cache
+    from quality_checks import get_quality_checker, LineRisk
+    from bedrock_streaming import read_claude_stream
+    from text_chunker import (chunk_text, map_chunks, estimate_tokens, utf8_size, join_translated_chunks,
+                              FILTER_CHUNK_TOKENS, FILTER_MAX_OUTPUT_TOKENS)
+    from translation_backends import create_backend, BACKEND_NAMES
+    from document_model import PageRecord
+    from post_processing import get_post_processor
+    from document_manifest import DocumentManifest, PageEntry, manifest_path
+    from term_protection import restore_markers, TermMatcher
+    from glossary_store import get_glossary_store
+    from document_handles import get_document_handles
+    from ocr_policy import get_ocr_policy, document_class, novel_ocr_lines
+    from service_scheduler import get_scheduler, ScheduledClient, JOB_PRIORITIES
+    from bilingual_outputs import (parse_output_formats, output_path_for, write_json, write_xliff,
+                                   build_side_by_side, build_interleaved, OUTPUT_FORMATS, PDF_OUTPUT_FORMATS)
+    from translation_checkpoint import (TranslationCheckpoint, checkpoint_path, page_fingerprint,
+                                        ocr_lines_to_json, align_lines)
+    from ocr_engine import (choose_ocr_zoom, render_grayscale, render_for_textract,
+                            get_tesseract_pool, TextractAsyncOCR, OCRLine, join_ocr_lines,
+                            textract_line, tesseract_data_lines,
+                            TESSERACT_CONFIG, TEXTRACT_ASYNC_MIN_PAGES)
 
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BEDROCK_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+# 多候選翻譯模式：所選翻譯後端的變體（Amazon Translate 另加 Bedrock Claude 候選）
+CANDIDATE_WORKERS = 8
+
+# 翻譯PDF保存配置（與 pdf_text_replacer.SAVE_PROFILES 對應，列在這裡避免註冊節點時導入PyMuPDF）
+PDF_SAVE_PROFILES = ["compact", "web", "fast", "default"]
+
+# 流式過濾時，已完成的行提前送去翻譯並寫入翻譯緩存
+PREFETCH_WORKERS = 4
+
+
+def _alnum(text: str) -> str:
+    """只保留字母數字（比較OCR行和過濾後文字時忽略空白、換行和標點）"""
+    return ''.join(char for char in text.lower() if char.isalnum())
+
+
+_pdf_text_replacer_class = None
+
+
+def _load_pdf_text_replacer():
+    """延遲導入PDF替換模塊（會載入PyMuPDF）"""
+    global _pdf_text_replacer_class
+    if _pdf_text_replacer_class is None:
+        try:
+            from .pdf_text_replacer import PDFTextReplacer
+        except ImportError:
+            try:
+                from pdf_text_replacer import PDFTextReplacer
+            except ImportError:
+                PDFTextReplacer = False
+                logging.warning("PDF文字替換模塊未找到，PDF替換功能將不可用")
+        _pdf_text_replacer_class = PDFTextReplacer
+    return _pdf_text_replacer_class or None
+
+
 class AWSPDFTranslator:
     """AWS PDF翻譯器節點"""
     
+    def __init__(self):
+        self._job_stats = self._new_job_stats()
+        self._clients = {}
+        self._line_translations = {}
+        self._page_records: List[PageRecord] = []
+        # 本次提取的逐頁統計，寫入文檔清單
+        self._manifest_pages: List[PageEntry] = []
+        # 本次提取中AI過濾或OCR回退的頁面 {頁索引: 原因}，清單下次不沿用這些頁面
+        self._degraded_pages = {}
+        # 本次執行在進程級服務調度器中的任務（AWS調用共享配額）
+        self._job = None
+        # 本次執行的源PDF句柄（只讀取和解析一次，各階段共用）
+        self._source = None
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -71,6 +165,46 @@ class AWSPDFTranslator:
                     "multiline": False,
                     "placeholder": "翻譯PDF輸出路徑 (當create_translated_pdf為true時)"
                 })
+            },
+            "optional": {
+                "textract_s3_bucket": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "Textract異步OCR使用的S3存儲桶 (留空則逐頁OCR)"
+                }),
+                "candidate_mode": (["false", "true"], {
+                    "default": "false"
+                }),
+                "bedrock_streaming": (["false", "true"], {
+                    "default": "false"
+                }),
+                "translation_backend": (BACKEND_NAMES, {
+                    "default": "amazon_translate"
+                }),
+                "local_model": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "本地模型名稱或CTranslate2目錄 (留空則使用 Helsinki-NLP/opus-mt-<源>-<目標>)"
+                }),
+                "diff_mode": (["false", "true"], {
+                    "default": "false"
+                }),
+                "pdf_save_profile": (PDF_SAVE_PROFILES, {
+                    "default": "compact"
+                }),
+                "bilingual_outputs": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": f"雙語輸出格式，逗號分隔: {', '.join(OUTPUT_FORMATS)}"
+                }),
+                "job_priority": (JOB_PRIORITIES, {
+                    "default": "interactive"
+                }),
+                "glossary": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "引用的詞彙表名稱（glossaries/ 目錄中的文件名或路徑），逗號分隔"
+                })
             }
         }
     
@@ -82,87 +216,169 @@ class AWSPDFTranslator:
     def translate_pdf(self, pdf_source_path: str, pdf_target_path: str, 
                      source_language: str, target_language: str, 
                      aws_region: str, excluded_words: str,
-                     create_translated_pdf: str, translated_pdf_path: str) -> Tuple[torch.Tensor, str]:
+                     create_translated_pdf: str, translated_pdf_path: str,
+                     textract_s3_bucket: str = "", candidate_mode: str = "false",
+                     bedrock_streaming: str = "false", translation_backend: str = "amazon_translate",
+                     local_model: str = "", diff_mode: str = "false",
+                     pdf_save_profile: str = "compact", bilingual_outputs: str = "",
+                     job_priority: str = "interactive", glossary: str = "") -> Tuple["torch.Tensor", str]:
         """主要翻譯函數"""
         try:
+            self._job_stats = self._new_job_stats()
+            self._job = get_scheduler().start_job(job_priority, os.path.basename(pdf_source_path))
+            # 源PDF在整個作業中只讀取和解析一次，各階段共用
+            self._source = get_document_handles().acquire(pdf_source_path)
             logger.info("🚀 AWS PDF Translator v4.2 - Stable & Compatible")
             logger.info(f"📄 Source: {pdf_source_path}")
             logger.info(f"📄 Target: {pdf_target_path}")
             logger.info(f"🌐 Translation: {source_language} → {target_language}")
             
-            # 處理排除詞彙 - 支持換行和逗號分隔
-            excluded_list = []
-            if excluded_words.strip():
-                # 首先按換行分割
-                lines = excluded_words.strip().split('\n')
-                for line in lines:
-                    line = line.strip()
-                    # 過濾掉指導性文字
-                    if line and not line.startswith('<') and not line.startswith('每個換行') and not line.startswith('例如'):
-                        # 如果行中包含逗號，再按逗號分割
-                        if ',' in line:
-                            words = [word.strip() for word in line.split(',') if word.strip()]
-                            excluded_list.extend(words)
-                        else:
-                            excluded_list.append(line)
-            
-            # 去重並保持順序
-            excluded_list = list(dict.fromkeys(excluded_list))
-            if excluded_list:
-                logger.info(f"🚫 Excluded words ({len(excluded_list)}): {excluded_list}")
+            # 排除詞彙：輸入框詞彙和引用的詞彙表合併為預編譯的匹配器（進程內緩存，不再每次解析）
+            excluded_terms = get_glossary_store().matcher(excluded_words, glossary)
+            if excluded_terms:
+                logger.info(f"🚫 Excluded words: {len(excluded_terms)} terms ({excluded_terms.digest[:8]})")
             else:
                 logger.info("🚫 No excluded words specified")
             
+            backend = create_backend(translation_backend, lambda service: self._get_client(service, aws_region),
+                                     local_model.strip(), BEDROCK_MODEL_ID)
+            self._job_stats["backend"] = backend.name
+            
+            # 差異模式：與上一版本的檢查點比較，只處理有變化的頁面和行
+            diff = diff_mode.lower() == "true"
+            previous = None
+            if diff:
+                checkpoint_settings = {"source_language": source_language, "target_language": target_language,
+                                       "backend": backend.name, "excluded_words": excluded_terms.digest}
+                previous = TranslationCheckpoint.load(checkpoint_path(pdf_target_path), checkpoint_settings)
+            
+            # 文檔清單：同一份PDF和相同提取設置再次執行時跳過整個提取階段
+            stage_start = time.perf_counter()
+            manifest_file = manifest_path(pdf_target_path)
+            manifest_settings = {"aws_region": aws_region, "textract_s3_bucket": textract_s3_bucket.strip(),
+                                 "filter_model": BEDROCK_MODEL_ID}
+            source_digest = self._source.digest()
+            manifest = DocumentManifest.load(manifest_file, source_digest, manifest_settings)
+            partial_manifest = None
+            if manifest and manifest.degraded_pages():
+                # 上次提取時回退的頁面重新提取，其餘頁面仍沿用清單
+                logger.info(f"🗂️ {len(manifest.degraded_pages())} pages fell back during the last extraction, "
+                            f"extracting them again")
+                partial_manifest, manifest = manifest, None
+            manifest_reused = manifest is not None
+            
             # 步驟1: 提取PDF文字
-            logger.info("📖 Extracting text from PDF with AI content analysis")
-            pages_text = self._extract_pdf_text(pdf_source_path, aws_region)
+            streaming = bedrock_streaming.lower() == "true"
+            if manifest:
+                logger.info("🗂️ Source PDF unchanged since last run, reusing extracted text from manifest")
+                pages_text = self._load_manifest_pages(manifest)
+            elif streaming:
+                logger.info("📖 Extracting text from PDF with AI content analysis")
+                # 流式過濾：每一行清理完成後立即預翻譯
+                from concurrent.futures import ThreadPoolExecutor
+                
+                with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as prefetch_executor:
+                    line_sink = lambda line: prefetch_executor.submit(
+                        self._prefetch_line, line, source_language, target_language,
+                        backend, excluded_terms, stage_start
+                    )
+                    pages_text = self._extract_pdf_text(pdf_source_path, aws_region, textract_s3_bucket.strip(),
+                                                        streaming, line_sink, previous, partial_manifest)
+            else:
+                logger.info("📖 Extracting text from PDF with AI content analysis")
+                pages_text = self._extract_pdf_text(pdf_source_path, aws_region, textract_s3_bucket.strip(),
+                                                    previous=previous, manifest=partial_manifest)
+            if not manifest and pages_text:
+                manifest = DocumentManifest(source_digest, manifest_settings, self._manifest_pages)
+                try:
+                    manifest.save(manifest_file)
+                except OSError as e:
+                    logger.warning(f"⚠️ Failed to save manifest: {e}")
+            if manifest:
+                self._job_stats["manifest"] = dict(manifest.summary(), reused=manifest_reused)
+            self._job_stats["stages"]["extract"] = time.perf_counter() - stage_start
             
             if not pages_text:
                 return self._create_error_result("No text extracted from PDF")
             
             # 步驟2: 翻譯文字
-            logger.info(f"🌐 Translating {len(pages_text)} pages with Amazon Translate")
-            translated_pages = self._translate_pages(pages_text, source_language, target_language, aws_region, excluded_list)
+            logger.info(f"🌐 Translating {len(pages_text)} pages with {backend.name}")
+            stage_start = time.perf_counter()
+            translated_pages = self._translate_pages(pages_text, source_language, target_language, aws_region, excluded_terms,
+                                                     candidate_mode.lower() == "true", backend, previous)
+            self._job_stats["stages"]["translate"] = time.perf_counter() - stage_start
+            self._job_stats["backend_calls"] = backend.calls
             
             if not translated_pages:
                 return self._create_error_result("Translation failed")
             
             # 步驟3: 創建翻譯文字文件
             logger.info("📝 Creating translation text file")
-            success = self._create_translation_text_file(pages_text, translated_pages, pdf_target_path)
+            stage_start = time.perf_counter()
+            success = self._create_translation_text_file(pages_text, translated_pages, pdf_target_path,
+                                                         self._job_stats["line_risks"],
+                                                         self._job_stats["marker_issues"])
+            self._job_stats["stages"]["report"] = time.perf_counter() - stage_start
             
             if not success:
                 return self._create_error_result("Failed to create translation file")
             
-            # 步驟4: 創建翻譯PDF（如果啟用）
+            if diff:
+                self._save_checkpoint(checkpoint_path(pdf_target_path), checkpoint_settings)
+            
+            # 步驟4: 創建翻譯PDF和雙語輸出（翻譯PDF只在內存中渲染一次，各種輸出共用）
+            output_formats = parse_output_formats(bilingual_outputs)
+            pdf_formats = [name for name in output_formats if name in PDF_OUTPUT_FORMATS]
             pdf_replacement_success = False
-            if create_translated_pdf.lower() == "true":
+            if create_translated_pdf.lower() == "true" or pdf_formats:
+                PDFTextReplacer = _load_pdf_text_replacer()
                 if PDFTextReplacer is None:
                     logger.warning("⚠️ PDF替換模塊不可用，跳過PDF創建")
                 else:
                     logger.info("📄 Creating translated PDF with text replacement")
+                    stage_start = time.perf_counter()
                     try:
                         # 創建翻譯映射
                         translation_mapping = self._create_translation_mapping(pages_text, translated_pages)
                         
                         # 使用PDF文字替換器
                         pdf_replacer = PDFTextReplacer()
-                        output_pdf_path = pdf_replacer.replace_pdf_text(
-                            pdf_source_path, 
-                            translation_mapping, 
-                            translated_pdf_path
-                        )
-                        
-                        if os.path.exists(output_pdf_path):
-                            pdf_replacement_success = True
-                            logger.info(f"✅ Translated PDF created: {output_pdf_path}")
-                        else:
-                            logger.warning("⚠️ PDF replacement completed but file not found")
+                        with get_document_handles().open_document(pdf_source_path) as source_doc:
+                            translated_doc = pdf_replacer.render_document(
+                                pdf_source_path,
+                                translation_mapping,
+                                ocr_layout={record.page_index: record.ocr_lines
+                                            for record in self._page_records if record.ocr_lines},
+                                source_doc=source_doc,
+                                ocr_translations={record.page_index: record.ocr_translations
+                                                  for record in self._page_records if record.ocr_lines}
+                            )
+                        try:
+                            if create_translated_pdf.lower() == "true":
+                                self._job_stats["pdf_save"] = pdf_replacer.save_document(
+                                    translated_doc, translated_pdf_path, pdf_save_profile
+                                )
+                                if os.path.exists(translated_pdf_path):
+                                    pdf_replacement_success = True
+                                    logger.info(f"✅ Translated PDF created: {translated_pdf_path}")
+                                else:
+                                    logger.warning("⚠️ PDF replacement completed but file not found")
+                            
+                            if pdf_formats:
+                                self._create_bilingual_pdfs(pdf_replacer, pdf_source_path, translated_doc,
+                                                            pdf_formats, pdf_target_path, pdf_save_profile)
+                        finally:
+                            translated_doc.close()
                             
                     except Exception as e:
                         logger.error(f"❌ PDF replacement failed: {e}")
+                    self._job_stats["stages"]["pdf"] = time.perf_counter() - stage_start
+            
+            # 逐頁JSON / XLIFF 直接由頁面記錄生成
+            self._create_page_exports(output_formats, pdf_target_path, pdf_source_path, source_language, target_language)
             
             # 生成狀態報告
+            self._job_stats["source_io"] = self._source.stats()
             txt_output_path = pdf_target_path.replace('.pdf', '_translation.txt')
             status_report = self._generate_status_report(
                 len(pages_text), 
@@ -174,7 +390,7 @@ class AWSPDFTranslator:
             )
             
             # 創建成功狀態圖像
-            status_image = self._create_success_image()
+            status_image = self._create_success_image(len(pages_text))
             
             logger.info("✅ Translation completed successfully!")
             return (status_image, status_report)
@@ -182,79 +398,156 @@ class AWSPDFTranslator:
         except Exception as e:
             logger.error(f"❌ Translation failed: {e}")
             return self._create_error_result(f"Translation failed: {str(e)}")
+        
+        finally:
+            if self._job is not None:
+                self._job.finish()
+                self._job = None
+            if self._source is not None:
+                get_document_handles().release(self._source)
+                self._source = None
+    
+    @staticmethod
+    def _new_job_stats() -> dict:
+        """每次執行重置的性能統計"""
+        return {"ocr": [], "stages": {}, "cache_hits": 0, "cache_lookups": 0, "line_risks": [], "marker_issues": [],
+                "candidate_lines": 0, "candidate_calls": 0, "candidate_replaced": 0,
+                "bedrock_tokens": [], "first_line_seconds": None,
+                "backend": "amazon_translate", "backend_calls": 0,
+                "diff": {"pages_reused": 0, "lines_reused": 0, "lines_translated": 0}, "pdf_save": None,
+                "outputs": [], "manifest": None, "source_io": None,
+                "term_hits": Counter(),
+                "ocr_policy": {"skipped_pages": 0, "measured_pages": 0, "gain_total": 0.0,
+                               "duplicate_chars": 0, "duplicate_lines": 0}}
     
-    def _extract_pdf_text(self, pdf_path: str, aws_region: str = None) -> List[str]:
-        """提取PDF文字（包含圖片OCR）"""
+    def _get_client(self, service_name: str, aws_region: str):
+        """取得（並重用）AWS服務客戶端；執行中的有配額服務經過進程級調度器"""
+        key = (service_name, aws_region)
+        if key not in self._clients:
+            import boto3
+            self._clients[key] = boto3.client(service_name, region_name=aws_region)
+        if self._job is not None and self._job.scheduler.is_metered(service_name):
+            return ScheduledClient(self._clients[key], service_name, self._job)
+        return self._clients[key]
+    
+    def _extract_pdf_text(self, pdf_path: str, aws_region: str = None, textract_s3_bucket: str = "",
+                          bedrock_streaming: bool = False, line_sink=None,
+                          previous: TranslationCheckpoint = None, manifest: DocumentManifest = None) -> List[str]:
+        """提取PDF文字（包含圖片OCR）；上一版本檢查點或清單中內容未變（且未降級）的頁面直接沿用"""
         try:
-            import pdfplumber
-            import fitz  # PyMuPDF
-            
             pages_text = []
+            self._page_records = []
+            self._manifest_pages = []
+            self._degraded_pages = {}
             
-            # 使用 pdfplumber 提取文字
-            with pdfplumber.open(pdf_path) as pdf:
-                # 同時使用 PyMuPDF 處理圖片
-                pdf_doc = fitz.open(pdf_path)
+            with get_document_handles().open_document(pdf_path) as pdf_doc:
+                # 快速分類：在重度處理前決定每頁使用哪個提取器
+                triage_results = triage_document(pdf_doc)
+                
+                # 每頁統計和內容指紋只計算一次，記錄在清單中
+                self._manifest_pages = [PageEntry.from_triage(triage, page_fingerprint(pdf_doc[triage.page_index], triage.text))
+                                        for triage in triage_results]
                 
-                for i, page in enumerate(pdf.pages):
+                # 差異模式 / 部分降級的清單：按內容指紋找出可沿用的頁面
+                reuse_sources = [source for source in (previous, manifest) if source is not None]
+                reused_pages = {}
+                for i, page_entry in enumerate(self._manifest_pages):
+                    for source in reuse_sources:
+                        entry = source.find(page_entry.hash)
+                        if entry:
+                            reused_pages[i] = entry
+                            break
+                
+                # OCR策略：按文檔類別學到的預期增益決定需要OCR的頁面是否真的做OCR
+                # （逐頁OCR時在處理每頁時才決定，前面頁面的結果可以影響後面的頁面；異步OCR需要預先決定）
+                policy = get_ocr_policy()
+                doc_class = document_class(pdf_doc)
+                ocr_decisions = {}
+                if aws_region and textract_s3_bucket:
+                    ocr_decisions = {triage.page_index: policy.decide(doc_class, triage)
+                                     for triage in triage_results if triage.page_index not in reused_pages}
+                
+                # 掃描頁較多時，整份提交給Textract異步OCR
+                async_ocr_lines = self._textract_async_ocr(
+                    pdf_doc, [triage for triage in triage_results if triage.page_index in ocr_decisions
+                              and ocr_decisions[triage.page_index].run],
+                    aws_region, textract_s3_bucket
+                )
+                
+                for i, triage in enumerate(triage_results):
+                    page_entry = self._manifest_pages[i]
+                    if i in reused_pages:
+                        entry = reused_pages[i]
+                        logger.info(f"  ♻️ Page {i+1} unchanged since last extraction, skipping OCR and filtering")
+                        page_entry.text, page_entry.ocr_lines = entry["text"], entry["ocr_lines"]
+                        if entry["text"]:
+                            pages_text.append(entry["text"])
+                            self._page_records.append(PageRecord(i, entry["text"], page_entry.hash,
+                                                                 [OCRLine(*line) for line in entry["ocr_lines"]]))
+                        continue
+                    
                     logger.info(f"  📄 Processing page {i+1}...")
                     
-                    # 方法1: 提取純文字
-                    text = page.extract_text()
+                    # 方法1: 文字層（分類時已提取）
+                    text = triage.text if triage.uses_text_layer else ""
                     
                     # 調試信息
                     logger.info(f"  📊 Page {i+1} text analysis:")
-                    logger.info(f"      Text length: {len(text.strip()) if text else 0} chars")
-                    logger.info(f"      Word count: {len(text.strip().split()) if text else 0} words")
-                    logger.info(f"      Line count: {len([line for line in text.split('\\n') if line.strip()]) if text else 0} lines")
-                    logger.info(f"      Text preview: '{(text.strip()[:100] + '...') if text and len(text.strip()) > 100 else (text.strip() if text else 'No text')}'")
-                    
-                    # 方法2: 智能檢測是否需要OCR (基於圖片數量)
-                    needs_ocr = False
-                    ocr_reason = ""
-                    
-                    # 檢查頁面是否包含圖片
-                    image_list = pdf_doc[i].get_images()
-                    has_images = len(image_list) > 0
-                    
-                    if not text or len(text.strip()) < 50:  # 文字很少
-                        needs_ocr = True
-                        ocr_reason = "text too short (<50 chars)"
-                    elif has_images and len(text.strip()) < 300:  # 有圖片且文字不多
-                        needs_ocr = True
-                        ocr_reason = f"has {len(image_list)} images with limited text (<300 chars)"
-                    elif text and len(text.strip().split()) < 15:  # 詞數很少
-                        needs_ocr = True
-                        ocr_reason = "very few words (<15 words)"
-                    
-                    logger.info(f"      Images on page: {len(image_list)}")
-                    logger.info(f"      OCR needed: {needs_ocr} ({ocr_reason if needs_ocr else 'sufficient text content'})")
+                    logger.info(f"      Page type: {page_entry.kind} ({triage.elapsed_ms:.2f} ms triage)")
+                    logger.info(f"      Text length: {page_entry.char_count} chars")
+                    logger.info(f"      Word count: {page_entry.word_count} words")
+                    logger.info(f"      Images on page: {page_entry.image_count} ({page_entry.image_coverage:.0%} coverage)")
+                    decision = ocr_decisions.get(i) or policy.decide(doc_class, triage)
+                    page_entry.reason, page_entry.ocr_run = decision.reason, decision.run
+                    logger.info(f"      OCR needed: {decision.run} ({decision.reason})")
+                    if triage.needs_ocr and not decision.run:
+                        self._job_stats["ocr_policy"]["skipped_pages"] += 1
                     
-                    if needs_ocr:
+                    # 方法2: 根據分類結果和OCR策略決定是否OCR
+                    ocr_lines = []
+                    if decision.run:
                         logger.info(f"  🖼️ Page {i+1} appears to be image-heavy, trying OCR...")
-                        ocr_text = self._extract_text_from_images(pdf_doc[i], aws_region)
-                        if ocr_text and len(ocr_text.strip()) > len(text.strip() if text else ""):
-                            # 如果OCR提取的內容更多，使用OCR結果
-                            text = text + "\n\n" + ocr_text if text else ocr_text
-                            logger.info(f"  ✅ OCR enhanced content: {len(ocr_text)} additional characters")
-                        elif ocr_text:
-                            logger.info(f"  ℹ️ OCR found {len(ocr_text)} chars, keeping both text and OCR content")
-                            text = text + "\n\n" + ocr_text if text else ocr_text
+                        if i in async_ocr_lines:
+                            ocr_lines = async_ocr_lines[i]
                         else:
+                            ocr_lines = self._extract_text_from_images(pdf_doc[i], aws_region)
+                        
+                        # 只把文字層中沒有的OCR行加入譯文來源（全部行仍保留給翻譯PDF定位）
+                        novel_lines = ocr_lines
+                        if text.strip() and ocr_lines:
+                            novel_lines, gain, duplicate_chars = novel_ocr_lines(text, ocr_lines)
+                            policy.record(doc_class, triage, gain)
+                            policy_stats = self._job_stats["ocr_policy"]
+                            policy_stats["measured_pages"] += 1
+                            policy_stats["gain_total"] += gain
+                            policy_stats["duplicate_chars"] += duplicate_chars
+                            policy_stats["duplicate_lines"] += len(ocr_lines) - len(novel_lines)
+                            logger.info(f"  🧠 OCR gain {gain:.0%}: {len(ocr_lines) - len(novel_lines)} of "
+                                        f"{len(ocr_lines)} lines duplicate the text layer")
+                        
+                        ocr_text = join_ocr_lines(novel_lines)
+                        if ocr_text:
+                            text = text + "\n\n" + ocr_text if text.strip() else ocr_text
+                            logger.info(f"  ✅ OCR enhanced content: {len(ocr_text)} additional characters")
+                        elif not ocr_lines:
                             logger.warning(f"  ⚠️ OCR failed to extract any text from page {i+1}")
+                            # 掃描頁OCR失敗時退回到僅有的文字層
+                            text = text or triage.text
                     else:
                         logger.info(f"  📝 Page {i+1} has sufficient text, skipping OCR")
                     
-                    if text:
+                    if text.strip():
                         logger.info(f"  🤖 AI analyzing page {i+1} content...")
                         # 使用AI清理和過濾文字
-                        cleaned_text = self._ai_filter_content(text, aws_region)
+                        cleaned_text = self._ai_filter_content(text, aws_region, i + 1, bedrock_streaming, line_sink)
                         if cleaned_text:
                             pages_text.append(cleaned_text)
+                            page_entry.text, page_entry.ocr_lines = cleaned_text, ocr_lines_to_json(ocr_lines)
+                            # 保留OCR行級位置信息，供翻譯PDF覆蓋圖片區域
+                            self._page_records.append(PageRecord(i, cleaned_text, page_entry.hash, ocr_lines))
                     else:
                         logger.warning(f"  ⚠️ No text found on page {i+1}")
-                
-                pdf_doc.close()
+                    page_entry.degraded = self._degraded_pages.get(i, "")
             
             logger.info(f"✅ AI extracted and filtered text from {len(pages_text)} pages")
             return pages_text
@@ -263,8 +556,17 @@ class AWSPDFTranslator:
             logger.error(f"❌ Failed to extract PDF text: {e}")
             return []
     
-    def _extract_text_from_images(self, page, aws_region: str) -> str:
-        """從頁面圖片中提取文字（使用AWS Textract或本地OCR）"""
+    def _load_manifest_pages(self, manifest: DocumentManifest) -> List[str]:
+        """從文檔清單恢復頁面記錄（不打開PDF，不做OCR和AI過濾）"""
+        self._page_records = [PageRecord(entry.page_index, entry.text, entry.hash,
+                                         [OCRLine(*line) for line in entry.ocr_lines])
+                              for entry in manifest.pages if entry.text]
+        self._manifest_pages = []
+        logger.info(f"✅ Reused {len(self._page_records)} extracted pages from manifest")
+        return [record.text for record in self._page_records]
+    
+    def _extract_text_from_images(self, page, aws_region: str) -> List[OCRLine]:
+        """從頁面圖片中提取文字行（使用AWS Textract或本地OCR）"""
         try:
             # 方法1: 嘗試使用 AWS Textract (更準確)
             if aws_region:
@@ -272,85 +574,147 @@ class AWSPDFTranslator:
                     return self._aws_textract_ocr(page, aws_region)
                 except Exception as e:
                     logger.warning(f"AWS Textract failed: {e}, falling back to local OCR")
+                    self._mark_degraded(page.number, "Textract fallback")
             
             # 方法2: 使用本地 OCR (Tesseract)
             return self._local_tesseract_ocr(page)
             
         except Exception as e:
             logger.error(f"❌ OCR failed: {e}")
-            return ""
+            self._mark_degraded(page.number, "OCR failed")
+            return []
     
-    def _aws_textract_ocr(self, page, aws_region: str) -> str:
-        """使用 AWS Textract 進行 OCR"""
+    def _mark_degraded(self, page_index: int, reason: str):
+        """記錄提取結果降級（回退）的頁面；同一頁只保留第一個原因"""
+        if page_index is not None:
+            self._degraded_pages.setdefault(page_index, reason)
+    
+    def _textract_async_ocr(self, pdf_doc, triage_results, aws_region: str, textract_s3_bucket: str) -> dict:
+        """使用 AWS Textract 異步API一次處理所有需要OCR的頁面，返回 {頁索引: [OCRLine]}"""
+        ocr_pages = [triage.page_index for triage in triage_results if triage.needs_ocr]
+        if not aws_region or not textract_s3_bucket:
+            return {}
+        if len(ocr_pages) < TEXTRACT_ASYNC_MIN_PAGES:
+            logger.info(f"  ℹ️ {len(ocr_pages)} OCR pages, using per-page Textract calls")
+            return {}
+        
         try:
-            import boto3
-            import io
-            import fitz  # 添加這個導入
+            start = time.perf_counter()
+            async_ocr = TextractAsyncOCR(
+                self._get_client('textract', aws_region),
+                self._get_client('s3', aws_region),
+                textract_s3_bucket
+            )
+            lines_by_page = async_ocr.run(pdf_doc, ocr_pages)
+            elapsed = time.perf_counter() - start
+            
+            # 平均分攤上傳大小和耗時到每一頁
+            for index in ocr_pages:
+                self._record_ocr_stats(pdf_doc[index], "textract-async", 1.0,
+                                       async_ocr.payload_bytes // len(ocr_pages), elapsed / len(ocr_pages))
             
-            # 將頁面轉換為圖片
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x放大提高OCR準確度
-            img_data = pix.tobytes("png")
+            logger.info(f"  🔍 AWS Textract async extracted text from {len(lines_by_page)}/{len(ocr_pages)} pages")
+            return lines_by_page
+            
+        except Exception as e:
+            logger.warning(f"AWS Textract async OCR failed: {e}, falling back to per-page OCR")
+            return {}
+    
+    def _aws_textract_ocr(self, page, aws_region: str) -> List[OCRLine]:
+        """使用 AWS Textract 進行 OCR"""
+        try:
+            # 以自適應解析度渲染為緊湊的灰階圖片（不超過5MB限制）
+            start = time.perf_counter()
+            img_data, zoom = render_for_textract(page)
             
             # 調用 AWS Textract
-            textract_client = boto3.client('textract', region_name=aws_region)
+            textract_client = self._get_client('textract', aws_region)
             
             response = textract_client.detect_document_text(
                 Document={'Bytes': img_data}
             )
             
-            # 提取文字
-            extracted_text = []
-            for block in response['Blocks']:
-                if block['BlockType'] == 'LINE':
-                    extracted_text.append(block['Text'])
+            # 提取文字行和位置（相對座標轉換為頁面座標）
+            lines = [textract_line(block, page.rect) for block in response['Blocks']
+                     if block['BlockType'] == 'LINE']
             
-            result = '\n'.join(extracted_text)
-            logger.info(f"  🔍 AWS Textract extracted {len(result)} characters")
-            return result
+            self._record_ocr_stats(page, "textract", zoom, len(img_data), time.perf_counter() - start)
+            logger.info(f"  🔍 AWS Textract extracted {len(lines)} lines "
+                        f"({zoom:.2f}x, {len(img_data) / 1024:.0f} KB payload)")
+            return lines
             
         except Exception as e:
             logger.error(f"AWS Textract OCR failed: {e}")
             raise e
     
-    def _local_tesseract_ocr(self, page) -> str:
-        """使用本地 Tesseract 進行 OCR"""
+    def _local_tesseract_ocr(self, page) -> List[OCRLine]:
+        """使用本地 Tesseract 進行 OCR（優先使用持久化引擎池）"""
         try:
-            import pytesseract
-            from PIL import Image
-            import io
-            import fitz  # 添加這個導入
-            
-            # 將頁面轉換為圖片
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x放大提高OCR準確度
-            img_data = pix.tobytes("png")
+            # 以自適應解析度渲染灰階圖片，直接使用像素數據而不經過PNG編碼
+            start = time.perf_counter()
+            zoom = choose_ocr_zoom(page)
+            pix = render_grayscale(page, zoom)
             
-            # 轉換為PIL圖片
-            img = Image.open(io.BytesIO(img_data))
+            # 方法1: 持久化引擎，語言模型只載入一次
+            lines = None
+            engine = "tesseract-pool"
+            pool = get_tesseract_pool()
+            if pool is not None:
+                try:
+                    lines = pool.recognize(pix, zoom, page.rect)
+                except Exception as e:
+                    logger.warning(f"⚠️ Tesseract worker failed: {e}, falling back to subprocess OCR")
             
-            # 使用 Tesseract OCR (支持中英文)
-            custom_config = r'--oem 3 --psm 6 -l eng+chi_tra+chi_sim'
-            text = pytesseract.image_to_string(img, config=custom_config)
+            # 方法2: pytesseract 子進程 (支持中英文)
+            if lines is None:
+                import pytesseract
+                from PIL import Image
+                
+                engine = "tesseract"
+                img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                data = pytesseract.image_to_data(img, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+                lines = tesseract_data_lines(data, zoom, page.rect)
             
-            logger.info(f"  🔍 Tesseract OCR extracted {len(text)} characters")
-            return text.strip()
+            self._record_ocr_stats(page, engine, zoom, len(pix.samples), time.perf_counter() - start)
+            logger.info(f"  🔍 Tesseract OCR extracted {len(lines)} lines ({engine}, {zoom:.2f}x)")
+            return lines
             
         except ImportError:
             logger.warning("⚠️ pytesseract not installed, skipping local OCR")
-            return ""
+            return []
         except Exception as e:
             logger.error(f"Local Tesseract OCR failed: {e}")
-            return ""
+            self._mark_degraded(page.number, "OCR failed")
+            return []
     
-    def _ai_filter_content(self, text: str, aws_region: str) -> str:
-        """使用AI智能過濾內容"""
+    def _record_ocr_stats(self, page, engine: str, zoom: float, payload_bytes: int, seconds: float):
+        """記錄單頁OCR的負載大小和耗時"""
+        self._job_stats["ocr"].append({
+            "page": page.number + 1,
+            "engine": engine,
+            "zoom": round(zoom, 2),
+            "payload_bytes": payload_bytes,
+            "seconds": seconds
+        })
+    
+    def _ai_filter_content(self, text: str, aws_region: str, page_number: int = None,
+                           stream: bool = False, line_sink=None) -> str:
+        """使用AI智能過濾內容（stream為True時邊生成邊把完成的行交給line_sink）"""
         if not text or len(text.strip()) < 10:
             return text
         
+        # 超長頁面按句子邊界分塊，並行過濾後按原順序重組
+        if estimate_tokens(text) > FILTER_CHUNK_TOKENS:
+            chunks = chunk_text(text, max_tokens=FILTER_CHUNK_TOKENS)
+            logger.info(f"✂️ Page {page_number}: ~{estimate_tokens(text)} tokens split into {len(chunks)} chunks for AI filtering")
+            filtered_chunks = map_chunks(
+                lambda chunk: self._ai_filter_content(chunk, aws_region, page_number, stream, line_sink),
+                chunks
+            )
+            return '\n'.join(chunk.strip() for chunk in filtered_chunks if chunk.strip())
+        
         try:
-            import boto3
-            import json
-            
-            bedrock_client = boto3.client('bedrock-runtime', region_name=aws_region)
+            bedrock_client = self._get_client('bedrock-runtime', aws_region)
             
             # 構建AI分析prompt
             prompt = f"""請分析以下從PDF提取的文字，保留簡報的核心內容，移除不必要的元數據。
@@ -377,7 +741,7 @@ class AWSPDFTranslator:
             # 調用Claude進行內容分析
             body = {
                 "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
+                "max_tokens": FILTER_MAX_OUTPUT_TOKENS,
                 "messages": [
                     {
                         "role": "user",
@@ -386,13 +750,28 @@ class AWSPDFTranslator:
                 ]
             }
             
-            response = bedrock_client.invoke_model(
-                modelId="anthropic.claude-3-sonnet-20240229-v1:0",
-                body=json.dumps(body)
-            )
+            if stream:
+                response = bedrock_client.invoke_model_with_response_stream(
+                    modelId=BEDROCK_MODEL_ID,
+                    body=json.dumps(body)
+                )
+                filtered_content, usage = read_claude_stream(response['body'], line_sink)
+                filtered_content = filtered_content.strip()
+            else:
+                response = bedrock_client.invoke_model(
+                    modelId=BEDROCK_MODEL_ID,
+                    body=json.dumps(body)
+                )
+                
+                response_body = json.loads(response['body'].read())
+                filtered_content = response_body['content'][0]['text'].strip()
+                usage = response_body.get('usage', {})
             
-            response_body = json.loads(response['body'].read())
-            filtered_content = response_body['content'][0]['text'].strip()
+            self._job_stats["bedrock_tokens"].append({
+                "page": page_number,
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0)
+            })
             
             # 驗證AI過濾結果
             if len(filtered_content) > 10 and len(filtered_content) < len(text) * 1.2:
@@ -400,12 +779,33 @@ class AWSPDFTranslator:
                 return filtered_content
             else:
                 logger.warning("🤖 AI filtering result seems invalid, using fallback")
+                self._mark_degraded(page_number - 1 if page_number else None, "AI filter fallback")
                 return self._fallback_filter_content(text)
                 
         except Exception as e:
             logger.warning(f"🤖 AI filtering failed: {e}, using fallback")
+            self._mark_degraded(page_number - 1 if page_number else None, "AI filter fallback")
             return self._fallback_filter_content(text)
     
+    def _prefetch_line(self, line: str, source_lang: str, target_lang: str, backend,
+                       excluded_words: TermMatcher, job_start: float):
+        """預翻譯流式過濾產生的一行，結果只寫入翻譯緩存（與正式翻譯使用相同的保護和緩存鍵）"""
+        try:
+            protected_line = self._protect_text(line, excluded_words)[0] if excluded_words else line
+            protected_line = protected_line.strip()
+            if not protected_line or utf8_size(protected_line) > backend.max_line_bytes:
+                return
+            
+            cache = get_translation_cache()
+            if cache.get(source_lang, target_lang, protected_line, backend.name) is None:
+                translation = backend.translate_batch([protected_line], source_lang, target_lang)[0]
+                cache.put(source_lang, target_lang, protected_line, translation, backend.name)
+            
+            if self._job_stats["first_line_seconds"] is None:
+                self._job_stats["first_line_seconds"] = time.perf_counter() - job_start
+        except Exception as e:
+            logger.debug(f"Prefetch translation failed: {e}")
+    
     def _fallback_filter_content(self, text: str) -> str:
         """回退的內容過濾方法"""
         import re
@@ -428,20 +828,65 @@ class AWSPDFTranslator:
         return cleaned_text
     
     def _translate_pages(self, pages_text: List[str], source_lang: str, target_lang: str, 
-                        aws_region: str, excluded_words: List[str]) -> List[str]:
-        """翻譯所有頁面"""
+                        aws_region: str, excluded_words: TermMatcher, candidate_mode: bool = False,
+                        backend=None, previous: TranslationCheckpoint = None) -> List[str]:
+        """翻譯所有頁面（有檢查點時只翻譯有變化的行）"""
         try:
-            import boto3
-            
-            translate_client = boto3.client('translate', region_name=aws_region)
+            if backend is None:
+                backend = create_backend("amazon_translate", lambda service: self._get_client(service, aws_region))
             translated_pages = []
+            self._line_translations = {}
             
             for i, text in enumerate(pages_text):
                 logger.info(f"  🔄 Translating page {i+1}")
+                excluded_words.count_hits(text, self._job_stats["term_hits"])
+                record = self._page_records[i] if i < len(self._page_records) else None
+                
+                if previous and record:
+                    # 整頁未變：直接沿用上一版本的譯文
+                    reused_page = previous.find(record.hash)
+                    if reused_page and reused_page["text"] == text:
+                        self._job_stats["diff"]["pages_reused"] += 1
+                        self._job_stats["line_risks"].append([])
+                        record.translation = reused_page["translation"]
+                        translated_pages.append(record.translation)
+                        self._record_line_translations(text, record.translation)
+                        self._record_ocr_translations(record, text, record.translation, source_lang, target_lang,
+                                                      backend, excluded_words)
+                        logger.info(f"    ♻️ Page {i+1} carried over from checkpoint")
+                        continue
                 
                 # 翻譯文字（保護排除詞彙）
-                translated_text = self._translate_with_protection(text, source_lang, target_lang, translate_client, excluded_words)
+                issue_start = len(self._job_stats["marker_issues"])
+                if previous and previous.page_at(i):
+                    translated_text = self._translate_changed_lines(text, previous.page_at(i), source_lang, target_lang,
+                                                                    backend, excluded_words)
+                else:
+                    translated_text = self._translate_with_protection(text, source_lang, target_lang, backend, excluded_words)
+                
+                for issue in self._job_stats["marker_issues"][issue_start:]:
+                    issue.page_index = i
+                
+                # 整頁一次完成幻覺評分和修正
+                translated_text, line_risks = get_quality_checker().review_page(text, translated_text, target_lang)
+                
+                # 多候選模式：只有被標記的行才額外請求候選翻譯
+                if candidate_mode and line_risks:
+                    translated_text, line_risks = self._refine_risky_lines(
+                        text, translated_text, line_risks, source_lang, target_lang,
+                        aws_region, backend, excluded_words
+                    )
+                self._job_stats["line_risks"].append(line_risks)
+                if line_risks:
+                    logger.warning(f"    🚨 Page {i+1}: {len(line_risks)} lines with hallucination risk "
+                                   f"(max score {max(risk.score for risk in line_risks)})")
+                
                 translated_pages.append(translated_text)
+                if record:
+                    record.translation = translated_text
+                    self._record_ocr_translations(record, text, translated_text, source_lang, target_lang,
+                                                  backend, excluded_words)
+                self._record_line_translations(text, translated_text)
                 
                 logger.info(f"    ✅ Page {i+1} translated")
             
@@ -451,281 +896,284 @@ class AWSPDFTranslator:
             logger.error(f"❌ Translation failed: {e}")
             return []
     
+    def _translate_changed_lines(self, text: str, previous_page: dict, source_lang: str, target_lang: str,
+                                 backend, excluded_words: TermMatcher) -> str:
+        """與上一版本同位置的頁面逐行對齊，只翻譯新增或修改的行"""
+        lines = text.split('\n')
+        carried = align_lines(previous_page["text"].split('\n'), previous_page["translation"].split('\n'), lines)
+        changed = [index for index, line in enumerate(lines) if line.strip() and index not in carried]
+        self._job_stats["diff"]["lines_reused"] += len(carried)
+        self._job_stats["diff"]["lines_translated"] += len(changed)
+        logger.info(f"    ♻️ {len(carried)} lines carried over, {len(changed)} lines to translate")
+        
+        if changed:
+            issue_start = len(self._job_stats["marker_issues"])
+            partial = self._translate_with_protection('\n'.join(lines[index] for index in changed),
+                                                      source_lang, target_lang, backend, excluded_words).split('\n')
+            if len(partial) != len(changed):
+                del self._job_stats["marker_issues"][issue_start:]
+                return self._translate_with_protection(text, source_lang, target_lang, backend, excluded_words)
+            carried.update(zip(changed, partial))
+            # 診斷中的行號換算回整頁行號
+            for issue in self._job_stats["marker_issues"][issue_start:]:
+                issue.line_index = changed[issue.line_index]
+        
+        return '\n'.join(carried.get(index, '') for index in range(len(lines)))
+    
+    def _save_checkpoint(self, path: str, settings: dict):
+        """保存本次結果，供下一個版本的差異模式使用"""
+        try:
+            pages = [{"hash": record.hash, "page_index": record.page_index, "text": record.text,
+                      "translation": record.translation, "ocr_lines": ocr_lines_to_json(record.ocr_lines)}
+                     for record in self._page_records]
+            TranslationCheckpoint(settings, pages).save(path)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to save checkpoint: {e}")
+    
+    def _candidate_sources(self, backend, target_lang: str, aws_region: str) -> List[Tuple[object, str]]:
+        """多候選模式的 (後端, 變體) 列表：所選後端的變體；Amazon Translate 另加 Bedrock Claude 候選"""
+        sources = [(backend, variant) for variant in backend.candidate_variants(target_lang)]
+        if backend.name == "amazon_translate" and aws_region:
+            bedrock = create_backend("bedrock", lambda service: self._get_client(service, aws_region),
+                                     bedrock_model_id=BEDROCK_MODEL_ID)
+            sources += [(bedrock, variant) for variant in bedrock.candidate_variants(target_lang)]
+        return sources
+    
+    def _refine_risky_lines(self, text: str, translated_text: str, line_risks: list,
+                            source_lang: str, target_lang: str, aws_region: str,
+                            backend, excluded_words: TermMatcher) -> Tuple[str, list]:
+        """並行獲取有風險行的候選翻譯，評分後保留最佳結果，返回 (譯文, 剩餘風險)"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        source_lines = text.split('\n')
+        translated_lines = translated_text.split('\n')
+        if len(source_lines) != len(translated_lines):
+            return translated_text, line_risks
+        
+        sources = self._candidate_sources(backend, target_lang, aws_region)
+        if not sources:
+            logger.info(f"    ℹ️ Candidate mode: {backend.name} has no translation variants for {target_lang}")
+            return translated_text, line_risks
+        
+        with ThreadPoolExecutor(max_workers=CANDIDATE_WORKERS) as executor:
+            futures = {
+                risk.line_index: [
+                    executor.submit(self._fetch_candidate, candidate_backend, variant,
+                                    source_lines[risk.line_index].strip(), source_lang, target_lang, excluded_words)
+                    for candidate_backend, variant in sources
+                ]
+                for risk in line_risks
+            }
+            
+            remaining_risks = []
+            for risk in line_risks:
+                index = risk.line_index
+                results = [future.result() for future in futures[index]]
+                candidates = [translated_lines[index]] + [result for result in results if result]
+                
+                best, score, reasons = self._select_best_translation(candidates, source_lines[index], target_lang)
+                self._job_stats["candidate_lines"] += 1
+                # 只計成功返回的請求
+                self._job_stats["candidate_calls"] += sum(1 for result in results if result is not None)
+                if best != translated_lines[index]:
+                    self._job_stats["candidate_replaced"] += 1
+                    translated_lines[index] = best
+                if score:
+                    remaining_risks.append(LineRisk(index, score, reasons))
+        
+        logger.info(f"    🎯 Candidate mode: {len(line_risks)} risky lines → {len(remaining_risks)} still flagged")
+        return '\n'.join(translated_lines), remaining_risks
+    
+    def _fetch_candidate(self, backend, variant: str, line: str, source_lang: str, target_lang: str,
+                         excluded_words: TermMatcher) -> Optional[str]:
+        """獲取一個候選翻譯；請求失敗時返回None，丟失排除詞彙的候選返回空字符串"""
+        try:
+            protected_line, word_map = self._protect_text(line, excluded_words)
+            candidate = backend.translate_variant(protected_line, source_lang, target_lang, variant)
+        except Exception as e:
+            logger.info(f"    ℹ️ Candidate {backend.name}/{variant} unavailable: {e}")
+            return None
+        
+        candidate, issues = self._restore_protected_words(candidate, protected_line, word_map)
+        if issues:
+            # 丟失排除詞彙的候選直接放棄
+            return ""
+        return self._improve_translation_quality(candidate, line, target_lang)
+    
+    def _select_best_translation(self, translations: List[str], original_text: str,
+                                 target_lang: str = "zh") -> Tuple[str, int, List[str]]:
+        """選擇最佳翻譯結果，基於通用的幻覺檢測，返回 (修正後翻譯, 分數, 原因)"""
+        checker = get_quality_checker()
+        
+        # 評估每個翻譯
+        best_translation = translations[0]
+        lowest_score, best_reasons = checker.score_line(best_translation, original_text, target_lang=target_lang)
+        for i, translation in enumerate(translations[1:], start=2):
+            score, reasons = checker.score_line(translation, original_text, target_lang=target_lang)
+            logger.info(f"Translation {i} hallucination score: {score}")
+            if score < lowest_score:
+                lowest_score, best_reasons = score, reasons
+                best_translation = translation
+        
+        # 修正選中的翻譯
+        corrected_translation = checker.fix_line(best_translation, original_text)
+        
+        if lowest_score > 0:
+            logger.warning(f"⚠️ Applied corrections to translation with hallucination score: {lowest_score}")
+        else:
+            logger.info("✅ Selected translation appears clean")
+        
+        return corrected_translation, lowest_score, best_reasons
+    
+    def _record_line_translations(self, text: str, translated_text: str):
+        """記錄逐行的原文→譯文對應（逐行翻譯保證行數一致）"""
+        original_lines = text.split('\n')
+        translated_lines = translated_text.split('\n')
+        if len(original_lines) != len(translated_lines):
+            return
+        for original, translated in zip(original_lines, translated_lines):
+            if original.strip() and translated.strip():
+                self._line_translations[original.strip()] = translated.strip()
+    
+    def _record_ocr_translations(self, record: PageRecord, text: str, translated_text: str, source_lang: str,
+                                 target_lang: str, backend, excluded_words: TermMatcher):
+        """按未過濾的OCR行文字記錄譯文（AI過濾可能改寫或合併行，不能靠過濾後的文字逐字對上OCR行）
+
+        與過濾後某一行完全相同的OCR行直接使用該行譯文；內容仍保留在過濾後文字中的其他行單獨翻譯（經過緩存）；
+        被AI過濾刪除的行（版權聲明等）不覆蓋；丟失排除詞彙的譯文不使用。
+        """
+        if not record.ocr_lines:
+            return
+        line_map = {}
+        original_lines = text.split('\n')
+        translated_lines = translated_text.split('\n')
+        if len(original_lines) == len(translated_lines):
+            line_map = {original.strip(): translated.strip() for original, translated in zip(original_lines, translated_lines)
+                        if original.strip() and translated.strip()}
+        
+        kept_text = _alnum(text)
+        pending = []
+        for ocr_line in record.ocr_lines:
+            key = ocr_line.text.strip()
+            if not key or key in record.ocr_translations or key in pending:
+                continue
+            if key in line_map:
+                record.ocr_translations[key] = line_map[key]
+            elif _alnum(key) and _alnum(key) in kept_text:
+                pending.append(key)
+        if not pending:
+            return
+        
+        issue_start = len(self._job_stats["marker_issues"])
+        translated = self._translate_with_protection('\n'.join(pending), source_lang, target_lang, backend, excluded_words)
+        lost = {issue.line_index for issue in self._job_stats["marker_issues"][issue_start:]}
+        del self._job_stats["marker_issues"][issue_start:]
+        translated_pending = translated.split('\n')
+        if len(translated_pending) != len(pending):
+            return
+        for index, (key, translation) in enumerate(zip(pending, translated_pending)):
+            if index not in lost and translation.strip() and translation.strip() != key:
+                record.ocr_translations[key] = translation.strip()
+    
     def _translate_with_protection(self, text: str, source_lang: str, target_lang: str, 
-                                  translate_client, excluded_words: List[str]) -> str:
+                                  backend, excluded_words: TermMatcher) -> str:
         """翻譯文字並保護排除詞彙"""
         logger.info(f"🔍 DEBUG: Processing text: '{text[:100]}...'")
-        logger.info(f"🔍 DEBUG: Excluded words list: {excluded_words}")
+        logger.info(f"🔍 DEBUG: Excluded words: {len(excluded_words)} terms")
         
         if not excluded_words:
             logger.info("🔍 DEBUG: No excluded words, proceeding with normal translation")
-            return self._translate_text(text, source_lang, target_lang, translate_client)
-        
-        # 步驟1: 用數字標記保護排除詞彙
-        protected_text = text
-        word_map = {}
-        
-        # 按長度排序，先處理長詞彙（避免短詞彙覆蓋長詞彙）
-        sorted_words = sorted([w.strip() for w in excluded_words if w.strip()], key=len, reverse=True)
-        logger.info(f"🔍 DEBUG: Sorted words for protection: {sorted_words}")
-        
-        for i, word in enumerate(sorted_words):
-            if word in text:
-                # 使用純數字標記，不太會被翻譯
-                marker = f"999{i:03d}999"  # 例如: 999000999, 999001999
-                word_map[marker] = word
-                
-                # 使用詞邊界匹配，避免部分匹配
-                import re
-                # 對於包含空格的短語，直接替換
-                if ' ' in word:
-                    protected_text = protected_text.replace(word, marker)
-                else:
-                    # 對於單詞，使用詞邊界匹配
-                    pattern = r'\b' + re.escape(word) + r'\b'
-                    protected_text = re.sub(pattern, marker, protected_text, flags=re.IGNORECASE)
-                
-                logger.info(f"    🛡️ Protected: '{word}' → {marker}")
-            else:
-                logger.info(f"    ❌ Word '{word}' not found in text")
+            return self._translate_text(text, source_lang, target_lang, backend)
         
+        # 步驟1: 用標記保護排除詞彙
+        protected_text, word_map = self._protect_text(text, excluded_words)
         logger.info(f"🔍 DEBUG: Protected text: '{protected_text[:100]}...'")
         
         # 步驟2: 翻譯保護後的文字
-        translated_text = self._translate_text(protected_text, source_lang, target_lang, translate_client)
+        translated_text = self._translate_text(protected_text, source_lang, target_lang, backend)
         logger.info(f"🔍 DEBUG: Translated text: '{translated_text[:100]}...'")
         
-        # 步驟3: 恢復原始詞彙
-        for marker, original_word in word_map.items():
-            if marker in translated_text:
-                translated_text = translated_text.replace(marker, original_word)
-                logger.info(f"    🔄 Restored: {marker} → '{original_word}'")
-            else:
-                logger.warning(f"    ⚠️ Marker {marker} not found in translation!")
-                # 檢查是否有部分標記殘留
-                partial_markers = [m for m in translated_text.split() if '999' in m and m.isdigit()]
-                if partial_markers:
-                    logger.warning(f"    ⚠️ Found partial markers: {partial_markers}")
-                    for partial in partial_markers:
-                        translated_text = translated_text.replace(partial, original_word)
-                        logger.info(f"    🔄 Fixed partial marker: {partial} → '{original_word}'")
+        # 步驟3: 恢復原始詞彙（未能恢復的標記記錄為逐行診斷）
+        translated_text, issues = self._restore_protected_words(translated_text, protected_text, word_map)
+        self._job_stats["marker_issues"].extend(issues)
         
         logger.info(f"🔍 DEBUG: Final text: '{translated_text[:100]}...'")
         return translated_text
     
-    def _translate_text(self, text: str, source_lang: str, target_lang: str, translate_client) -> str:
-        """翻譯文字"""
+    def _protect_text(self, text: str, excluded_words: TermMatcher) -> Tuple[str, dict]:
+        """用不可翻譯的標記 <x id="N"/> 替換排除詞彙，返回 (保護後文字, {標記編號: 原詞})"""
+        protected_text, term_map = excluded_words.protect(text)
+        if term_map:
+            logger.info(f"    🛡️ Protected {len(term_map)} terms: {', '.join(list(term_map.values())[:10])}"
+                        f"{' ...' if len(term_map) > 10 else ''}")
+        return protected_text, term_map
+    
+    def _restore_protected_words(self, translated_text: str, protected_text: str, term_map: dict) -> Tuple[str, list]:
+        """一次遍歷把標記恢復為原始詞彙，返回 (譯文, 逐行標記診斷)"""
+        translated_text, issues = restore_markers(translated_text, protected_text, term_map)
+        for issue in issues:
+            logger.warning(f"    ⚠️ Line {issue.line_index + 1}: {issue.describe()}")
+        return translated_text, issues
+    
+    def _translate_text(self, text: str, source_lang: str, target_lang: str, backend) -> str:
+        """翻譯文字（逐行對應，整頁未緩存的行一次批量交給翻譯後端）"""
         try:
-            # 檢查是否包含換行，如果有則分段處理
-            if '\n' in text:
-                lines = text.split('\n')
-                translated_lines = []
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:  # 空行
-                        translated_lines.append('')
-                        continue
-                    
-                    # 翻譯每一行
-                    response = translate_client.translate_text(
-                        Text=line,
-                        SourceLanguageCode=source_lang,
-                        TargetLanguageCode=target_lang
-                    )
-                    translated_line = response['TranslatedText']
-                    
-                    # 後處理：改善翻譯質量
-                    improved_line = self._improve_translation_quality(translated_line, line)
-                    translated_lines.append(improved_line)
-                
-                # 重新組合，保持換行
-                return '\n'.join(translated_lines)
+            original_lines = text.split('\n')
+            lines = [line.strip() for line in original_lines]
+            translations = iter(self._translate_lines([line for line in lines if line], source_lang, target_lang, backend))
             
-            else:
-                # 單行文本直接翻譯
-                response = translate_client.translate_text(
-                    Text=text,
-                    SourceLanguageCode=source_lang,
-                    TargetLanguageCode=target_lang
-                )
-                translated_text = response['TranslatedText']
-                
-                # 後處理：改善翻譯質量
-                improved_text = self._improve_translation_quality(translated_text, text)
-                return improved_text
+            # 後處理：整頁一次遍歷，按原文恢復縮進和項目符號，空行保持不變
+            translated_lines = [next(translations).replace('\n', ' ') if line else '' for line in lines]
+            return '\n'.join(get_post_processor(target_lang).process_lines(translated_lines, original_lines))
             
         except Exception as e:
             logger.error(f"❌ Translation API failed: {e}")
             return text  # 返回原文
     
-    def _improve_translation_quality(self, translation: str, original_text: str) -> str:
-        """通用翻譯質量改善 - 只做基本的格式清理"""
-        import re
-        improved = translation
-        
-        # 1. 基本格式清理（通用）
-        # 清理多餘空格
-        improved = re.sub(r'\s+', ' ', improved).strip()
-        
-        # 清理明顯的標點符號錯誤（通用）
-        improved = re.sub(r'。」', '。', improved)
-        improved = re.sub(r'，」', '，', improved)
-        improved = re.sub(r'」([。，！？])', r'\1', improved)
-        
-        # 2. 處理項目符號格式（通用）
-        if original_text.strip().startswith(('•', '-', '►')):
-            if not improved.strip().startswith(('•', '-', '►')):
-                if original_text.strip().startswith('•'):
-                    improved = '• ' + improved.strip()
-                elif original_text.strip().startswith('-'):
-                    improved = '- ' + improved.strip()
-                elif original_text.strip().startswith('►'):
-                    improved = '► ' + improved.strip()
-        
-        return improved
-        """選擇最佳翻譯結果，基於通用的幻覺檢測"""
-        if len(translations) == 1:
-            # 即使只有一個翻譯，也要檢查和修正幻覺
-            return self._fix_common_hallucinations(translations[0], original_text)
-        
-        # 通用幻覺檢測規則
-        def has_hallucination_signs(translation: str, original: str) -> int:
-            """返回幻覺指數，越高越可能是幻覺"""
-            score = 0
-            
-            # 1. 檢查是否包含明顯不相關的數字年份
-            import re
-            year_pattern = r'一九\d+年|二〇\d+年|\d{4}年'
-            if re.search(year_pattern, translation) and not re.search(r'\d{4}', original):
-                score += 20  # 提高分數，這是嚴重的幻覺
-                logger.warning(f"🚨 Detected suspicious year in translation: {translation}")
-            
-            # 2. 檢查特定的幻覺模式
-            hallucination_patterns = [
-                r'一九+年',  # 連續的一九年
-                r'九+年',    # 連續的九年
-                r'國際.*署', # 國際XX署
-                r'工商.*局', # 工商XX局
-            ]
-            for pattern in hallucination_patterns:
-                if re.search(pattern, translation):
-                    score += 15
-                    logger.warning(f"🚨 Detected hallucination pattern: {pattern}")
-            
-            # 3. 檢查長度比例異常
-            original_len = len(original.split())
-            translation_len = len(translation)
-            if original_len > 0:
-                ratio = translation_len / original_len
-                if ratio > 4 or ratio < 0.2:  # 翻譯結果長度嚴重異常
-                    score += 10
-                    logger.warning(f"🚨 Suspicious length ratio: {ratio}")
-            
-            # 4. 檢查英文縮寫是否被錯誤翻譯
-            english_abbrevs = re.findall(r'\b[A-Z]{2,}\b', original)
-            for abbrev in english_abbrevs:
-                if abbrev not in translation and len(abbrev) <= 5:
-                    score += 5
-                    logger.warning(f"🚨 Missing abbreviation: {abbrev}")
-            
-            return score
-        
-        # 評估每個翻譯
-        best_translation = translations[0]
-        lowest_score = float('inf')
+    def _translate_lines(self, lines: List[str], source_lang: str, target_lang: str, backend) -> List[str]:
+        """翻譯多行：先查進程共享的翻譯緩存，未命中的行去重後批量翻譯"""
+        cache = get_translation_cache()
+        results = {}
+        pending = []
+        for line in lines:
+            self._job_stats["cache_lookups"] += 1
+            if line in results:
+                self._job_stats["cache_hits"] += 1
+                continue
+            cached = cache.get(source_lang, target_lang, line, backend.name)
+            if cached is not None:
+                self._job_stats["cache_hits"] += 1
+            else:
+                pending.append(line)
+            results[line] = cached
         
-        for i, translation in enumerate(translations):
-            score = has_hallucination_signs(translation, original_text)
-            logger.info(f"Translation {i+1} hallucination score: {score}")
-            logger.info(f"Translation {i+1}: {translation[:100]}...")
+        if pending:
+            # 超過後端單次請求上限的行按句子分塊，與其他行一起批量翻譯
+            requests = []
+            spans = []
+            for line in pending:
+                if utf8_size(line) > backend.max_line_bytes:
+                    chunks = [chunk.strip() for chunk in chunk_text(line, max_bytes=backend.max_line_bytes) if chunk.strip()]
+                    logger.info(f"✂️ Line of {utf8_size(line)} bytes split into {len(chunks)} chunks for translation")
+                else:
+                    chunks = [line]
+                spans.append((len(requests), len(chunks)))
+                requests.extend(chunks)
             
-            if score < lowest_score:
-                lowest_score = score
-                best_translation = translation
+            translated = backend.translate_batch(requests, source_lang, target_lang)
+            for line, (start, count) in zip(pending, spans):
+                translation = join_translated_chunks(translated[start:start + count], target_lang) if count > 1 else translated[start]
+                cache.put(source_lang, target_lang, line, translation, backend.name)
+                results[line] = translation
         
-        # 修正選中的翻譯
-        corrected_translation = self._fix_common_hallucinations(best_translation, original_text)
-        
-        if lowest_score > 0:
-            logger.warning(f"⚠️ Applied corrections to translation with hallucination score: {lowest_score}")
-        else:
-            logger.info("✅ Selected translation appears clean")
-        
-        return corrected_translation
+        return [results[line] for line in lines]
     
-    def _fix_common_hallucinations(self, translation: str, original_text: str) -> str:
-        """通用幻覺修正機制 - 基於模式而非特定詞彙"""
-        import re
-        corrected = translation
-        
-        # 1. 通用年份幻覺檢測
-        # 如果原文沒有年份，但翻譯中出現了明顯的幻覺年份模式
-        has_year_in_original = bool(re.search(r'\b\d{4}\b', original_text))
-        
-        if not has_year_in_original:
-            # 移除明顯的幻覺年份模式（連續重複的數字年份）
-            hallucination_patterns = [
-                r'一九{3,}\d*年?',  # 一九九九九年等（3個以上重複）
-                r'二〇{3,}\d*年?',  # 二〇〇〇〇年等
-                r'九{3,}\d*年?',   # 九九九九年等
-                r'零{2,}\d*年?',   # 零零零年等
-            ]
-            
-            for pattern in hallucination_patterns:
-                matches = re.findall(pattern, corrected)
-                if matches:
-                    corrected = re.sub(pattern, '', corrected)
-                    logger.info(f"🔧 Removed hallucination year pattern: {matches}")
-        
-        # 2. 檢測和修正異常長度的翻譯
-        original_length = len(original_text.split())
-        translation_length = len(corrected)
-        
-        if original_length > 0:
-            ratio = translation_length / original_length
-            if ratio > 10:  # 翻譯結果異常長，可能包含幻覺
-                logger.warning(f"⚠️ Translation unusually long (ratio: {ratio:.1f})")
-                # 可以考慮截斷或重新翻譯
-        
-        # 3. 保護原文中的重要術語
-        # 提取原文中的英文縮寫和專有名詞
-        important_terms = []
-        
-        # 英文縮寫（2-6個大寫字母）
-        abbreviations = re.findall(r'\b[A-Z]{2,6}\b', original_text)
-        important_terms.extend(abbreviations)
-        
-        # 專有名詞（首字母大寫的詞）
-        proper_nouns = re.findall(r'\b[A-Z][a-z]{2,}\b', original_text)
-        important_terms.extend(proper_nouns)
-        
-        # 去重
-        important_terms = list(set(important_terms))
-        
-        # 檢查重要術語是否在翻譯中保留
-        missing_terms = []
-        for term in important_terms:
-            if len(term) <= 20 and term not in corrected:
-                missing_terms.append(term)
-        
-        if missing_terms:
-            logger.warning(f"⚠️ Important terms missing in translation: {missing_terms}")
-            # 注意：這裡只記錄，不自動修正，因為可能有合理的翻譯
-        
-        # 4. 清理格式問題
-        # 移除多餘空格
-        corrected = re.sub(r'\s+', ' ', corrected).strip()
-        
-        # 移除開頭的孤立標點符號
-        corrected = re.sub(r'^[-–—•]\s*', '', corrected)
-        
-        # 移除明顯的格式錯誤（如連續的標點符號）
-        corrected = re.sub(r'[。，]{2,}', '，', corrected)
-        
-        return corrected
-
-    def _create_translation_text_file(self, original_pages: List[str], translated_pages: List[str], output_path: str) -> bool:
+    def _improve_translation_quality(self, translation: str, original_text: str, target_lang: str = "zh") -> str:
+        """通用翻譯質量改善 - 只做基本的格式清理（按目標語言預編譯的規則）"""
+        return get_post_processor(target_lang).process_line(translation, original_text)
+    
+    def _create_translation_text_file(self, original_pages: List[str], translated_pages: List[str], output_path: str,
+                                      line_risks: List[list] = None, marker_issues: list = None) -> bool:
         """創建純文字翻譯文件"""
         try:
             # 改變輸出文件為.txt格式
@@ -752,6 +1200,22 @@ class AWSPDFTranslator:
                     f.write("🌐 Chinese Translation:\n")
                     f.write(translated + "\n\n")
                     
+                    # 逐行幻覺風險評分
+                    page_risks = line_risks[i] if line_risks and i < len(line_risks) else []
+                    if page_risks:
+                        f.write("🚨 Hallucination Risk:\n")
+                        for risk in page_risks:
+                            f.write(f"  Line {risk.line_index + 1}: score {risk.score} ({', '.join(risk.reasons)})\n")
+                        f.write("\n")
+                    
+                    # 未能恢復的排除詞彙
+                    page_issues = [issue for issue in marker_issues or [] if issue.page_index == i]
+                    if page_issues:
+                        f.write("🛡️ Excluded Term Markers:\n")
+                        for issue in page_issues:
+                            f.write(f"  Line {issue.line_index + 1}: {issue.describe()}\n")
+                        f.write("\n")
+                    
                     f.write("=" * 50 + "\n\n")
             
             # 驗證文件創建
@@ -766,6 +1230,39 @@ class AWSPDFTranslator:
             logger.error(f"❌ Failed to create text file: {e}")
             return False
     
+    def _create_bilingual_pdfs(self, pdf_replacer, pdf_source_path: str, translated_doc, pdf_formats: List[str],
+                               base_path: str, save_profile: str):
+        """用內存中的翻譯PDF組合左右對照 / 交錯PDF"""
+        with get_document_handles().open_document(pdf_source_path) as source_doc:
+            for output_format in pdf_formats:
+                build = build_side_by_side if output_format == "side_by_side" else build_interleaved
+                output_doc = build(source_doc, translated_doc)
+                output_path = output_path_for(base_path, output_format)
+                try:
+                    pdf_replacer.save_with_profile(output_doc, output_path, save_profile)
+                finally:
+                    output_doc.close()
+                self._job_stats["outputs"].append(output_path)
+                logger.info(f"✅ {output_format} PDF created: {output_path}")
+    
+    def _create_page_exports(self, output_formats: List[str], base_path: str, pdf_source_path: str,
+                             source_lang: str, target_lang: str):
+        """生成逐頁JSON / XLIFF 導出"""
+        for output_format in output_formats:
+            if output_format in PDF_OUTPUT_FORMATS:
+                continue
+            output_path = output_path_for(base_path, output_format)
+            try:
+                if output_format == "json":
+                    write_json(self._page_records, output_path, source_lang, target_lang)
+                else:
+                    write_xliff(self._page_records, output_path, source_lang, target_lang,
+                                os.path.basename(pdf_source_path))
+                self._job_stats["outputs"].append(output_path)
+                logger.info(f"✅ {output_format} export created: {output_path}")
+            except Exception as e:
+                logger.error(f"❌ Failed to create {output_format} export: {e}")
+    
     def _create_translation_mapping(self, original_pages: List[str], translated_pages: List[str]) -> dict:
         """創建原文到翻譯的映射字典"""
         translation_mapping = {}
@@ -794,6 +1291,9 @@ class AWSPDFTranslator:
                     if original_page.strip() and translated_page.strip():
                         translation_mapping[original_page.strip()] = translated_page.strip()
         
+        # 逐行對應最精確（也用於OCR行的覆蓋），優先於句子和段落映射
+        translation_mapping.update(self._line_translations)
+        
         logger.info(f"📝 Created translation mapping with {len(translation_mapping)} entries")
         return translation_mapping
     
@@ -813,7 +1313,7 @@ class AWSPDFTranslator:
 ✅ Status: Completed Successfully
 📄 Pages processed: {pages_count}
 📁 Output file: {os.path.basename(output_path)}
-🌐 Service: Amazon Translate + Bedrock AI
+🌐 Service: {self._job_stats["backend"]} + Bedrock AI ({self._job_stats["backend_calls"]} translation calls)
 ========================================
 """
         
@@ -822,10 +1322,107 @@ class AWSPDFTranslator:
             if pdf_replacement_success:
                 report += f"📄 Translated PDF: ✅ Created successfully\n"
                 report += f"📁 PDF Location: {os.path.basename(translated_pdf_path)}\n"
+                save_stats = self._job_stats["pdf_save"]
+                if save_stats:
+                    report += (f"📦 PDF size: {save_stats['bytes'] / 1024:.0f} KB, saved in {save_stats['seconds']:.2f}s "
+                               f"({save_stats['profile']} profile{', linearized' if save_stats['linearized'] else ''}, "
+                               f"{save_stats['render_workers']} render processes)\n")
             else:
                 report += f"📄 Translated PDF: ❌ Creation failed\n"
             report += "========================================\n"
         
+        # 添加OCR負載統計
+        ocr_stats = self._job_stats["ocr"]
+        if ocr_stats:
+            total_bytes = sum(item["payload_bytes"] for item in ocr_stats)
+            total_seconds = sum(item["seconds"] for item in ocr_stats)
+            report += f"🖼️ OCR pages: {len(ocr_stats)}\n"
+            report += f"📦 OCR payload: {total_bytes / len(ocr_stats) / 1024:.0f} KB/page\n"
+            report += f"⏱️ OCR time: {total_seconds / len(ocr_stats):.2f} s/page\n"
+            report += "========================================\n"
+        
+        policy_stats = self._job_stats["ocr_policy"]
+        if policy_stats["skipped_pages"] or policy_stats["duplicate_chars"]:
+            mean_gain = policy_stats["gain_total"] / max(policy_stats["measured_pages"], 1)
+            saved = ""
+            if ocr_stats:
+                seconds_per_page = sum(item["seconds"] for item in ocr_stats) / len(ocr_stats)
+                saved = f" (~{policy_stats['skipped_pages'] * seconds_per_page:.1f}s saved)"
+            report += (f"🧠 OCR policy: {policy_stats['skipped_pages']} low-gain OCR calls avoided{saved}, "
+                       f"{policy_stats['duplicate_chars']} duplicate chars ({policy_stats['duplicate_lines']} lines) "
+                       f"not sent to translation, mean gain {mean_gain:.0%}\n")
+        
+        manifest_stats = self._job_stats["manifest"]
+        if manifest_stats:
+            kinds = ", ".join(f"{count} {kind}" for kind, count in sorted(manifest_stats["kinds"].items()))
+            degraded = ""
+            if manifest_stats["degraded"]:
+                degraded = f", {manifest_stats['degraded']} pages fell back (re-extracted next run)"
+            report += (f"🗂️ Manifest: {manifest_stats['pages']} pages ({kinds}), {manifest_stats['words']} words, "
+                       f"{manifest_stats['images']} images"
+                       f"{', extraction skipped (unchanged PDF)' if manifest_stats['reused'] else ''}"
+                       f"{degraded}\n")
+        
+        source_io = self._job_stats["source_io"]
+        if source_io:
+            private = f", {source_io['private_parses']} private copies for concurrent use" if source_io["private_parses"] else ""
+            render_workers = (self._job_stats["pdf_save"] or {}).get("render_workers", 1)
+            workers = f", {render_workers} render processes reopened it" if render_workers > 1 else ""
+            size = source_io["bytes_read"]
+            size_text = f"{size / 1e6:.1f} MB" if size >= 1e6 else f"{size / 1e3:.0f} KB"
+            report += (f"📂 Source I/O: {size_text} read once ({source_io['mode']}), "
+                       f"parsed {source_io['parses']}× for {source_io['borrows']} stages{private}{workers}\n")
+        
+        # 添加幻覺風險摘要
+        risky_lines = sum(len(page_risks) for page_risks in self._job_stats["line_risks"])
+        if risky_lines:
+            report += f"🚨 Hallucination risk: {risky_lines} lines flagged (see translation file)\n"
+        if self._job_stats["term_hits"]:
+            top_terms = self._job_stats["term_hits"].most_common(5)
+            report += (f"📚 Excluded terms: {len(self._job_stats['term_hits'])} matched, {sum(self._job_stats['term_hits'].values())} hits"
+                       f" (top: {', '.join(f'{term} ×{count}' for term, count in top_terms)})\n")
+        if self._job_stats["marker_issues"]:
+            report += (f"🛡️ Excluded terms: {len(self._job_stats['marker_issues'])} lines with unrestored markers "
+                       f"(see translation file)\n")
+        if self._job_stats["candidate_lines"]:
+            report += (f"🎯 Candidates: {self._job_stats['candidate_lines']} lines re-scored with "
+                       f"{self._job_stats['candidate_calls']} extra calls, "
+                       f"{self._job_stats['candidate_replaced']} replaced\n")
+        
+        # 添加Bedrock token用量
+        token_usage = self._job_stats["bedrock_tokens"]
+        if token_usage:
+            input_tokens = sum(item["input_tokens"] for item in token_usage)
+            output_tokens = sum(item["output_tokens"] for item in token_usage)
+            report += f"🪙 Bedrock tokens: {input_tokens} in / {output_tokens} out ({len(token_usage)} pages)\n"
+        diff_stats = self._job_stats["diff"]
+        if diff_stats["pages_reused"] or diff_stats["lines_reused"]:
+            report += (f"♻️ Diff mode: {diff_stats['pages_reused']} pages reused, "
+                       f"{diff_stats['lines_reused']} lines carried over, {diff_stats['lines_translated']} lines translated\n")
+        if self._job_stats["first_line_seconds"] is not None:
+            report += f"⚡ First translated line after {self._job_stats['first_line_seconds']:.1f}s (streaming)\n"
+        
+        # 添加翻譯緩存和各階段耗時
+        if self._job_stats["cache_lookups"]:
+            hit_rate = self._job_stats["cache_hits"] / self._job_stats["cache_lookups"]
+            report += f"💾 Translation cache: {hit_rate:.0%} hit rate ({self._job_stats['cache_lookups']} lines)\n"
+        job_summary = self._job.summary() if self._job is not None else None
+        if job_summary and job_summary["requests"]:
+            requests = ", ".join(f"{service} {count}" for service, count in job_summary["requests"].items())
+            report += (f"🚦 Scheduler ({job_summary['priority']}): {sum(job_summary['requests'].values())} requests ({requests}), "
+                       f"waited {job_summary['wait_seconds']:.1f}s total / {job_summary['max_wait']:.2f}s max, "
+                       f"peak queue depth {job_summary['peak_queue_depth']}, "
+                       f"{job_summary['peak_concurrent_jobs']} concurrent jobs\n")
+        if self._job_stats["stages"]:
+            report += "⏱️ Stages: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self._job_stats["stages"].items()) + "\n"
+            report += "========================================\n"
+        
+        if self._job_stats["outputs"]:
+            report += "📚 Additional outputs:\n"
+            for extra_path in self._job_stats["outputs"]:
+                report += f"   • {os.path.basename(extra_path)}\n"
+            report += "========================================\n"
+        
         report += "\n📝 Translation Preview:\n"
         
         # 添加翻譯預覽
@@ -842,45 +1439,14 @@ class AWSPDFTranslator:
         
         return report
     
-    def _create_success_image(self) -> torch.Tensor:
-        """創建成功狀態圖像"""
-        # 創建簡單的成功狀態圖像
-        img = Image.new('RGB', (512, 256), color='lightgreen')
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            # 嘗試使用系統字體
-            font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
-        except:
-            font = ImageFont.load_default()
-        
-        # 繪製成功信息
-        draw.text((50, 100), "✅ PDF Translation", fill='darkgreen', font=font)
-        draw.text((50, 140), "Completed Successfully!", fill='darkgreen', font=font)
-        
-        # 轉換為tensor
-        img_array = np.array(img).astype(np.float32) / 255.0
-        img_tensor = torch.from_numpy(img_array)[None,]
-        
-        return img_tensor
+    def _create_success_image(self, pages_count: int = 0) -> "torch.Tensor":
+        """創建成功狀態圖像（頁數、吞吐量、緩存命中率和各階段耗時）"""
+        return render_job_status(self._job_stats, pages_count)
     
-    def _create_error_result(self, error_message: str) -> Tuple[torch.Tensor, str]:
+    def _create_error_result(self, error_message: str) -> Tuple["torch.Tensor", str]:
         """創建錯誤結果"""
         # 創建錯誤狀態圖像
-        img = Image.new('RGB', (512, 256), color='lightcoral')
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 20)
-        except:
-            font = ImageFont.load_default()
-        
-        draw.text((50, 100), "❌ Translation Failed", fill='darkred', font=font)
-        draw.text((50, 140), error_message[:30], fill='darkred', font=font)
-        
-        # 轉換為tensor
-        img_array = np.array(img).astype(np.float32) / 255.0
-        img_tensor = torch.from_numpy(img_array)[None,]
+        img_tensor = render_error_status(error_message)
         
         error_report = f"""❌ AWS PDF Translation Error
 ========================================
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Bedrock流式響應模塊
+解析 invoke_model_with_response_stream 的事件流，按行把結果交給下游並統計token用量
+"""
+
+import json
+import logging
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LineAssembler:
+    """把流式文本片段組裝成完整的行"""
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self._on_line = on_line
+        self._buffer = ""
+
+    def feed(self, text: str):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self._on_line(line)
+
+    def flush(self):
+        if self._buffer:
+            self._on_line(self._buffer)
+            self._buffer = ""
+
+
+def read_claude_stream(event_stream, on_line: Optional[Callable[[str], None]] = None) -> Tuple[str, dict]:
+    """讀取Claude Messages API的事件流，返回 (完整文本, {"input_tokens", "output_tokens"})
+
+    event_stream 是 boto3 EventStream（或任何產生 {"chunk": {"bytes": ...}} 的可迭代對象）。
+    每收到一個完整的行就調用 on_line。
+    """
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    parts = []
+    assembler = LineAssembler(on_line) if on_line else None
+
+    for event in event_stream:
+        chunk = event.get('chunk')
+        if not chunk:
+            # 流中的錯誤事件（如 throttlingException）
+            for key, value in event.items():
+                raise RuntimeError(f"Bedrock stream error {key}: {value}")
+            continue
+
+        payload = json.loads(chunk['bytes'])
+        event_type = payload.get('type')
+        if event_type == 'message_start':
+            usage["input_tokens"] = payload['message'].get('usage', {}).get('input_tokens', 0)
+        elif event_type == 'content_block_delta':
+            text = payload['delta'].get('text', '')
+            parts.append(text)
+            if assembler:
+                assembler.feed(text)
+        elif event_type == 'message_delta':
+            usage["output_tokens"] = payload.get('usage', {}).get('output_tokens', usage["output_tokens"])
+
+    if assembler:
+        assembler.flush()
+    return ''.join(parts), usage
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基準測試腳本
+用法: python benchmark.py <benchmark名稱> [參數...]
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def benchmark_triage(pdf_path="demo_input.pdf"):
+    """比較頁面快速分類與舊的 pdfplumber + get_images 檢測成本"""
+    import fitz
+    from page_triage import triage_document
+
+    print(f"🔎 Triage benchmark: {pdf_path}")
+
+    # 新方法: PyMuPDF 單次分類
+    pdf_doc = fitz.open(pdf_path)
+    start = time.perf_counter()
+    results = triage_document(pdf_doc)
+    triage_ms = (time.perf_counter() - start) * 1000
+    pdf_doc.close()
+    page_count = max(len(results), 1)
+
+    for result in results:
+        print(f"  Page {result.page_index + 1}: {result.kind:<8} {result.elapsed_ms:7.2f} ms  ({result.reason})")
+
+    # 舊方法: pdfplumber 全文解析 + 第二個解析器檢查圖片
+    legacy_ms = None
+    try:
+        import pdfplumber
+        start = time.perf_counter()
+        with pdfplumber.open(pdf_path) as pdf:
+            pdf_doc = fitz.open(pdf_path)
+            for i, page in enumerate(pdf.pages):
+                page.extract_text()
+                pdf_doc[i].get_images()
+            pdf_doc.close()
+        legacy_ms = (time.perf_counter() - start) * 1000
+    except ImportError:
+        print("⚠️ pdfplumber not installed, skipping legacy comparison")
+
+    print(f"\n📊 Triage: {triage_ms / page_count:.2f} ms/page ({triage_ms:.1f} ms total)")
+    if legacy_ms is not None:
+        print(f"📊 Legacy: {legacy_ms / page_count:.2f} ms/page ({legacy_ms:.1f} ms total)")
+        print(f"⚡ Speedup: {legacy_ms / max(triage_ms, 1e-6):.1f}x")
+
+
+def benchmark_ocr_payload(pdf_path="demo_input.pdf"):
+    """比較固定2x RGB PNG與自適應灰階渲染的Textract負載大小和渲染時間"""
+    import fitz
+    from ocr_engine import render_for_textract
+
+    print(f"🖼️ OCR payload benchmark: {pdf_path}")
+    pdf_doc = fitz.open(pdf_path)
+    legacy_bytes = adaptive_bytes = 0
+    legacy_ms = adaptive_ms = 0.0
+
+    for page in pdf_doc:
+        start = time.perf_counter()
+        legacy = page.get_pixmap(matrix=fitz.Matrix(2, 2)).tobytes("png")
+        legacy_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        adaptive, zoom = render_for_textract(page)
+        adaptive_ms += (time.perf_counter() - start) * 1000
+
+        legacy_bytes += len(legacy)
+        adaptive_bytes += len(adaptive)
+        print(f"  Page {page.number + 1}: 2.00x {len(legacy) / 1024:8.0f} KB → {zoom:.2f}x {len(adaptive) / 1024:8.0f} KB")
+
+    page_count = max(len(pdf_doc), 1)
+    pdf_doc.close()
+    print(f"\n📊 Legacy:   {legacy_bytes / page_count / 1024:.0f} KB/page, {legacy_ms / page_count:.1f} ms/page")
+    print(f"📊 Adaptive: {adaptive_bytes / page_count / 1024:.0f} KB/page, {adaptive_ms / page_count:.1f} ms/page")
+    print(f"⚡ Payload reduction: {(1 - adaptive_bytes / max(legacy_bytes, 1)):.0%}")
+
+
+def benchmark_import(runs="3"):
+    """測量ComfyUI註冊節點（導入套件）的耗時，與預先導入重型依賴的舊行為比較"""
+    import subprocess
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    template = (
+        "import sys, time, importlib\n"
+        "sys.path.insert(0, {parent!r})\n"
+        "start = time.perf_counter()\n"
+        "{eager}"
+        "importlib.import_module({package!r})\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    eager_imports = "import torch, numpy, PIL.Image, fitz\n"
+
+    def measure(eager):
+        code = template.format(parent=os.path.dirname(package_dir),
+                               package=os.path.basename(package_dir), eager=eager)
+        timings = []
+        for _ in range(int(runs)):
+            output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            timings.append(float(output.stdout.strip().splitlines()[-1]) * 1000)
+        return min(timings)
+
+    print("⏱️ Node registration import benchmark")
+    lazy_ms = measure("")
+    eager_ms = measure(eager_imports)
+    print(f"📊 Lazy imports:  {lazy_ms:8.1f} ms")
+    print(f"📊 Eager imports: {eager_ms:8.1f} ms (torch, numpy, PIL, PyMuPDF)")
+    print(f"⚡ Saved: {eager_ms - lazy_ms:.1f} ms per ComfyUI boot")
+
+
+def _legacy_quality_line(translation, original):
+    """舊版逐行檢查（每次調用都用字符串模式重新查找正則）"""
+    import re
+    score = 0
+    if re.search(r'一九\d+年|二〇\d+年|\d{4}年', translation) and not re.search(r'\d{4}', original):
+        score += 20
+    for pattern in [r'一九+年', r'九+年', r'國際.*署', r'工商.*局']:
+        if re.search(pattern, translation):
+            score += 15
+    for abbrev in re.findall(r'\b[A-Z]{2,}\b', original):
+        if abbrev not in translation and len(abbrev) <= 5:
+            score += 5
+    corrected = translation
+    if not re.search(r'\b\d{4}\b', original):
+        for pattern in [r'一九{3,}\d*年?', r'二〇{3,}\d*年?', r'九{3,}\d*年?', r'零{2,}\d*年?']:
+            if re.findall(pattern, corrected):
+                corrected = re.sub(pattern, '', corrected)
+    terms = list(set(re.findall(r'\b[A-Z]{2,6}\b', original) + re.findall(r'\b[A-Z][a-z]{2,}\b', original)))
+    [term for term in terms if term not in corrected]
+    corrected = re.sub(r'\s+', ' ', corrected).strip()
+    corrected = re.sub(r'^[-–—•]\s*', '', corrected)
+    corrected = re.sub(r'[。，]{2,}', '，', corrected)
+    return score, corrected
+
+
+def benchmark_quality(line_count="20000"):
+    """比較舊版逐行幻覺檢查與整頁一次遍歷的質量檢查引擎"""
+    from quality_checks import get_quality_checker
+
+    line_count = int(line_count)
+    source_lines = [f"Amazon ElastiCache for Valkey supports AWS IAM and TLS in region {i}" for i in range(line_count)]
+    translated_lines = [f"Amazon ElastiCache for Valkey 支援 AWS IAM 和 TLS，區域 {i}" for i in range(line_count)]
+    pages = [('\n'.join(source_lines[i:i + 50]), '\n'.join(translated_lines[i:i + 50]))
+             for i in range(0, line_count, 50)]
+
+    print(f"🛡️ Quality check benchmark: {line_count} lines")
+    start = time.perf_counter()
+    for original, translation in zip(source_lines, translated_lines):
+        _legacy_quality_line(translation, original)
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    checker = get_quality_checker()
+    start = time.perf_counter()
+    for source_text, translated_text in pages:
+        checker.review_page(source_text, translated_text)
+    engine_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📊 Legacy per-line: {legacy_ms / line_count * 1000:.1f} µs/line")
+    print(f"📊 Page engine:     {engine_ms / line_count * 1000:.1f} µs/line")
+    print(f"⚡ Speedup: {legacy_ms / max(engine_ms, 1e-6):.1f}x")
+
+
+def benchmark_backends(pdf_path="demo_input.pdf", backends="amazon_translate,bedrock,local_marian",
+                       source_lang="en", target_lang="zh-TW", aws_region="us-east-1"):
+    """同一份文檔逐一交給各翻譯後端（不使用緩存），比較耗時和調用次數"""
+    import fitz
+    import boto3
+    from translation_backends import create_backend
+
+    pdf_doc = fitz.open(pdf_path)
+    lines = [line.strip() for page in pdf_doc for line in page.get_text("text").split('\n') if line.strip()]
+    pdf_doc.close()
+    lines = list(dict.fromkeys(lines))
+    print(f"🌐 Backend benchmark: {len(lines)} unique lines from {pdf_path} ({source_lang} → {target_lang})")
+
+    clients = {}
+
+    def get_client(service):
+        if service not in clients:
+            clients[service] = boto3.client(service, region_name=aws_region)
+        return clients[service]
+
+    for name in backends.split(','):
+        try:
+            backend = create_backend(name.strip(), get_client)
+            start = time.perf_counter()
+            translations = backend.translate_batch(lines, source_lang, target_lang)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            print(f"⚠️ {name}: unavailable ({e})")
+            continue
+        print(f"📊 {name:<17} {elapsed:7.2f} s  {len(lines) / max(elapsed, 1e-6):8.1f} lines/s  {backend.calls} calls")
+        if translations:
+            print(f"    e.g. {lines[0][:40]!r} → {translations[0][:40]!r}")
+
+
+def _legacy_text_positions(doc):
+    """舊版 extract_text_positions：每個span一個dict"""
+    text_positions = []
+    for page_num in range(len(doc)):
+        for block in doc[page_num].get_text("dict")["blocks"]:
+            if "lines" in block:
+                for line in block["lines"]:
+                    for span in line["spans"]:
+                        text_positions.append({
+                            "page": page_num,
+                            "text": span["text"],
+                            "bbox": span["bbox"],
+                            "font": span["font"],
+                            "size": span["size"],
+                            "flags": span["flags"]
+                        })
+    return text_positions
+
+
+def benchmark_memory(pdf_path="", pages="1000", spans_per_page="40"):
+    """比較每span一個dict與列式SpanTable的常駐內存和構建峰值（不指定PDF時生成合成目錄）"""
+    import gc
+    import tracemalloc
+    import fitz
+    from document_model import SpanTable
+
+    if pdf_path:
+        doc = fitz.open(pdf_path)
+    else:
+        doc = fitz.open()
+        for page_num in range(int(pages)):
+            page = doc.new_page()
+            for row in range(int(spans_per_page)):
+                page.insert_text((40, 30 + row * 19), f"SKU-{page_num:05d}-{row:03d} Product item description {row}",
+                                 fontsize=9 + row % 3)
+    print(f"🧮 Memory benchmark: {len(doc)} pages")
+
+    # 預熱：排除首次導入numpy等模塊的分配
+    warmup = fitz.open()
+    warmup.new_page().insert_text((40, 40), "warmup")
+    _legacy_text_positions(warmup)
+    SpanTable.from_document(warmup)
+    warmup.close()
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build(doc)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, retained, peak, elapsed
+
+    legacy, legacy_retained, legacy_peak, legacy_s = measure(_legacy_text_positions)
+    span_count = len(legacy)
+    del legacy
+    table, table_retained, table_peak, table_s = measure(SpanTable.from_document)
+    doc.close()
+
+    print(f"📊 Dict per span: {legacy_retained / 1024 / 1024:7.1f} MB retained, {legacy_peak / 1024 / 1024:7.1f} MB peak, "
+          f"{legacy_s:.2f} s ({span_count} spans)")
+    print(f"📊 SpanTable:     {table_retained / 1024 / 1024:7.1f} MB retained, {table_peak / 1024 / 1024:7.1f} MB peak, "
+          f"{table_s:.2f} s ({len(table)} spans, {len(table.fonts)} fonts)")
+    print(f"⚡ Retained memory reduction: {1 - table_retained / max(legacy_retained, 1):.0%}")
+
+
+def benchmark_fonts(span_count="10000", spans_per_page="200"):
+    """比較逐span insert_text 與共享CJK字體 + 每頁一個TextWriter的渲染耗時和輸出大小"""
+    import fitz
+    from pdf_text_replacer import PDFTextReplacer
+
+    span_count = int(span_count)
+    spans_per_page = int(spans_per_page)
+    font = PDFTextReplacer().font
+    print(f"🔤 Font benchmark: {span_count} CJK spans, font {font.name}")
+
+    def render(per_page):
+        doc = fitz.open()
+        start = time.perf_counter()
+        for page_num in range(0, span_count, spans_per_page):
+            page = doc.new_page()
+            per_page(page, [(40, 20 + row * 4, f"翻譯測試 第{page_num}頁 第{row}行 Amazon")
+                            for row in range(min(spans_per_page, span_count - page_num))])
+        render_s = time.perf_counter() - start
+        start = time.perf_counter()
+        doc.subset_fonts()
+        data = doc.tobytes(garbage=3, deflate=True)
+        save_s = time.perf_counter() - start
+        doc.close()
+        return render_s, save_s, len(data)
+
+    def legacy(page, spans):
+        font_buffer = font.buffer
+        for x, y, text in spans:
+            page.insert_font(fontname="cjk", fontbuffer=font_buffer)
+            page.insert_text((x, y), text, fontname="cjk", fontsize=4)
+
+    def writer(page, spans):
+        text_writer = fitz.TextWriter(page.rect)
+        for x, y, text in spans:
+            text_writer.append((x, y), text, font=font, fontsize=4)
+        text_writer.write_text(page)
+
+    for name, per_page in (("insert_text per span", legacy), ("shared font + TextWriter", writer)):
+        render_s, save_s, size = render(per_page)
+        print(f"📊 {name:<25} render {render_s:6.2f} s, subset+save {save_s:5.2f} s, {size / 1024:8.0f} KB")
+
+
+def benchmark_render(pages="200", workers="0"):
+    """比較單進程與多進程渲染翻譯PDF的耗時（workers=0 時按CPU核心數自動決定）"""
+    import tempfile
+    import fitz
+    from pdf_text_replacer import PDFTextReplacer, render_worker_count
+
+    pages = int(pages)
+    workers = int(workers) or render_worker_count(pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, "source.pdf")
+        doc = fitz.open()
+        for page_num in range(pages):
+            page = doc.new_page()
+            page.draw_rect(fitz.Rect(50, 50, 400, 400), fill=(0.2, 0.5, 0.8))
+            for row in range(30):
+                page.insert_text((40, 30 + row * 20), f"Line {row} of page {page_num}")
+        doc.save(source_path)
+        doc.close()
+        translations = {f"Line {row} of page {page_num}": f"第{page_num}頁第{row}行"
+                        for page_num in range(pages) for row in range(30)}
+
+        print(f"🖨️ Render benchmark: {pages} pages, {os.cpu_count()} CPUs")
+        replacer = PDFTextReplacer()
+        timings = {}
+        for count in sorted({1, workers}):
+            start = time.perf_counter()
+            replacer.create_translated_pdf(source_path, translations, os.path.join(tmp_dir, f"out_{count}.pdf"),
+                                           save_profile="fast", workers=count)
+            timings[count] = time.perf_counter() - start
+            print(f"📊 {count} process(es): {timings[count]:.2f} s ({pages / timings[count]:.1f} pages/s)")
+        if workers > 1:
+            print(f"⚡ Speedup: {timings[1] / timings[workers]:.1f}x")
+
+
+def benchmark_scheduler(bulk_jobs="2", requests_per_job="40", rate="20"):
+    """模擬多個批量任務和一個互動任務共享Translate配額，顯示各任務的等待時間和完成順序"""
+    import threading
+    from service_scheduler import ServiceScheduler, ScheduledClient
+
+    class FakeTranslate:
+        def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode):
+            return {"TranslatedText": Text}
+
+    scheduler = ServiceScheduler({"translate": (float(rate), None)})
+    requests_per_job = int(requests_per_job)
+    start = time.perf_counter()
+    finished = {}
+
+    def run_job(name, priority, request_count, delay):
+        time.sleep(delay)
+        job = scheduler.start_job(priority, name)
+        client = ScheduledClient(FakeTranslate(), "translate", job)
+        threads = [threading.Thread(target=client.translate_text,
+                                    kwargs={"Text": "x", "SourceLanguageCode": "en", "TargetLanguageCode": "zh"})
+                   for _ in range(request_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finished[name] = (job, time.perf_counter() - start)
+        job.finish()
+
+    jobs = [(f"bulk-{i + 1}", "bulk", requests_per_job, 0.0) for i in range(int(bulk_jobs))]
+    # 互動任務在批量任務排隊之後才到達
+    jobs.append(("interactive", "interactive", max(requests_per_job // 4, 1), 0.5))
+    print(f"🚦 Scheduler benchmark: {len(jobs)} jobs sharing {rate} requests/s")
+    threads = [threading.Thread(target=run_job, args=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name, (job, elapsed) in sorted(finished.items(), key=lambda item: item[1][1]):
+        print(f"📊 {name:<12} done at {elapsed:5.2f} s, {sum(job.requests.values())} requests, "
+              f"mean wait {job.wait_seconds / max(sum(job.requests.values()), 1):.2f} s, max wait {job.max_wait:.2f} s")
+
+
+def _legacy_improve_translation(translation, original_text):
+    """舊版 _improve_translation_quality：每行多次模塊級 re.sub，壓縮所有空白"""
+    import re
+    improved = re.sub(r'\s+', ' ', translation).strip()
+    improved = re.sub(r'。」', '。', improved)
+    improved = re.sub(r'，」', '，', improved)
+    improved = re.sub(r'」([。，！？])', r'\1', improved)
+    if original_text.strip().startswith(('•', '-', '►')):
+        if not improved.strip().startswith(('•', '-', '►')):
+            improved = original_text.strip()[0] + ' ' + improved.strip()
+    return improved
+
+
+def benchmark_postprocess(line_count="100000", target_lang="zh-TW"):
+    """比較舊版逐行後處理與按語言預編譯、整頁一次遍歷的後處理"""
+    from post_processing import get_post_processor
+
+    line_count = int(line_count)
+    samples = [
+        ("Amazon ElastiCache overview", "Amazon ElastiCache  概述。」"),
+        ("    • Redis compatible engine", "Redis 相容引擎"),
+        ("  - Valkey support", "支援\tValkey」！"),
+        ("Plain sentence for the benchmark.", "基準測試的普通句子。"),
+    ]
+    originals = [samples[i % len(samples)][0] for i in range(line_count)]
+    translations = [samples[i % len(samples)][1] for i in range(line_count)]
+    print(f"🧹 Post-processing benchmark: {line_count} lines ({target_lang})")
+
+    start = time.perf_counter()
+    legacy = [_legacy_improve_translation(translation, original)
+              for translation, original in zip(translations, originals)]
+    legacy_s = time.perf_counter() - start
+
+    processor = get_post_processor(target_lang)
+    start = time.perf_counter()
+    processed = []
+    # 按每頁50行分批，與實際整頁處理一致
+    for page_start in range(0, line_count, 50):
+        processed.extend(processor.process_lines(translations[page_start:page_start + 50],
+                                                 originals[page_start:page_start + 50]))
+    new_s = time.perf_counter() - start
+
+    indented = sum(1 for original, line in zip(originals, processed) if original[:1] == ' ' and line[:1] == ' ')
+    print(f"📊 Legacy per-line re.sub: {legacy_s:6.2f} s ({line_count / legacy_s:,.0f} lines/s)")
+    print(f"📊 Compiled page pass:     {new_s:6.2f} s ({line_count / new_s:,.0f} lines/s)")
+    print(f"⚡ Speedup: {legacy_s / new_s:.1f}x, indentation kept on {indented} lines (legacy: 0)")
+    print(f"   e.g. {legacy[1]!r} → {processed[1]!r}")
+
+
+def benchmark_glossary(term_count="1000", pages="200"):
+    """比較每次執行重新解析並逐詞替換排除詞彙與詞彙表倉庫（預編譯前綴樹匹配器）的成本"""
+    import re
+    from glossary_store import GlossaryStore
+
+    term_count, pages = int(term_count), int(pages)
+    terms = [f"Term{i:04d}" for i in range(term_count)] + ["Amazon ElastiCache", "AWS"]
+    excluded_words = "\n".join(terms)
+    page_text = "\n".join(f"Line {row}: AWS and Amazon ElastiCache with Term{row * 7 % term_count:04d} and plain words"
+                           for row in range(40))
+    print(f"📚 Glossary benchmark: {len(terms)} terms, {pages} pages")
+
+    # 舊方法：每次執行解析輸入框，每頁對每個詞彙做一次 re.sub
+    start = time.perf_counter()
+    parsed = [line.strip() for line in excluded_words.split("\n") if line.strip()]
+    sorted_words = sorted(parsed, key=len, reverse=True)
+    for _ in range(pages):
+        text = page_text
+        for i, word in enumerate(sorted_words):
+            if word in text:
+                text = re.sub(r'\b' + re.escape(word) + r'\b', f"999{i:03d}999", text, flags=re.IGNORECASE)
+    legacy_s = time.perf_counter() - start
+
+    store = GlossaryStore()
+    start = time.perf_counter()
+    matcher = store.matcher(excluded_words)
+    compile_s = time.perf_counter() - start
+    start = time.perf_counter()
+    repeat = store.matcher(excluded_words)
+    lookup_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(pages):
+        matcher.protect(page_text)
+    new_s = time.perf_counter() - start
+
+    print(f"📊 Legacy parse + per-term re.sub: {legacy_s:6.2f} s")
+    print(f"📊 Store: compile {compile_s * 1000:.0f} ms once, later runs {lookup_ms:.2f} ms, "
+          f"protect {new_s:6.2f} s (same matcher reused: {repeat is matcher})")
+    print(f"⚡ Speedup: {legacy_s / new_s:.1f}x")
+
+
+def benchmark_handles(pages="500", stages="3"):
+    """比較每個階段重新打開源PDF（另外分塊讀取計算摘要）與共享文檔句柄（讀取和解析一次）"""
+    import tempfile
+    import fitz
+    from document_manifest import file_digest
+    from document_handles import DocumentHandleManager
+
+    pages, stages = int(pages), int(stages)
+
+    def stage_work(doc):
+        # 各階段都會遍歷頁面並讀取頁面尺寸和文字
+        for page in doc:
+            page.rect
+        doc[len(doc) - 1].get_text()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, "source.pdf")
+        doc = fitz.open()
+        for page_num in range(pages):
+            page = doc.new_page()
+            for row in range(30):
+                page.insert_text((40, 30 + row * 20), f"Line {row} of page {page_num}")
+        doc.save(source_path)
+        doc.close()
+        size = os.path.getsize(source_path)
+        print(f"📂 Handle benchmark: {pages} pages ({size / 1e6:.1f} MB), {stages} stages")
+
+        # 舊方法：摘要單獨讀一遍文件，每個階段各自 fitz.open
+        start = time.perf_counter()
+        file_digest(source_path)
+        for _ in range(stages):
+            doc = fitz.open(source_path)
+            stage_work(doc)
+            doc.close()
+        legacy_s = time.perf_counter() - start
+
+        manager = DocumentHandleManager()
+        start = time.perf_counter()
+        with manager.opened(source_path) as handle:
+            handle.digest()
+            for _ in range(stages):
+                with manager.open_document(source_path) as doc:
+                    stage_work(doc)
+            stats = handle.stats()
+        new_s = time.perf_counter() - start
+
+        print(f"📊 Reopen per stage: {legacy_s:6.3f} s, {stages + 1} file reads, {stages} parses")
+        print(f"📊 Shared handle:    {new_s:6.3f} s, {stats['bytes_read'] / 1e6:.1f} MB read once ({stats['mode']}), "
+              f"{stats['parses']} parse(s)")
+        print(f"⚡ Speedup: {legacy_s / new_s:.1f}x")
+
+
+BENCHMARKS = {
+    "triage": benchmark_triage,
+    "ocr": benchmark_ocr_payload,
+    "import": benchmark_import,
+    "quality": benchmark_quality,
+    "backends": benchmark_backends,
+    "memory": benchmark_memory,
+    "fonts": benchmark_fonts,
+    "render": benchmark_render,
+    "scheduler": benchmark_scheduler,
+    "postprocess": benchmark_postprocess,
+    "glossary": benchmark_glossary,
+    "handles": benchmark_handles,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"用法: python benchmark.py <{'|'.join(BENCHMARKS)}> [參數...]")
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+雙語輸出模塊
+從同一份內存中的頁面數據和翻譯PDF一次生成：左右對照PDF、原文/譯文交錯PDF、逐頁JSON和XLIFF
+"""
+
+import os
+import json
+import logging
+from typing import List
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ["side_by_side", "interleaved", "json", "xliff"]
+PDF_OUTPUT_FORMATS = ("side_by_side", "interleaved")
+
+OUTPUT_SUFFIXES = {
+    "side_by_side": "_bilingual.pdf",
+    "interleaved": "_interleaved.pdf",
+    "json": "_pages.json",
+    "xliff": "_pages.xlf",
+}
+
+XLIFF_NAMESPACE = "urn:oasis:names:tc:xliff:document:1.2"
+
+
+def parse_output_formats(text: str) -> List[str]:
+    """解析節點輸入的逗號/換行分隔格式列表，忽略未知格式"""
+    formats = []
+    for name in text.replace('\n', ',').split(','):
+        name = name.strip().lower().replace('-', '_')
+        if not name:
+            continue
+        if name not in OUTPUT_FORMATS:
+            logger.warning(f"⚠️ Unknown bilingual output format: {name} (expected {', '.join(OUTPUT_FORMATS)})")
+            continue
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def output_path_for(base_path: str, output_format: str) -> str:
+    return os.path.splitext(base_path)[0] + OUTPUT_SUFFIXES[output_format]
+
+
+def _line_pairs(text: str, translation: str) -> List[tuple]:
+    """逐行對應（行數不一致時整頁作為一個單元）"""
+    source_lines = text.split('\n')
+    target_lines = translation.split('\n')
+    if len(source_lines) != len(target_lines):
+        return [(text, translation)]
+    return [(source, target) for source, target in zip(source_lines, target_lines) if source.strip()]
+
+
+def write_json(records, output_path: str, source_lang: str, target_lang: str) -> str:
+    """逐頁JSON：每頁的原文、譯文和逐行對應"""
+    pages = [{
+        "page": record.page_index + 1,
+        "source": record.text,
+        "target": record.translation,
+        "lines": [{"source": source, "target": target} for source, target in _line_pairs(record.text, record.translation)],
+    } for record in records]
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"source_language": source_lang, "target_language": target_lang, "pages": pages},
+                  f, ensure_ascii=False, indent=2)
+    return output_path
+
+
+def write_xliff(records, output_path: str, source_lang: str, target_lang: str, original_name: str) -> str:
+    """XLIFF 1.2：每頁一個group，每行一個trans-unit（id 為 p頁-行）"""
+    ElementTree.register_namespace('', XLIFF_NAMESPACE)
+    root = ElementTree.Element(f"{{{XLIFF_NAMESPACE}}}xliff", version="1.2")
+    file_element = ElementTree.SubElement(root, f"{{{XLIFF_NAMESPACE}}}file", {
+        "original": original_name, "source-language": source_lang,
+        "target-language": target_lang, "datatype": "plaintext",
+    })
+    body = ElementTree.SubElement(file_element, f"{{{XLIFF_NAMESPACE}}}body")
+
+    for record in records:
+        group = ElementTree.SubElement(body, f"{{{XLIFF_NAMESPACE}}}group", id=f"p{record.page_index + 1}")
+        for line_number, (source, target) in enumerate(_line_pairs(record.text, record.translation), start=1):
+            unit = ElementTree.SubElement(group, f"{{{XLIFF_NAMESPACE}}}trans-unit",
+                                          id=f"p{record.page_index + 1}-{line_number}")
+            ElementTree.SubElement(unit, f"{{{XLIFF_NAMESPACE}}}source").text = source
+            ElementTree.SubElement(unit, f"{{{XLIFF_NAMESPACE}}}target", state="translated").text = target
+
+    ElementTree.ElementTree(root).write(output_path, encoding='utf-8', xml_declaration=True)
+    return output_path
+
+
+def build_side_by_side(source_doc, translated_doc):
+    """左右對照：每頁寬度為原頁兩倍，左原文右譯文（頁面以XObject引用，不重新柵格化）"""
+    import fitz
+
+    output = fitz.open()
+    for page_num in range(min(len(source_doc), len(translated_doc))):
+        rect = source_doc[page_num].rect
+        page = output.new_page(width=rect.width * 2, height=rect.height)
+        page.show_pdf_page(fitz.Rect(0, 0, rect.width, rect.height), source_doc, page_num)
+        page.show_pdf_page(fitz.Rect(rect.width, 0, rect.width * 2, rect.height), translated_doc, page_num)
+    return output
+
+
+def build_interleaved(source_doc, translated_doc):
+    """交錯：原文第1頁、譯文第1頁、原文第2頁……"""
+    import fitz
+
+    output = fitz.open()
+    for page_num in range(min(len(source_doc), len(translated_doc))):
+        output.insert_pdf(source_doc, from_page=page_num, to_page=page_num)
+        output.insert_pdf(translated_doc, from_page=page_num, to_page=page_num)
+    return output
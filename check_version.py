@@ -20,8 +20,8 @@ def check_code_version():
         
         # 檢查關鍵功能
         checks = [
-            ("OCR trigger logic", "needs_ocr = False"),
-            ("OCR reason tracking", "ocr_reason = \"\""),
+            ("Page triage", "triage_document(pdf_doc)"),
+            ("OCR reason tracking", "triage.reason"),
             ("Detailed logging", "📊 Page {i+1} text analysis:"),
             ("AWS Textract method", "_aws_textract_ocr"),
             ("Local Tesseract method", "_local_tesseract_ocr"),
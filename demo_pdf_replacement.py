@@ -16,22 +16,19 @@ logger = logging.getLogger(__name__)
 def create_demo_pdf():
     """創建一個演示用的PDF文件"""
     try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
+        import fitz
         
         demo_pdf_path = "demo_input.pdf"
         
-        # 創建PDF
-        c = canvas.Canvas(demo_pdf_path, pagesize=letter)
-        width, height = letter
+        # 創建PDF（Letter尺寸）
+        doc = fitz.open()
+        page = doc.new_page(width=612, height=792)
         
         # 添加標題
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(100, height - 100, "AWS PDF Translation Demo")
+        page.insert_text((100, 100), "AWS PDF Translation Demo", fontname="hebo", fontsize=20)
         
         # 添加內容
-        c.setFont("Helvetica", 12)
-        y_position = height - 150
+        y_position = 150
         
         demo_texts = [
             "Hello World! This is a test document.",
@@ -42,10 +39,11 @@ def create_demo_pdf():
         ]
         
         for text in demo_texts:
-            c.drawString(100, y_position, text)
-            y_position -= 30
+            page.insert_text((100, y_position), text, fontname="helv", fontsize=12)
+            y_position += 30
         
-        c.save()
+        doc.save(demo_pdf_path)
+        doc.close()
         logger.info(f"✅ 演示PDF已創建: {demo_pdf_path}")
         return demo_pdf_path
         
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+文檔句柄模塊
+源PDF在一個作業中只讀取一次（內存映射，無法映射時整份讀入），內容摘要和解析好的文檔
+在提取、渲染和雙語輸出各階段之間共用；同一文件的並行作業共用同一份映射數據
+"""
+
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentHandle:
+    """一個源文件的映射數據、內容摘要和共享的解析文檔
+
+    fitz.Document 不是線程安全的：共享文檔同一時間只借給一個線程（同一線程可嵌套借用）；
+    其他線程借用時從同一份內存數據另行解析一個私有文檔，不再重新讀取文件。
+    """
+
+    def __init__(self, path: str, stat: os.stat_result):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.refs = 0
+        self.mode = None
+        self.bytes_read = 0
+        self.parses = 0
+        self.borrows = 0
+        self.private_parses = 0
+        self._map = None
+        self._data = None
+        self._digest = None
+        self._doc = None
+        self._lock = threading.Lock()
+        self._doc_lock = threading.RLock()
+
+    def is_stale(self, stat: os.stat_result) -> bool:
+        return (stat.st_size, stat.st_mtime_ns) != (self.size, self.mtime_ns)
+
+    @property
+    def data(self):
+        """文件內容（mmap上的memoryview，或讀入的bytes）；第一次訪問時載入"""
+        with self._lock:
+            if self._data is None:
+                self._load()
+            return self._data
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._data = memoryview(self._map)
+                self.mode = "mmap"
+            except (ValueError, OSError):
+                # 空文件或不支持映射的文件系統
+                self._data = f.read()
+                self.mode = "read"
+        self.bytes_read = len(self._data)
+        logger.info(f"📂 Source loaded once ({self.mode}): {self.path} ({self.size / 1e6:.1f} MB)")
+
+    def digest(self) -> str:
+        """內容sha1（與 document_manifest.file_digest 相同），只計算一次"""
+        data = self.data
+        with self._lock:
+            if self._digest is None:
+                self._digest = hashlib.sha1(data).hexdigest()
+            return self._digest
+
+    def _parse(self):
+        import fitz
+        try:
+            doc = fitz.open(stream=self.data, filetype="pdf")
+        except TypeError:
+            # 舊版PyMuPDF不接受memoryview，複製一份bytes（仍不重新讀取文件）
+            doc = fitz.open(stream=bytes(self.data), filetype="pdf")
+        with self._lock:
+            self.parses += 1
+        return doc
+
+    @contextmanager
+    def document(self):
+        """借用解析好的文檔（調用方不得關閉）"""
+        with self._lock:
+            self.borrows += 1
+        if self._doc_lock.acquire(blocking=False):
+            try:
+                if self._doc is None:
+                    self._doc = self._parse()
+                yield self._doc
+            finally:
+                self._doc_lock.release()
+            return
+        doc = self._parse()
+        with self._lock:
+            self.private_parses += 1
+        try:
+            yield doc
+        finally:
+            doc.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"path": self.path, "size": self.size, "mode": self.mode, "bytes_read": self.bytes_read,
+                    "parses": self.parses, "borrows": self.borrows, "private_parses": self.private_parses}
+
+    def close(self):
+        with self._doc_lock:
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+        with self._lock:
+            data, self._data = self._data, None
+            if isinstance(data, memoryview):
+                try:
+                    data.release()
+                    self._map.close()
+                except BufferError:
+                    # 仍有對象引用映射數據，由垃圾回收關閉
+                    pass
+            self._map = None
+
+
+class DocumentHandleManager:
+    """進程共享的句柄表：同一文件（路徑、大小、修改時間相同）只有一個句柄，最後一個使用者釋放時關閉"""
+
+    def __init__(self):
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str) -> DocumentHandle:
+        """取得文件的句柄（引用計數加一），用完必須 release()"""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        with self._lock:
+            handle = self._handles.get(path)
+            if handle is None or handle.is_stale(stat):
+                # 文件已變化：舊句柄留給現有使用者，新使用者得到新句柄
+                handle = self._handles[path] = DocumentHandle(path, stat)
+            handle.refs += 1
+            return handle
+
+    def release(self, handle: DocumentHandle):
+        with self._lock:
+            handle.refs -= 1
+            if handle.refs > 0:
+                return
+            if self._handles.get(handle.path) is handle:
+                del self._handles[handle.path]
+        handle.close()
+
+    @contextmanager
+    def opened(self, path: str):
+        handle = self.acquire(path)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    @contextmanager
+    def open_document(self, path: str):
+        """借用文件的解析文檔；作業持有句柄時各階段得到同一個文檔"""
+        with self.opened(path) as handle, handle.document() as doc:
+            yield doc
+
+
+_document_handles = DocumentHandleManager()
+
+
+def get_document_handles() -> DocumentHandleManager:
+    """返回進程共享的文檔句柄表"""
+    return _document_handles
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+文檔清單模塊
+每頁統計（字數、圖片、OCR決定和原因、內容指紋）只在提取時計算一次並與提取結果一起保存；
+同一份PDF再次執行時直接讀取清單，跳過分類、OCR和AI過濾；
+AI過濾或OCR回退（降級）的頁面會被標記，下次執行時重新提取
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+MANIFEST_SUFFIX = "_manifest.json"
+DIGEST_CHUNK_BYTES = 1 << 20
+
+
+def manifest_path(pdf_target_path: str) -> str:
+    """清單與翻譯輸出文件放在一起"""
+    return os.path.splitext(pdf_target_path)[0] + MANIFEST_SUFFIX
+
+
+def file_digest(path: str) -> str:
+    """源文件內容的sha1（分塊讀取）"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageEntry:
+    """一頁的統計和提取結果"""
+
+    __slots__ = ("page_index", "kind", "reason", "char_count", "word_count", "image_count",
+                 "image_coverage", "font_count", "hash", "text", "ocr_lines", "ocr_run", "degraded")
+
+    def __init__(self, page_index: int, kind: str = "", reason: str = "", char_count: int = 0, word_count: int = 0,
+                 image_count: int = 0, image_coverage: float = 0.0, font_count: int = 0, hash: str = "",
+                 text: str = "", ocr_lines: list = None, ocr_run: bool = False, degraded: str = ""):
+        self.page_index = page_index
+        self.kind = kind
+        self.reason = reason
+        self.char_count = char_count
+        self.word_count = word_count
+        self.image_count = image_count
+        self.image_coverage = image_coverage
+        self.font_count = font_count
+        self.hash = hash
+        # AI過濾後的文字（頁面沒有可翻譯內容時為空）
+        self.text = text
+        self.ocr_lines = ocr_lines or []
+        # OCR策略最終是否執行了OCR（reason 記錄分類和策略的原因）
+        self.ocr_run = ocr_run
+        # 提取時發生的回退（如 "AI filter fallback"），非空時不沿用這一頁
+        self.degraded = degraded
+
+    @classmethod
+    def from_triage(cls, triage, page_hash: str) -> "PageEntry":
+        return cls(triage.page_index, triage.kind, triage.reason, triage.char_count, triage.word_count,
+                   triage.image_count, triage.image_coverage, triage.font_count, page_hash)
+
+    def to_json(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DocumentManifest:
+    """一份源PDF的清單：源文件摘要和提取設置相同時可整份沿用"""
+
+    def __init__(self, source_digest: str, settings: dict, pages: List[PageEntry] = None):
+        self.source_digest = source_digest
+        self.settings = settings
+        self.pages = pages or []
+
+    def summary(self) -> dict:
+        """報告用的文檔級統計"""
+        kinds = {}
+        for entry in self.pages:
+            kinds[entry.kind] = kinds.get(entry.kind, 0) + 1
+        return {"pages": len(self.pages), "kinds": kinds,
+                "words": sum(entry.word_count for entry in self.pages),
+                "images": sum(entry.image_count for entry in self.pages),
+                "ocr_pages": sum(1 for entry in self.pages if entry.ocr_run),
+                "degraded": len(self.degraded_pages())}
+
+    def degraded_pages(self) -> List[PageEntry]:
+        return [entry for entry in self.pages if entry.degraded]
+
+    def find(self, page_hash: str) -> Optional[dict]:
+        """按內容指紋查找可沿用的頁面（與 TranslationCheckpoint.find 相同的格式），降級頁面不沿用"""
+        for entry in self.pages:
+            if entry.hash == page_hash and not entry.degraded:
+                return {"text": entry.text, "ocr_lines": entry.ocr_lines}
+        return None
+
+    @classmethod
+    def load(cls, path: str, source_digest: str, settings: dict) -> Optional["DocumentManifest"]:
+        """讀取清單；文件不存在、源文件或提取設置變化時返回None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Unreadable manifest {path}: {e}")
+            return None
+        if (data.get("version") != MANIFEST_VERSION or data.get("source_digest") != source_digest
+                or data.get("settings") != settings):
+            logger.info("🗂️ Manifest is for a different file or settings, extracting again")
+            return None
+        logger.info(f"🗂️ Loaded manifest with {len(data['pages'])} pages: {path}")
+        return cls(source_digest, settings, [PageEntry(**page) for page in data["pages"]])
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "source_digest": self.source_digest, "settings": self.settings,
+                       "pages": [entry.to_json() for entry in self.pages]}, f, ensure_ascii=False)
+        logger.info(f"💾 Manifest saved: {path} ({len(self.pages)} pages)")
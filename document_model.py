@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+文檔數據模型
+頁面使用slotted記錄，文字span使用列式NumPy數組（字體名稱駐留），取代每個span一個dict
+"""
+
+import sys
+from array import array
+from typing import Iterator
+
+
+class PageRecord:
+    """一頁在提取、翻譯和替換之間共享的數據"""
+
+    __slots__ = ("page_index", "hash", "text", "translation", "ocr_lines", "ocr_translations")
+
+    def __init__(self, page_index: int, text: str, page_hash: str = "", ocr_lines: list = None):
+        self.page_index = page_index
+        self.hash = page_hash
+        self.text = text
+        self.translation = ""
+        self.ocr_lines = ocr_lines or []
+        # 未過濾的OCR行文字 → 譯文，翻譯PDF按此覆蓋圖片區域
+        self.ocr_translations = {}
+
+    def __repr__(self):
+        return f"PageRecord(page={self.page_index + 1}, chars={len(self.text)}, ocr_lines={len(self.ocr_lines)})"
+
+
+class SpanTable:
+    """整份文檔的文字span列式表
+
+    bbox (n, 4) float32、size float32、flags int32、page int32、font int16（索引到 fonts）；
+    page_offsets[p]:page_offsets[p + 1] 是第 p 頁的span範圍。
+    table[i] 返回與舊版 extract_text_positions 相同鍵的dict，切片和迭代返回dict，便於兼容。
+    """
+
+    __slots__ = ("text", "bbox", "size", "flags", "page", "font", "fonts", "page_offsets")
+
+    def __init__(self, text, bbox, size, flags, page, font, fonts, page_offsets):
+        self.text = text
+        self.bbox = bbox
+        self.size = size
+        self.flags = flags
+        self.page = page
+        self.font = font
+        self.fonts = fonts
+        self.page_offsets = page_offsets
+
+    @classmethod
+    def from_document(cls, doc, start: int = 0, stop: int = None) -> "SpanTable":
+        """遍歷一次文檔建立span表（中間結果累積在緊湊的array中）
+
+        只提取 [start, stop) 頁時頁碼仍是整份文檔的絕對頁碼，範圍外的頁沒有span。
+        """
+        import fitz
+        import numpy as np
+
+        # 只取文字塊，不解碼圖片塊
+        text_flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+        texts = []
+        bboxes = array('f')
+        sizes = array('f')
+        flags = array('i')
+        fonts = []
+        font_ids = {}
+        font_column = array('h')
+        stop = len(doc) if stop is None else stop
+        page_offsets = array('i', [0] * (start + 1))
+
+        for page_num in range(start, stop):
+            page = doc[page_num]
+            for block in page.get_text("dict", flags=text_flags)["blocks"]:
+                for line in block.get("lines", ()):
+                    for span in line["spans"]:
+                        texts.append(sys.intern(span["text"]) if len(span["text"]) < 32 else span["text"])
+                        bboxes.extend(span["bbox"])
+                        sizes.append(span["size"])
+                        flags.append(span["flags"])
+                        font_id = font_ids.get(span["font"])
+                        if font_id is None:
+                            font_id = font_ids[span["font"]] = len(fonts)
+                            fonts.append(sys.intern(span["font"]))
+                        font_column.append(font_id)
+            page_offsets.append(len(texts))
+
+        offsets = np.frombuffer(page_offsets, dtype=np.int32).copy()
+        return cls(
+            texts,
+            np.frombuffer(bboxes, dtype=np.float32).reshape(-1, 4).copy(),
+            np.frombuffer(sizes, dtype=np.float32).copy(),
+            np.frombuffer(flags, dtype=np.int32).copy(),
+            np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets)),
+            np.frombuffer(font_column, dtype=np.int16).copy(),
+            fonts,
+            offsets,
+        )
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_offsets) - 1
+
+    def page_range(self, page_num: int) -> range:
+        """第 page_num 頁的span索引範圍（超出範圍時為空）"""
+        if page_num >= self.page_count:
+            return range(0)
+        return range(int(self.page_offsets[page_num]), int(self.page_offsets[page_num + 1]))
+
+    def page_bboxes(self, page_num: int):
+        """第 page_num 頁所有span的 (n, 4) bbox 視圖"""
+        span_range = self.page_range(page_num)
+        return self.bbox[span_range.start:span_range.stop]
+
+    def font_name(self, index: int) -> str:
+        return self.fonts[self.font[index]]
+
+    def nbytes(self) -> int:
+        """數組和文字佔用的近似字節數"""
+        arrays = (self.bbox, self.size, self.flags, self.page, self.font, self.page_offsets)
+        return sum(column.nbytes for column in arrays) + sum(sys.getsizeof(text) for text in set(self.text))
+
+    def __len__(self):
+        return len(self.text)
+
+    def __getitem__(self, index):
+        """table[i] 返回一個span的dict；table[a:b] 返回dict列表（與舊版列表的切片相同）"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            "page": int(self.page[index]),
+            "text": self.text[index],
+            "bbox": tuple(float(v) for v in self.bbox[index]),
+            "font": self.font_name(index),
+            "size": float(self.size[index]),
+            "flags": int(self.flags[index]),
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self[i] for i in range(len(self)))
+
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+詞彙表倉庫模塊
+詞彙表文件只載入一次（按內容摘要識別），編譯好的匹配器常駐內存；節點按名稱引用詞彙表，
+多行排除詞彙輸入也按內容緩存，大詞彙表不再在每次執行時重新解析和編譯
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+try:
+    from .term_protection import TermMatcher
+except ImportError:
+    from term_protection import TermMatcher
+
+logger = logging.getLogger(__name__)
+
+GLOSSARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glossaries")
+GLOSSARY_EXTENSIONS = (".txt",)
+
+# 節點排除詞彙輸入框預設值中的說明行（整行相同時跳過，不是詞彙）
+INLINE_HINT_LINES = ("<排除翻譯的字詞>", "每個換行代表一個單字", "例如：", "例如:")
+
+# 只有詞彙表文件支持注釋行；輸入框中的 #hashtag 之類仍然是詞彙
+GLOSSARY_COMMENT_PREFIX = "#"
+
+MAX_CACHED_MATCHERS = 32
+
+
+def parse_terms(text: str, comment_prefix: str = None, ignored_lines: Iterable[str] = ()) -> List[str]:
+    """解析詞彙列表：按換行和逗號分隔，去重並保持順序
+
+    comment_prefix 開頭的行是注釋，與 ignored_lines 中某行完全相同的行是說明文字，都會跳過。
+    """
+    ignored_lines = set(ignored_lines)
+    terms = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line in ignored_lines or (comment_prefix and line.startswith(comment_prefix)):
+            continue
+        terms.extend(word.strip() for word in line.split(',') if word.strip())
+    return list(dict.fromkeys(terms))
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class Glossary:
+    """一個已載入的詞彙表文件"""
+
+    __slots__ = ("name", "path", "digest", "terms", "mtime", "size")
+
+    def __init__(self, name: str, path: str, digest: str, terms: List[str], mtime: float, size: int):
+        self.name = name
+        self.path = path
+        self.digest = digest
+        self.terms = terms
+        self.mtime = mtime
+        self.size = size
+
+
+class GlossaryStore:
+    """進程共享的詞彙表倉庫"""
+
+    def __init__(self, glossary_dir: str = GLOSSARY_DIR, inline_hint_lines: Iterable[str] = INLINE_HINT_LINES):
+        self.glossary_dir = glossary_dir
+        self.inline_hint_lines = tuple(inline_hint_lines)
+        self._glossaries = {}
+        self._inline = OrderedDict()
+        self._matchers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def available(self) -> List[str]:
+        """詞彙表目錄中可引用的名稱"""
+        if not os.path.isdir(self.glossary_dir):
+            return []
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.glossary_dir)
+                      if name.endswith(GLOSSARY_EXTENSIONS))
+
+    def _resolve(self, name: str) -> str:
+        """名稱可以是詞彙表目錄中的文件名（不含擴展名）或文件路徑"""
+        if os.path.isfile(name):
+            return name
+        for extension in ('',) + GLOSSARY_EXTENSIONS:
+            path = os.path.join(self.glossary_dir, name + extension)
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(f"Glossary not found: {name} (available: {', '.join(self.available()) or 'none'})")
+
+    def get(self, name: str) -> Glossary:
+        """按名稱取得詞彙表；文件大小和修改時間不變時直接使用內存中的版本"""
+        path = self._resolve(name)
+        stat = os.stat(path)
+        with self._lock:
+            glossary = self._glossaries.get(path)
+            if glossary and glossary.mtime == stat.st_mtime and glossary.size == stat.st_size:
+                return glossary
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                content = f.read()
+            glossary = Glossary(name, path, _text_digest(content), parse_terms(content, GLOSSARY_COMMENT_PREFIX),
+                                stat.st_mtime, stat.st_size)
+            self._glossaries[path] = glossary
+        logger.info(f"📚 Loaded glossary '{name}': {len(glossary.terms)} terms ({glossary.digest[:8]})")
+        return glossary
+
+    def _inline_terms(self, text: str) -> Tuple[str, List[str]]:
+        """節點輸入框中的排除詞彙（跳過預設說明行），按內容摘要緩存解析結果"""
+        digest = _text_digest(text)
+        with self._lock:
+            terms = self._inline.get(digest)
+            if terms is None:
+                terms = self._inline[digest] = parse_terms(text, ignored_lines=self.inline_hint_lines)
+                while len(self._inline) > MAX_CACHED_MATCHERS:
+                    self._inline.popitem(last=False)
+            else:
+                self._inline.move_to_end(digest)
+        return digest, terms
+
+    def matcher(self, excluded_words: str = "", glossary_names: str = "") -> TermMatcher:
+        """合併輸入框詞彙和引用的詞彙表，返回編譯好的匹配器（同一組合只編譯一次）"""
+        inline_digest, inline_terms = self._inline_terms(excluded_words or "")
+        glossaries = [self.get(name) for name in parse_terms(glossary_names or "")]
+        key = (inline_digest,) + tuple(glossary.digest for glossary in glossaries)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is not None:
+                self._matchers.move_to_end(key)
+                return matcher
+        terms = list(inline_terms)
+        for glossary in glossaries:
+            terms.extend(glossary.terms)
+        matcher = TermMatcher(terms)
+        with self._lock:
+            self._matchers[key] = matcher
+            while len(self._matchers) > MAX_CACHED_MATCHERS:
+                self._matchers.popitem(last=False)
+        logger.info(f"📚 Compiled matcher for {len(matcher)} excluded terms ({len(glossaries)} glossaries)")
+        return matcher
+
+
+_glossary_store = None
+_glossary_store_lock = threading.Lock()
+
+
+def get_glossary_store() -> GlossaryStore:
+    """進程共享的詞彙表倉庫"""
+    global _glossary_store
+    with _glossary_store_lock:
+        if _glossary_store is None:
+            _glossary_store = GlossaryStore()
+        return _glossary_store
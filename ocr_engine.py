@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+OCR引擎模塊
+根據頁面字體大小和尺寸自適應選擇渲染解析度，並為Textract/Tesseract準備緊湊的圖片
+"""
+
+import os
+import math
+import time
+import uuid
+import queue
+import logging
+import threading
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 渲染參數
+TARGET_GLYPH_PX = 32          # OCR最佳字高（像素）
+DEFAULT_FONT_SIZE = 12.0      # 沒有文字層時假設的字體大小（pt）
+MIN_ZOOM = 1.0
+MIN_IMAGE_ZOOM = 2.0          # 含圖片頁面的最低縮放（OCR目標在圖片中）
+MAX_ZOOM = 4.0
+MAX_RENDER_PIXELS = 16_000_000
+
+# AWS Textract 同步API限制
+TEXTRACT_MAX_BYTES = 5 * 1024 * 1024
+TEXTRACT_MAX_SIDE = 10000
+JPEG_QUALITY = 85
+MIN_JPEG_QUALITY = 40
+JPEG_QUALITY_STEP = 15
+DOWNSCALE_STEP = 0.75
+MIN_PAYLOAD_ZOOM = 0.5
+
+# AWS Textract 異步API設置
+TEXTRACT_ASYNC_MIN_PAGES = 4       # 少於此頁數時使用逐頁同步調用
+TEXTRACT_POLL_SECONDS = 2.0
+TEXTRACT_TIMEOUT_SECONDS = 900
+TEXTRACT_S3_PREFIX = "pdf-translator/textract/"
+
+# Tesseract 設置（與 pytesseract 子進程路徑一致: --oem 3 --psm 6）
+TESSERACT_LANG = "eng+chi_tra+chi_sim"
+TESSERACT_CONFIG = r'--oem 3 --psm 6 -l eng+chi_tra+chi_sim'
+
+
+class OCRLine:
+    """一行OCR結果：文字、頁面座標(pt)中的邊界框和置信度(0-100)"""
+
+    __slots__ = ("text", "x0", "y0", "x1", "y1", "confidence")
+
+    def __init__(self, text: str, x0: float, y0: float, x1: float, y1: float, confidence: float = 0.0):
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.confidence = confidence
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        return (self.x0, self.y0, self.x1, self.y1)
+
+    def __repr__(self):
+        return f"OCRLine({self.text!r}, bbox=({self.x0:.1f}, {self.y0:.1f}, {self.x1:.1f}, {self.y1:.1f}), conf={self.confidence:.0f})"
+
+
+def join_ocr_lines(lines: List[OCRLine]) -> str:
+    """把OCR行合併為純文字"""
+    return '\n'.join(line.text for line in lines)
+
+
+def textract_line(block: dict, page_rect) -> OCRLine:
+    """把Textract LINE塊的相對座標轉換為頁面座標"""
+    box = block['Geometry']['BoundingBox']
+    x0 = page_rect.x0 + box['Left'] * page_rect.width
+    y0 = page_rect.y0 + box['Top'] * page_rect.height
+    return OCRLine(block['Text'], x0, y0,
+                   x0 + box['Width'] * page_rect.width,
+                   y0 + box['Height'] * page_rect.height,
+                   block.get('Confidence', 0.0))
+
+
+def tesseract_data_lines(data: dict, zoom: float, page_rect) -> List[OCRLine]:
+    """把 pytesseract.image_to_data 的詞級結果按行合併為OCRLine"""
+    grouped = {}
+    for i, word in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left, top = data['left'][i], data['top'][i]
+        right, bottom = left + data['width'][i], top + data['height'][i]
+        entry = grouped.get(key)
+        if entry is None:
+            grouped[key] = [[word], left, top, right, bottom, [conf]]
+        else:
+            entry[0].append(word)
+            entry[1] = min(entry[1], left)
+            entry[2] = min(entry[2], top)
+            entry[3] = max(entry[3], right)
+            entry[4] = max(entry[4], bottom)
+            entry[5].append(conf)
+
+    return [OCRLine(' '.join(words),
+                    page_rect.x0 + left / zoom, page_rect.y0 + top / zoom,
+                    page_rect.x0 + right / zoom, page_rect.y0 + bottom / zoom,
+                    sum(confs) / len(confs))
+            for words, left, top, right, bottom, confs in grouped.values()]
+
+
+def median_font_size(page) -> float:
+    """計算頁面文字層的中位字體大小，沒有文字時返回0"""
+    sizes = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", ()):
+            for span in line["spans"]:
+                if span["text"].strip():
+                    sizes.append(span["size"])
+    return median(sizes) if sizes else 0.0
+
+
+def _native_image_zoom(page) -> float:
+    """掃描頁：根據最大圖片的原始解析度推算縮放，避免超過掃描精度放大"""
+    best_area, best_zoom = 0.0, 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        width_pt = x1 - x0
+        area = width_pt * (y1 - y0)
+        if width_pt > 0 and area > best_area:
+            best_area = area
+            best_zoom = info["width"] / width_pt
+    return best_zoom
+
+
+def choose_ocr_zoom(page) -> float:
+    """根據中位字體大小、圖片原始解析度和頁面尺寸選擇OCR渲染縮放倍率"""
+    font_size = median_font_size(page)
+    zoom = TARGET_GLYPH_PX / (font_size if font_size > 0 else DEFAULT_FONT_SIZE)
+    native_zoom = _native_image_zoom(page)
+    if native_zoom > 0:
+        # 含圖片的頁面按圖片解析度渲染：文字層的大標題不能把圖片中的小字壓到1x
+        zoom = native_zoom if font_size <= 0 else max(zoom, native_zoom)
+        zoom = max(zoom, MIN_IMAGE_ZOOM)
+    zoom = max(MIN_ZOOM, min(zoom, MAX_ZOOM))
+
+    # 大頁面限制總像素數
+    rect = page.rect
+    page_area = rect.width * rect.height
+    if page_area > 0:
+        zoom = min(zoom, math.sqrt(MAX_RENDER_PIXELS / page_area))
+    return zoom
+
+
+def render_grayscale(page, zoom: float):
+    """以灰階渲染頁面（單通道，像素數據量為RGB的三分之一）"""
+    import fitz  # PyMuPDF
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+
+
+def render_for_textract(page, zoom: float = None) -> Tuple[bytes, float]:
+    """渲染符合Textract 5MB限制的緊湊圖片，返回 (圖片數據, 實際縮放倍率)"""
+    if zoom is None:
+        zoom = choose_ocr_zoom(page)
+
+    # 限制單邊像素數
+    rect = page.rect
+    longest_side = max(rect.width, rect.height)
+    if longest_side * zoom > TEXTRACT_MAX_SIDE:
+        zoom = TEXTRACT_MAX_SIDE / longest_side
+
+    quality = JPEG_QUALITY
+    while True:
+        pix = render_grayscale(page, zoom)
+        img_data = pix.tobytes("png")
+        if len(img_data) <= TEXTRACT_MAX_BYTES:
+            return img_data, zoom
+
+        # 灰階PNG仍然過大時改用JPEG；已到最低縮放時先逐步降低JPEG質量
+        img_data = pix.tobytes("jpg", jpg_quality=quality)
+        while (len(img_data) > TEXTRACT_MAX_BYTES and zoom * DOWNSCALE_STEP < MIN_PAYLOAD_ZOOM
+               and quality > MIN_JPEG_QUALITY):
+            quality = max(MIN_JPEG_QUALITY, quality - JPEG_QUALITY_STEP)
+            img_data = pix.tobytes("jpg", jpg_quality=quality)
+        if len(img_data) <= TEXTRACT_MAX_BYTES:
+            return img_data, zoom
+
+        # 質量降到最低仍然過大時繼續縮小，保證不超過Textract限制
+        logger.info(f"  📉 Textract payload {len(img_data) / 1024 / 1024:.1f} MB too large, downscaling from {zoom:.2f}x")
+        zoom *= DOWNSCALE_STEP
+
+
+def build_page_subset(pdf_doc, page_indices: List[int]) -> bytes:
+    """把需要OCR的頁面複製到一個新的PDF，避免上傳和識別文字頁"""
+    import fitz  # PyMuPDF
+    subset = fitz.open()
+    try:
+        for index in page_indices:
+            subset.insert_pdf(pdf_doc, from_page=index, to_page=index)
+        return subset.tobytes(garbage=3, deflate=True)
+    finally:
+        subset.close()
+
+
+class TextractAsyncOCR:
+    """AWS Textract 異步多頁OCR：整份PDF只提交一次，按頁收集LINE塊"""
+
+    def __init__(self, textract_client, s3_client, bucket: str, prefix: str = TEXTRACT_S3_PREFIX,
+                 poll_seconds: float = TEXTRACT_POLL_SECONDS, timeout: float = TEXTRACT_TIMEOUT_SECONDS,
+                 sleep=time.sleep):
+        self.textract_client = textract_client
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+        self._sleep = sleep
+        self.payload_bytes = 0
+
+    def run(self, pdf_doc, page_indices: List[int]) -> Dict[int, List[OCRLine]]:
+        """對指定頁面做OCR，返回 {原始頁索引: [OCRLine]}"""
+        data = build_page_subset(pdf_doc, page_indices)
+        self.payload_bytes = len(data)
+        key = f"{self.prefix}{uuid.uuid4().hex}.pdf"
+
+        logger.info(f"  ☁️ Uploading {len(page_indices)} pages ({len(data) / 1024:.0f} KB) for Textract async OCR")
+        self.s3_client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        try:
+            response = self.textract_client.start_document_text_detection(
+                DocumentLocation={'S3Object': {'Bucket': self.bucket, 'Name': key}}
+            )
+            blocks_by_page = self._collect_lines(response['JobId'])
+        finally:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=key)
+
+        # 子集頁碼（從1開始）映射回原始頁索引，並轉換為頁面座標
+        results = {}
+        for page, blocks in blocks_by_page.items():
+            if 0 < page <= len(page_indices):
+                index = page_indices[page - 1]
+                page_rect = pdf_doc[index].rect
+                results[index] = [textract_line(block, page_rect) for block in blocks]
+        return results
+
+    def _wait_for_job(self, job_id: str) -> dict:
+        """輪詢直到任務完成，返回第一頁結果"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            response = self.textract_client.get_document_text_detection(JobId=job_id, MaxResults=1000)
+            status = response['JobStatus']
+            if status == 'SUCCEEDED':
+                return response
+            if status == 'PARTIAL_SUCCESS':
+                logger.warning(f"  ⚠️ Textract job {job_id} partially succeeded")
+                return response
+            if status == 'FAILED':
+                raise RuntimeError(f"Textract job {job_id} failed: {response.get('StatusMessage', '')}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Textract job {job_id} timed out after {self.timeout:.0f}s")
+            self._sleep(self.poll_seconds)
+
+    def _collect_lines(self, job_id: str) -> Dict[int, List[dict]]:
+        """讀取所有結果分頁，按頁分組LINE塊"""
+        lines_by_page = {}
+        response = self._wait_for_job(job_id)
+        while True:
+            for block in response.get('Blocks', []):
+                # PAGE塊標記已處理的頁面，即使該頁沒有識別出文字
+                if block['BlockType'] == 'PAGE':
+                    lines_by_page.setdefault(block.get('Page', 1), [])
+                elif block['BlockType'] == 'LINE':
+                    lines_by_page.setdefault(block.get('Page', 1), []).append(block)
+
+            next_token = response.get('NextToken')
+            if not next_token:
+                return lines_by_page
+            response = self.textract_client.get_document_text_detection(
+                JobId=job_id, MaxResults=1000, NextToken=next_token
+            )
+
+
+class TesseractWorkerPool:
+    """持久化的Tesseract引擎池：語言模型只載入一次，跨頁面和文檔重用"""
+
+    def __init__(self, size: int = None, lang: str = TESSERACT_LANG):
+        self.lang = lang
+        self.size = size or min(4, os.cpu_count() or 1)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_api(self):
+        """創建一個引擎實例（載入語言模型）"""
+        from tesserocr import PyTessBaseAPI, PSM, OEM
+        logger.info(f"🧠 Loading Tesseract engine ({self.lang})")
+        return PyTessBaseAPI(lang=self.lang, psm=PSM.SINGLE_BLOCK, oem=OEM.DEFAULT)
+
+    def _acquire(self):
+        """取得空閒引擎，未達上限時創建新引擎，否則等待歸還"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._create_api()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def recognize(self, pix, zoom: float = 1.0, page_rect=None) -> List[OCRLine]:
+        """直接對Pixmap像素緩衝區做OCR，不經過圖片編碼，返回行級結果"""
+        from tesserocr import RIL, iterate_level
+
+        origin_x = page_rect.x0 if page_rect is not None else 0.0
+        origin_y = page_rect.y0 if page_rect is not None else 0.0
+        api = self._acquire()
+        try:
+            api.SetImageBytes(bytes(pix.samples), pix.width, pix.height, pix.n, pix.stride)
+            api.SetSourceResolution(int(72 * zoom))
+            api.Recognize()
+
+            lines = []
+            iterator = api.GetIterator()
+            if iterator is None:
+                return lines
+            for item in iterate_level(iterator, RIL.TEXTLINE):
+                text = (item.GetUTF8Text(RIL.TEXTLINE) or "").strip()
+                box = item.BoundingBox(RIL.TEXTLINE)
+                if not text or not box:
+                    continue
+                left, top, right, bottom = box
+                lines.append(OCRLine(text, origin_x + left / zoom, origin_y + top / zoom,
+                                     origin_x + right / zoom, origin_y + bottom / zoom,
+                                     item.Confidence(RIL.TEXTLINE)))
+            return lines
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def close(self):
+        """釋放所有空閒引擎"""
+        while True:
+            try:
+                api = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            api.End()
+            with self._lock:
+                self._created -= 1
+
+
+_tesseract_pool = None
+_tesseract_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool() -> Optional[TesseractWorkerPool]:
+    """返回進程共享的Tesseract引擎池，未安裝tesserocr時返回None"""
+    global _tesseract_pool
+    if _tesseract_pool is None:
+        with _tesseract_pool_lock:
+            if _tesseract_pool is None:
+                try:
+                    import tesserocr  # noqa: F401
+                except ImportError:
+                    logger.info("ℹ️ tesserocr not installed, using pytesseract subprocess OCR")
+                    _tesseract_pool = False
+                else:
+                    _tesseract_pool = TesseractWorkerPool()
+    return _tesseract_pool or None
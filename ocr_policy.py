@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+OCR策略模塊
+用字符n-gram重疊度量OCR為每頁帶來了多少新文字，按文檔類別和文字長度區間學習預期增益；
+預期增益低時跳過OCR，與文字層重複的OCR行不再送去翻譯
+"""
+
+import re
+import logging
+import threading
+from bisect import bisect_right
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+# 一行OCR文字中新n-gram比例低於此值時視為與文字層重複
+LINE_NOVELTY = 0.5
+# 預期增益（新n-gram比例）低於此值時跳過OCR
+MIN_GAIN = 0.15
+# 每個類別至少觀察幾頁後才開始跳過
+MIN_SAMPLES = 3
+# 跳過的頁面中每隔幾頁仍做一次OCR，持續更新估計
+EXPLORE_EVERY = 4
+# 增益的指數移動平均係數
+GAIN_SMOOTHING = 0.3
+# 文字層長度區間（字符）
+LENGTH_BANDS = (50, 150, 300, 1000)
+
+# 從PDF元數據的 creator / producer 判斷文檔來源
+CREATOR_FAMILIES = (
+    ("slides", ("powerpoint", "keynote", "impress", "google slides")),
+    ("scan", ("scan", "paper capture", "abbyy", "naps2")),
+    ("document", ("word", "writer", "pages", "latex", "tex", "indesign")),
+)
+
+NON_WORD = re.compile(r'\W+')
+
+
+def _ngrams(text: str) -> set:
+    normalized = NON_WORD.sub('', text.lower())
+    if len(normalized) < NGRAM_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + NGRAM_SIZE] for i in range(len(normalized) - NGRAM_SIZE + 1)}
+
+
+def novel_ocr_lines(existing_text: str, ocr_lines) -> Tuple[list, float, int]:
+    """去掉與文字層（及前面OCR行）重複的行，返回 (保留的行, 增益, 重複字符數)"""
+    known = _ngrams(existing_text)
+    kept = []
+    total = fresh_total = duplicate_chars = 0
+    for line in ocr_lines:
+        grams = _ngrams(line.text)
+        fresh = len(grams - known)
+        total += len(grams)
+        fresh_total += fresh
+        if grams and fresh / len(grams) < LINE_NOVELTY:
+            duplicate_chars += len(line.text)
+            continue
+        kept.append(line)
+        known |= grams
+    return kept, fresh_total / total if total else 0.0, duplicate_chars
+
+
+def document_class(pdf_doc) -> str:
+    """文檔類別：來源工具 + 首頁方向（如 slides:landscape）"""
+    metadata = pdf_doc.metadata or {}
+    tool = f"{metadata.get('creator') or ''} {metadata.get('producer') or ''}".lower()
+    family = next((name for name, keys in CREATOR_FAMILIES if any(key in tool for key in keys)), "other")
+    orientation = "portrait"
+    if len(pdf_doc) and pdf_doc[0].rect.width > pdf_doc[0].rect.height:
+        orientation = "landscape"
+    return f"{family}:{orientation}"
+
+
+class OCRDecision:
+    """一頁是否做OCR及原因"""
+
+    __slots__ = ("run", "expected_gain", "reason")
+
+    def __init__(self, run: bool, expected_gain: float, reason: str):
+        self.run = run
+        self.expected_gain = expected_gain
+        self.reason = reason
+
+
+class OCRPolicy:
+    """進程共享的OCR策略：(文檔類別, 頁面類型, 文字長度區間) → 增益的移動平均"""
+
+    def __init__(self):
+        self._gains = {}
+        self._skips = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(doc_class: str, triage) -> tuple:
+        return (doc_class, triage.kind, bisect_right(LENGTH_BANDS, triage.char_count))
+
+    def decide(self, doc_class: str, triage) -> OCRDecision:
+        if not triage.needs_ocr:
+            return OCRDecision(False, 0.0, triage.reason)
+        if not triage.uses_text_layer:
+            # 掃描頁沒有可用文字層，OCR是唯一來源
+            return OCRDecision(True, 1.0, triage.reason)
+
+        key = self._key(doc_class, triage)
+        with self._lock:
+            gain, samples = self._gains.get(key, (1.0, 0))
+            if samples < MIN_SAMPLES:
+                return OCRDecision(True, gain, f"{triage.reason}; learning ({samples}/{MIN_SAMPLES} pages)")
+            if gain >= MIN_GAIN:
+                return OCRDecision(True, gain, f"{triage.reason}; expected gain {gain:.0%}")
+            self._skips[key] = self._skips.get(key, 0) + 1
+            if self._skips[key] % EXPLORE_EVERY == 0:
+                return OCRDecision(True, gain, f"{triage.reason}; re-checking low gain {gain:.0%}")
+        return OCRDecision(False, gain, f"OCR skipped: expected gain {gain:.0%} for {doc_class} pages")
+
+    def record(self, doc_class: str, triage, gain: float):
+        """記錄一頁實際的OCR增益（只學習有文字層的頁面）"""
+        if not triage.uses_text_layer:
+            return
+        key = self._key(doc_class, triage)
+        with self._lock:
+            previous, samples = self._gains.get(key, (gain, 0))
+            self._gains[key] = (previous + GAIN_SMOOTHING * (gain - previous) if samples else gain, samples + 1)
+
+
+_ocr_policy = OCRPolicy()
+
+
+def get_ocr_policy() -> OCRPolicy:
+    """返回進程共享的OCR策略"""
+    return _ocr_policy
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+頁面快速分類模塊
+在任何重度解析之前，用PyMuPDF單次掃描把每頁分類為 text / mixed / scanned
+"""
+
+import time
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# 頁面類型
+PAGE_TEXT = "text"        # 文字層足夠，只需提取文字
+PAGE_MIXED = "mixed"      # 圖文混合，文字層 + OCR
+PAGE_SCANNED = "scanned"  # 掃描頁，只依賴OCR
+
+# 分類閾值（沿用原OCR觸發條件）
+MIN_TEXT_CHARS = 50
+MIXED_TEXT_CHARS = 300
+MIN_WORDS = 15
+MIXED_IMAGE_COVERAGE = 0.6
+
+
+class PageTriage:
+    """單頁分類結果"""
+
+    __slots__ = ("page_index", "kind", "reason", "text", "char_count", "word_count",
+                 "image_count", "image_coverage", "font_count", "elapsed_ms")
+
+    def __init__(self, page_index: int):
+        self.page_index = page_index
+        self.kind = PAGE_TEXT
+        self.reason = ""
+        self.text = ""
+        self.char_count = 0
+        self.word_count = 0
+        self.image_count = 0
+        self.image_coverage = 0.0
+        self.font_count = 0
+        self.elapsed_ms = 0.0
+
+    @property
+    def needs_ocr(self) -> bool:
+        """是否需要OCR"""
+        return self.kind != PAGE_TEXT
+
+    @property
+    def uses_text_layer(self) -> bool:
+        """是否使用文字層內容"""
+        return self.kind != PAGE_SCANNED
+
+
+def triage_page(page, page_index: int) -> PageTriage:
+    """對單頁做快速分類：字體清單 → 文字存在檢查 → 圖片覆蓋率"""
+    start = time.perf_counter()
+    result = PageTriage(page_index)
+
+    # 字體清單只讀取頁面資源，沒有字體就不可能有文字層
+    result.font_count = len(page.get_fonts())
+    if result.font_count:
+        # 按閱讀順序提取，並與pdfplumber一樣去掉塊之間的空行
+        raw_text = page.get_text("text", sort=True)
+        result.text = "\n".join(line for line in raw_text.splitlines() if line.strip())
+    stripped = result.text.strip()
+    result.char_count = len(stripped)
+    result.word_count = len(stripped.split())
+
+    # 圖片清單同樣只讀資源，有圖片時才計算覆蓋率
+    result.image_count = len(page.get_images())
+    if result.image_count:
+        result.image_coverage = _image_coverage(page)
+
+    if result.char_count < MIN_TEXT_CHARS:
+        result.kind = PAGE_SCANNED
+        result.reason = "no fonts on page" if not result.font_count else f"text too short (<{MIN_TEXT_CHARS} chars)"
+    elif result.image_count and result.char_count < MIXED_TEXT_CHARS:
+        result.kind = PAGE_MIXED
+        result.reason = f"has {result.image_count} images with limited text (<{MIXED_TEXT_CHARS} chars)"
+    elif result.image_coverage >= MIXED_IMAGE_COVERAGE:
+        result.kind = PAGE_MIXED
+        result.reason = f"images cover {result.image_coverage:.0%} of page"
+    elif result.word_count < MIN_WORDS:
+        result.kind = PAGE_MIXED
+        result.reason = f"very few words (<{MIN_WORDS} words)"
+    else:
+        result.reason = "sufficient text content"
+
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+def triage_document(pdf_doc) -> List[PageTriage]:
+    """單次遍歷整份文檔，返回每頁的分類結果"""
+    results = [triage_page(pdf_doc[i], i) for i in range(len(pdf_doc))]
+
+    counts = {PAGE_TEXT: 0, PAGE_MIXED: 0, PAGE_SCANNED: 0}
+    for result in results:
+        counts[result.kind] += 1
+    total_ms = sum(r.elapsed_ms for r in results)
+    logger.info(f"🔎 Page triage: {counts[PAGE_TEXT]} text, {counts[PAGE_MIXED]} mixed, "
+                f"{counts[PAGE_SCANNED]} scanned ({total_ms / max(len(results), 1):.2f} ms/page)")
+    return results
+
+
+def _image_coverage(page) -> float:
+    """計算圖片佔頁面面積的比例（上限1.0）"""
+    page_rect = page.rect
+    page_area = abs(page_rect)
+    if not page_area:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        # 裁剪到頁面範圍內
+        x0, y0 = max(x0, page_rect.x0), max(y0, page_rect.y0)
+        x1, y1 = min(x1, page_rect.x1), min(y1, page_rect.y1)
+        if x1 > x0 and y1 > y0:
+            covered += (x1 - x0) * (y1 - y0)
+
+    return min(covered / page_area, 1.0)
@@ -5,79 +5,186 @@ PDF文字替換模塊
 """
 
 import fitz  # PyMuPDF
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 import os
 import logging
+import threading
+
+try:
+    from .document_model import SpanTable
+except ImportError:
+    from document_model import SpanTable
 
 logger = logging.getLogger(__name__)
 
+# 系統CJK字體候選；都不存在時使用MuPDF內建的 Droid Sans Fallback ("cjk")
+CJK_FONT_PATHS = [
+    "/System/Library/Fonts/PingFang.ttc",  # macOS
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",  # macOS
+    "C:/Windows/Fonts/msjh.ttc",  # Windows 微軟正黑
+    "C:/Windows/Fonts/msyh.ttc",  # Windows 微軟雅黑
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",  # Linux
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",  # Linux
+]
+BUILTIN_CJK_FONT = "cjk"
+CJK_PROBE_CHAR = ord("中")
+
+# 保存配置：garbage/deflate 為 Document.save 參數；image_dpi 為圖片重採樣目標DPI（超過 1.3 倍才重採樣）；
+# linear 需要PyMuPDF支持線性化（新版MuPDF已移除，此時退回普通保存）
+SAVE_PROFILES = {
+    "default": {},
+    "fast": {"garbage": 1},
+    "compact": {"garbage": 3, "deflate": True, "deflate_images": True, "deflate_fonts": True,
+                "use_objstms": 1, "image_dpi": 150, "image_quality": 85},
+    "web": {"garbage": 4, "deflate": True, "deflate_images": True, "deflate_fonts": True, "clean": True,
+            "use_objstms": 1, "image_dpi": 110, "image_quality": 75, "linear": True},
+}
+SAVE_PROFILE_NAMES = list(SAVE_PROFILES)
+IMAGE_DPI_THRESHOLD = 1.3
+
+# 並行渲染：頁數少於 PARALLEL_MIN_PAGES 時進程啟動成本高於收益（spawn 每個進程需重新導入PyMuPDF，約0.5秒）
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_WORKER_MIN = 8
+MAX_RENDER_WORKERS = 8
+RANGES_PER_WORKER = 2
+# 等待一段頁範圍結果的上限（秒）；超時視為工作進程卡住，回退單進程渲染
+RANGE_TIMEOUT_SECONDS = 300
+
+# 字體在整個進程中只載入一次，所有文檔和頁面共用同一個 fitz.Font
+_output_font = None
+_fonts_lock = threading.Lock()
+
+
+def _load_output_font():
+    """載入輸出用的CJK字體（找不到CJK字體時退回Helvetica）"""
+    for font_path in CJK_FONT_PATHS:
+        if os.path.exists(font_path):
+            try:
+                font = fitz.Font(fontfile=font_path)
+            except Exception as e:
+                logger.warning(f"字體載入失敗 {font_path}: {e}")
+                continue
+            if font.has_glyph(CJK_PROBE_CHAR):
+                logger.info(f"已載入字體: {font_path}")
+                return font
+    try:
+        font = fitz.Font(BUILTIN_CJK_FONT)
+        logger.info(f"使用內建CJK字體: {font.name}")
+        return font
+    except Exception as e:
+        logger.warning(f"未找到中文字體，將使用Helvetica: {e}")
+        return fitz.Font("helv")
+
+
+def render_worker_count(page_count, workers=None):
+    """決定渲染進程數：顯式指定時直接使用，否則按頁數和CPU核心數"""
+    if workers:
+        return max(1, min(int(workers), page_count))
+    if page_count < PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(os.cpu_count() or 1, MAX_RENDER_WORKERS, page_count // PAGES_PER_WORKER_MIN))
+
+
+def _render_page_range(original_pdf_path, start, stop):
+    """工作進程：柵格化一段頁範圍並提取其文字位置，返回 (部分PDF字節, SpanTable)"""
+    source = fitz.open(original_pdf_path)
+    part = fitz.open()
+    try:
+        PDFTextReplacer.copy_pages(source, part, start, stop)
+        return part.tobytes(), SpanTable.from_document(source, start, stop)
+    finally:
+        part.close()
+        source.close()
+
+
 class PDFTextReplacer:
     """PDF文字替換器"""
     
     def __init__(self):
+        self.last_save_stats = None
+        self.last_render_workers = 1
         self.setup_fonts()
     
     def setup_fonts(self):
-        """設置中文字體"""
-        try:
-            # 嘗試註冊系統中文字體
-            font_paths = [
-                "/System/Library/Fonts/PingFang.ttc",  # macOS
-                "/System/Library/Fonts/Arial Unicode MS.ttf",  # macOS
-                "C:/Windows/Fonts/msyh.ttc",  # Windows 微軟雅黑
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"  # Linux
-            ]
-            
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    pdfmetrics.registerFont(TTFont('ChineseFont', font_path))
-                    logger.info(f"已註冊字體: {font_path}")
-                    break
-            else:
-                logger.warning("未找到中文字體，將使用默認字體")
-        except Exception as e:
-            logger.warning(f"字體設置失敗: {e}")
+        """設置中文字體（進程內只執行一次）"""
+        global _output_font
+        if _output_font is None:
+            with _fonts_lock:
+                if _output_font is None:
+                    _output_font = _load_output_font()
+        self.font = _output_font
     
     def extract_text_positions(self, pdf_path):
-        """提取PDF中文字的精確位置信息"""
+        """提取PDF中文字的精確位置信息（列式SpanTable，table[i] 仍返回舊版dict）"""
         doc = fitz.open(pdf_path)
-        text_positions = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text_dict = page.get_text("dict")
-            
-            for block in text_dict["blocks"]:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            text_positions.append({
-                                "page": page_num,
-                                "text": span["text"],
-                                "bbox": span["bbox"],  # (x0, y0, x1, y1)
-                                "font": span["font"],
-                                "size": span["size"],
-                                "flags": span["flags"]
-                            })
+        try:
+            return SpanTable.from_document(doc)
+        finally:
+            doc.close()
+    
+    def create_translated_pdf(self, original_pdf_path, translations, output_path, ocr_layout=None,
+                              save_profile="compact", workers=None, ocr_translations=None):
+        """創建包含翻譯文字的新PDF（ocr_layout: {頁索引: [OCRLine]}，save_profile: SAVE_PROFILES 的鍵）"""
+        new_doc = self.render_document(original_pdf_path, translations, ocr_layout, workers,
+                                       ocr_translations=ocr_translations)
+        try:
+            self.save_document(new_doc, output_path, save_profile)
+        finally:
+            new_doc.close()
         
-        doc.close()
-        return text_positions
+        logger.info(f"翻譯PDF已保存到: {output_path}")
+        return output_path
     
-    def create_translated_pdf(self, original_pdf_path, translations, output_path):
-        """創建包含翻譯文字的新PDF"""
-        # 提取原PDF的文字位置
-        text_positions = self.extract_text_positions(original_pdf_path)
+    def render_document(self, original_pdf_path, translations, ocr_layout=None, workers=None, source_doc=None,
+                        ocr_translations=None):
+        """在內存中渲染翻譯PDF（字體已子集化），由調用方保存或繼續組合雙語輸出
+
+        頁數較多時按頁範圍分給多個進程渲染，再按順序合併；workers=1 強制單進程。
+        source_doc: 調用方已打開的原PDF（共享句柄），提供時不再重新打開，也不會被關閉。
+        ocr_translations: {頁索引: {OCR行原文: 譯文}}，有此頁時OCR覆蓋只使用它，不再模糊查找 translations。
+        """
+        import time
         
-        # 打開原PDF獲取頁面信息
-        original_doc = fitz.open(original_pdf_path)
+        start = time.perf_counter()
+        original_doc = source_doc if source_doc is not None else fitz.open(original_pdf_path)
+        page_count = len(original_doc)
+        workers = render_worker_count(page_count, workers)
         
-        # 創建新PDF
-        new_doc = fitz.open()
+        new_doc = None
+        if workers > 1:
+            try:
+                new_doc = self._render_parallel(original_pdf_path, page_count, translations, ocr_layout, workers,
+                                                ocr_translations)
+            except Exception as e:
+                logger.warning(f"並行渲染失敗，改為單進程: {e}")
+                workers = 1
+        if new_doc is None:
+            new_doc = fitz.open()
+            self.copy_pages(original_doc, new_doc, 0, page_count)
+            text_positions = SpanTable.from_document(original_doc)
+            self._write_translations(new_doc, text_positions, 0, page_count, translations, ocr_layout,
+                                     ocr_translations)
+        if source_doc is None:
+            original_doc.close()
+        self.last_render_workers = workers
+        logger.info(f"PDF渲染: {page_count} 頁, {workers} 個進程, {time.perf_counter() - start:.2f} s")
         
-        for page_num in range(len(original_doc)):
+        # 只保留實際用到的字形
+        try:
+            new_doc.subset_fonts()
+        except Exception as e:
+            logger.warning(f"字體子集化失敗，保留完整字體: {e}")
+        return new_doc
+    
+    def save_document(self, doc, output_path, save_profile="compact"):
+        """按保存配置寫出翻譯PDF，並記錄到 last_save_stats"""
+        self.last_save_stats = self.save_with_profile(doc, output_path, save_profile)
+        self.last_save_stats["render_workers"] = self.last_render_workers
+        return self.last_save_stats
+    
+    @staticmethod
+    def copy_pages(original_doc, new_doc, start, stop):
+        """把原PDF [start, stop) 頁的柵格圖像複製為 new_doc 末尾的新頁面"""
+        for page_num in range(start, stop):
             original_page = original_doc[page_num]
             page_rect = original_page.rect
             
@@ -85,37 +192,112 @@ class PDFTextReplacer:
             new_page = new_doc.new_page(width=page_rect.width, height=page_rect.height)
             
             # 複製原頁面的圖像內容（去除文字）
-            self._copy_page_without_text(original_page, new_page)
+            PDFTextReplacer._copy_page_without_text(original_page, new_page)
+    
+    def _write_translations(self, new_doc, text_positions, start, stop, translations, ocr_layout=None,
+                            ocr_translations=None):
+        """在 new_doc 的 [start, stop) 頁寫入翻譯文字（所有頁共用同一個字體對象）"""
+        for page_num in range(start, stop):
+            new_page = new_doc[page_num]
+            
+            # 整頁的翻譯文字先累積在TextWriter中，最後一次寫入（字體只解析一次）
+            writer = fitz.TextWriter(new_page.rect)
             
             # 添加翻譯後的文字
-            self._add_translated_text(new_page, text_positions, translations, page_num)
+            self._add_translated_text(writer, text_positions, translations, page_num)
+            
+            # 覆蓋圖片區域中OCR識別出的文字
+            if ocr_layout and ocr_layout.get(page_num):
+                page_translations = (ocr_translations or {}).get(page_num)
+                self._add_ocr_translations(new_page, writer, text_positions, ocr_layout[page_num], translations, page_num,
+                                           page_translations)
+            
+            if writer.text_rect.is_valid and not writer.text_rect.is_empty:
+                writer.write_text(new_page, color=(0, 0, 0))
+    
+    def _render_parallel(self, original_pdf_path, page_count, translations, ocr_layout, workers,
+                         ocr_translations=None):
+        """柵格化和文字位置提取分給多個進程（各自打開原PDF），主進程按頁序合併後寫入翻譯文字
+
+        文字在主進程用同一個字體寫入，字體只嵌入一次，輸出與單進程渲染一致。
+        工作進程用 spawn 啟動：ComfyUI 進程有大量線程和CUDA上下文，fork 出的子進程可能因繼承的鎖永久卡住。
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
         
-        # 保存新PDF
-        new_doc.save(output_path)
-        new_doc.close()
-        original_doc.close()
+        range_size = -(-page_count // (workers * RANGES_PER_WORKER))
+        page_ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
         
-        logger.info(f"翻譯PDF已保存到: {output_path}")
-        return output_path
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        new_doc = fitz.open()
+        try:
+            futures = [executor.submit(_render_page_range, original_pdf_path, start, stop)
+                       for start, stop in page_ranges]
+            # 按提交順序合併，保證頁序與單進程一致
+            for (start, stop), future in zip(page_ranges, futures):
+                data, text_positions = future.result(timeout=RANGE_TIMEOUT_SECONDS)
+                part = fitz.open("pdf", data)
+                new_doc.insert_pdf(part)
+                part.close()
+                self._write_translations(new_doc, text_positions, start, stop, translations, ocr_layout,
+                                         ocr_translations)
+        except BaseException:
+            new_doc.close()
+            # 卡住的工作進程不會自行退出，先結束它們，避免 shutdown 一直等待
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return new_doc
+    
+    @staticmethod
+    def save_with_profile(doc, output_path, profile_name):
+        """按保存配置寫出任意PDF（不記錄 last_save_stats），返回 {"profile", "bytes", "seconds", "linearized"}"""
+        import time
+        
+        profile = dict(SAVE_PROFILES.get(profile_name, SAVE_PROFILES["compact"]))
+        image_dpi = profile.pop("image_dpi", None)
+        image_quality = profile.pop("image_quality", 0)
+        linear = profile.pop("linear", False)
+        
+        start = time.perf_counter()
+        if image_dpi and hasattr(doc, "rewrite_images"):
+            doc.rewrite_images(dpi_threshold=int(image_dpi * IMAGE_DPI_THRESHOLD), dpi_target=image_dpi,
+                               quality=image_quality)
+        elif image_dpi:
+            logger.info("當前PyMuPDF不支持圖片重採樣，保留原圖片")
+        
+        linearized = False
+        if linear:
+            try:
+                # 線性化與對象流不能同時使用
+                doc.save(output_path, linear=True, **{k: v for k, v in profile.items() if k != "use_objstms"})
+                linearized = True
+            except Exception as e:
+                logger.info(f"當前PyMuPDF不支持線性化，改為普通保存: {e}")
+        if not linearized:
+            doc.save(output_path, **profile)
+        
+        stats = {"profile": profile_name, "bytes": os.path.getsize(output_path),
+                 "seconds": time.perf_counter() - start, "linearized": linearized}
+        logger.info(f"PDF保存 ({profile_name}): {stats['bytes'] / 1024:.0f} KB, {stats['seconds']:.2f} s")
+        return stats
     
-    def _copy_page_without_text(self, source_page, target_page):
+    @staticmethod
+    def _copy_page_without_text(source_page, target_page):
         """複製頁面內容但不包含文字"""
         # 獲取頁面的圖像和圖形內容
         pix = source_page.get_pixmap(alpha=False)
         
-        # 創建一個遮罩來隱藏文字區域
-        text_dict = source_page.get_text("dict")
-        
         # 將圖像插入到新頁面
         img_rect = fitz.Rect(0, 0, pix.width, pix.height)
         target_page.insert_image(img_rect, pixmap=pix)
     
-    def _add_translated_text(self, page, text_positions, translations, page_num):
+    def _add_translated_text(self, writer, text_positions, translations, page_num):
         """在指定位置添加翻譯文字"""
-        page_texts = [pos for pos in text_positions if pos["page"] == page_num]
-        
-        for text_pos in page_texts:
-            original_text = text_pos["text"].strip()
+        for index in text_positions.page_range(page_num):
+            original_text = text_positions.text[index].strip()
             if not original_text:
                 continue
             
@@ -125,21 +307,56 @@ class PDFTextReplacer:
                 translated_text = original_text  # 如果沒有翻譯，保持原文
             
             # 計算文字位置和大小
-            bbox = text_pos["bbox"]
-            font_size = max(8, min(text_pos["size"], 20))  # 限制字體大小範圍
+            bbox = text_positions.bbox[index]
+            font_size = max(8, min(float(text_positions.size[index]), 20))  # 限制字體大小範圍
             
             # 插入翻譯文字
             try:
-                page.insert_text(
-                    (bbox[0], bbox[1] + font_size),  # 位置調整
+                writer.append(
+                    (float(bbox[0]), float(bbox[1]) + font_size),  # 位置調整
                     translated_text,
-                    fontsize=font_size,
-                    color=(0, 0, 0),  # 黑色
-                    fontname="helv"  # 使用Helvetica字體
+                    font=self.font,
+                    fontsize=font_size
                 )
             except Exception as e:
                 logger.warning(f"插入文字失敗: {e}, 文字: {translated_text}")
     
+    def _add_ocr_translations(self, page, writer, text_positions, ocr_lines, translations, page_num,
+                              page_translations=None):
+        """在OCR行的位置覆蓋翻譯文字（先用白底遮住圖片中的原文）
+
+        page_translations 按OCR行原文記錄的譯文；未提供時退回到在 translations 中查找（舊接口）。
+        """
+        span_rects = [fitz.Rect(*bbox) for bbox in text_positions.page_bboxes(page_num).tolist()]
+        
+        for ocr_line in ocr_lines:
+            rect = fitz.Rect(ocr_line.bbox)
+            if rect.is_empty:
+                continue
+            
+            # 與文字層重疊的行已由 _add_translated_text 處理
+            if any(abs(rect & span_rect) > 0.5 * abs(rect) for span_rect in span_rects):
+                continue
+            
+            if page_translations is not None:
+                translated_text = page_translations.get(ocr_line.text.strip())
+            else:
+                translated_text = self._find_translation(ocr_line.text.strip(), translations)
+            if not translated_text:
+                continue
+            
+            font_size = max(6, min(rect.height * 0.8, 20))
+            try:
+                page.draw_rect(rect, color=None, fill=(1, 1, 1))
+                writer.append(
+                    (rect.x0, rect.y0 + font_size),
+                    translated_text,
+                    font=self.font,
+                    fontsize=font_size
+                )
+            except Exception as e:
+                logger.warning(f"插入OCR翻譯失敗: {e}, 文字: {translated_text}")
+    
     def _find_translation(self, original_text, translations):
         """查找原文對應的翻譯"""
         # 精確匹配
@@ -155,10 +372,12 @@ class PDFTextReplacer:
         
         return None
     
-    def replace_pdf_text(self, pdf_path, translation_mapping, output_path):
+    def replace_pdf_text(self, pdf_path, translation_mapping, output_path, ocr_layout=None, save_profile="compact",
+                         workers=None, ocr_translations=None):
         """主要接口：替換PDF中的文字"""
         try:
-            return self.create_translated_pdf(pdf_path, translation_mapping, output_path)
+            return self.create_translated_pdf(pdf_path, translation_mapping, output_path, ocr_layout, save_profile,
+                                              workers, ocr_translations)
         except Exception as e:
             logger.error(f"PDF文字替換失敗: {e}")
             raise
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+譯文後處理模塊
+按目標語言預先編譯一次規則，整頁所有行用一個合併正則一次遍歷；保留縮進和項目符號結構
+"""
+
+import re
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+BULLETS = ('•', '-', '►')
+
+# 所有語言共用：行內連續空白壓縮為一個空格（不動行首縮進），刪除行尾空白
+COMMON_RULES: Tuple[Tuple[str, str], ...] = (
+    (r'(?<=\S)(?:[^\S\n]{2,}|[\t\r\f\v])(?=\S)', ' '),
+    (r'[^\S\n]+(?=\n|\Z)', ''),
+)
+
+# 按目標語言的標點規則：(正則, 替換字符串)；正則不得包含捕獲組，替換為純文字
+LANGUAGE_RULES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    # 中文譯文中多餘的右引號
+    "zh": (
+        (r'。」', '。'),
+        (r'，」', '，'),
+        (r'」(?=[。，！？])', ''),
+    ),
+    # 日文「」是正常引號，不做處理
+    "ja": (),
+}
+
+
+def _language_key(target_lang: str) -> str:
+    """zh-TW → zh；未知語言只使用共用規則"""
+    lang = (target_lang or "").lower()
+    if lang in LANGUAGE_RULES:
+        return lang
+    return lang.split('-')[0]
+
+
+class PostProcessor:
+    """一種目標語言的後處理器（規則合併為一個正則，按命名組分派替換）"""
+
+    def __init__(self, rules: Sequence[Tuple[str, str]]):
+        self._replacements = {}
+        alternatives = []
+        for i, (pattern, replacement) in enumerate(rules):
+            self._replacements[f"r{i}"] = replacement
+            alternatives.append(f"(?P<r{i}>{pattern})")
+        self._pattern = re.compile('|'.join(alternatives))
+
+    def _replace(self, match) -> str:
+        return self._replacements[match.lastgroup]
+
+    def process_lines(self, translations: List[str], originals: List[str]) -> List[str]:
+        """整頁後處理：一次正則遍歷，再按原文恢復縮進和項目符號（行數不變）"""
+        cleaned = self._pattern.sub(self._replace, '\n'.join(translations)).split('\n')
+        return [self._restore_structure(translation, original) if original.strip() else translation
+                for translation, original in zip(cleaned, originals)]
+
+    def process_line(self, translation: str, original: str) -> str:
+        return self.process_lines([translation.replace('\n', ' ')], [original])[0]
+
+    @staticmethod
+    def _restore_structure(translation: str, original: str) -> str:
+        body = translation.lstrip()
+        if not body:
+            return ''
+        stripped = original.lstrip()
+        # 縮進以原文為準（翻譯服務返回的行首空白不可靠）
+        indent = original[:len(original) - len(stripped)]
+        # 原文是項目符號而譯文丟失了符號時補回
+        if stripped.startswith(BULLETS) and not body.startswith(BULLETS):
+            body = f"{stripped[0]} {body}"
+        return indent + body
+
+
+_processors: Dict[str, PostProcessor] = {}
+_processors_lock = threading.Lock()
+
+
+def register_rules(target_lang: str, rules: Sequence[Tuple[str, str]]):
+    """設置某目標語言的標點規則（替換原有規則）"""
+    with _processors_lock:
+        LANGUAGE_RULES[target_lang.lower()] = tuple(rules)
+        _processors.clear()
+
+
+def get_post_processor(target_lang: str) -> PostProcessor:
+    """返回目標語言的後處理器（每種語言只編譯一次）"""
+    key = _language_key(target_lang)
+    processor = _processors.get(key)
+    if processor is None:
+        with _processors_lock:
+            processor = _processors.get(key)
+            if processor is None:
+                processor = _processors[key] = PostProcessor(COMMON_RULES + LANGUAGE_RULES.get(key, ()))
+    return processor
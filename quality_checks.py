@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+翻譯質量檢查模塊
+所有幻覺檢測規則只編譯一次，整頁譯文一次遍歷完成評分和修正
+"""
+
+import re
+import logging
+from bisect import bisect_right
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 評分規則
+SUSPICIOUS_YEAR = re.compile(r'一九\d+年|二〇\d+年|\d{4}年')
+SOURCE_YEAR = re.compile(r'\d{4}')
+SOURCE_YEAR_WORD = re.compile(r'\b\d{4}\b')
+HALLUCINATION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'一九+年',  # 連續的一九年
+    r'九+年',    # 連續的九年
+    r'國際.*署', # 國際XX署
+    r'工商.*局', # 工商XX局
+))
+
+# 快速預篩：不含這些字符的譯文不可能命中任何年份/機構幻覺規則
+HALLUCINATION_TRIGGER = re.compile(r'[年署局九〇零]')
+
+# 原文含中日韓文字時不做字符比例檢查（不同文字體系的字符數不可比較）
+CJK_CHARS = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]')
+
+# 原文術語：英文縮寫（大寫字母）或專有名詞（首字母大寫）
+SOURCE_TERMS = re.compile(r'\b(?:([A-Z]{2,})|([A-Z][a-z]{2,}))\b')
+
+# 修正規則
+YEAR_HALLUCINATIONS = re.compile(r'一九{3,}\d*年?|二〇{3,}\d*年?|九{3,}\d*年?|零{2,}\d*年?')
+WHITESPACE = re.compile(r'\s+')
+LEADING_BULLET = re.compile(r'^[-–—•]\s*')
+REPEATED_PUNCTUATION = re.compile(r'[。，]{2,}')
+
+# 分數
+YEAR_SCORE = 20
+PATTERN_SCORE = 15
+LENGTH_RATIO_SCORE = 10
+MISSING_ABBREVIATION_SCORE = 5
+MAX_SCORED_ABBREVIATION = 5
+MAX_TERM_LENGTH = 20
+
+# 長度比例：中日韓目標語言按「譯文字符 / 原文單詞」，其他目標語言按「譯文字符 / 原文字符」
+CJK_TARGETS = ("zh", "ja", "ko")
+WORD_RATIO_BOUNDS = (0.2, 4.0)
+CHAR_RATIO_BOUNDS = (0.3, 3.0)
+# 原文少於此字符數時字符比例不可靠（如 "Hi" → "Bonjour"）
+MIN_CHAR_RATIO_LENGTH = 10
+
+
+def _is_cjk_target(target_lang: str) -> bool:
+    return (target_lang or "").lower().split('-')[0] in CJK_TARGETS
+
+
+def length_ratio(translation: str, original: str, target_lang: str):
+    """返回 (比例, 是否異常)；無法比較時返回 (None, False)"""
+    if _is_cjk_target(target_lang):
+        original_words = len(original.split())
+        if not original_words:
+            return None, False
+        ratio = len(translation) / original_words
+        low, high = WORD_RATIO_BOUNDS
+    else:
+        original_chars = len(original.strip())
+        if original_chars < MIN_CHAR_RATIO_LENGTH or CJK_CHARS.search(original):
+            return None, False
+        ratio = len(translation.strip()) / original_chars
+        low, high = CHAR_RATIO_BOUNDS
+    return ratio, ratio > high or ratio < low
+
+
+class LineTerms:
+    """一行原文中的英文縮寫和專有名詞"""
+
+    __slots__ = ("abbreviations", "proper_nouns")
+
+    def __init__(self):
+        self.abbreviations = []
+        self.proper_nouns = []
+
+
+class LineRisk:
+    """單行譯文的幻覺風險評分"""
+
+    __slots__ = ("line_index", "score", "reasons")
+
+    def __init__(self, line_index: int, score: int, reasons: List[str]):
+        self.line_index = line_index
+        self.score = score
+        self.reasons = reasons
+
+    def __repr__(self):
+        return f"LineRisk(line={self.line_index + 1}, score={self.score}, reasons={self.reasons})"
+
+
+def extract_page_terms(source_lines: List[str]) -> List[LineTerms]:
+    """對整頁原文只掃描一次，按行歸類縮寫和專有名詞"""
+    line_starts = []
+    offset = 0
+    for line in source_lines:
+        line_starts.append(offset)
+        offset += len(line) + 1
+
+    terms = [LineTerms() for _ in source_lines]
+    for match in SOURCE_TERMS.finditer('\n'.join(source_lines)):
+        line_terms = terms[bisect_right(line_starts, match.start()) - 1]
+        if match.group(1):
+            line_terms.abbreviations.append(match.group(1))
+        else:
+            line_terms.proper_nouns.append(match.group(2))
+    return terms
+
+
+class QualityChecker:
+    """文檔級翻譯質量檢查器"""
+
+    def score_line(self, translation: str, original: str, terms: LineTerms = None,
+                   target_lang: str = "zh") -> Tuple[int, List[str]]:
+        """返回 (幻覺指數, 原因列表)，分數越高越可能是幻覺"""
+        if terms is None:
+            terms = extract_page_terms([original])[0]
+        score = 0
+        reasons = []
+
+        if HALLUCINATION_TRIGGER.search(translation):
+            # 1. 原文沒有年份但譯文出現年份
+            if SUSPICIOUS_YEAR.search(translation) and not SOURCE_YEAR.search(original):
+                score += YEAR_SCORE
+                reasons.append("suspicious year")
+
+            # 2. 特定的幻覺模式
+            for pattern in HALLUCINATION_PATTERNS:
+                if pattern.search(translation):
+                    score += PATTERN_SCORE
+                    reasons.append(f"pattern {pattern.pattern}")
+
+        # 3. 長度比例異常（按目標語言選擇比較方式）
+        ratio, abnormal = length_ratio(translation, original, target_lang)
+        if abnormal:
+            score += LENGTH_RATIO_SCORE
+            reasons.append(f"length ratio {ratio:.1f}")
+
+        # 4. 英文縮寫被錯誤翻譯
+        for abbreviation in terms.abbreviations:
+            if len(abbreviation) <= MAX_SCORED_ABBREVIATION and abbreviation not in translation:
+                score += MISSING_ABBREVIATION_SCORE
+                reasons.append(f"missing {abbreviation}")
+
+        return score, reasons
+
+    def fix_line(self, translation: str, original: str, terms: LineTerms = None) -> str:
+        """通用幻覺修正 - 基於模式而非特定詞彙"""
+        if terms is None:
+            terms = extract_page_terms([original])[0]
+        corrected = translation
+
+        # 1. 原文沒有年份時移除明顯的幻覺年份模式
+        if HALLUCINATION_TRIGGER.search(corrected) and not SOURCE_YEAR_WORD.search(original):
+            corrected, removed = YEAR_HALLUCINATIONS.subn('', corrected)
+            if removed:
+                logger.info(f"🔧 Removed {removed} hallucination year pattern(s)")
+
+        # 2. 記錄缺失的重要術語（不自動修正，可能有合理的翻譯）
+        if logger.isEnabledFor(logging.DEBUG):
+            missing_terms = {term for term in terms.abbreviations + terms.proper_nouns
+                             if len(term) <= MAX_TERM_LENGTH and term not in corrected}
+            if missing_terms:
+                logger.debug(f"⚠️ Important terms missing in translation: {sorted(missing_terms)}")
+
+        # 3. 清理格式問題（保留行首縮進）
+        body = corrected.lstrip()
+        indent = corrected[:len(corrected) - len(body)] if body else ''
+        corrected = WHITESPACE.sub(' ', body).strip()
+        # 原文不是項目符號時，移除開頭的孤立標點符號
+        if not LEADING_BULLET.match(original.strip()):
+            corrected = LEADING_BULLET.sub('', corrected)
+        corrected = REPEATED_PUNCTUATION.sub('，', corrected)
+
+        return indent + corrected
+
+    def review_page(self, source_text: str, translated_text: str,
+                    target_lang: str = "zh") -> Tuple[str, List[LineRisk]]:
+        """一次遍歷整頁譯文：評分並修正每一行，返回 (修正後譯文, 有風險的行)"""
+        source_lines = source_text.split('\n')
+        translated_lines = translated_text.split('\n')
+        if len(source_lines) != len(translated_lines):
+            # 行數不一致時無法逐行對應，只對整頁評分，不做修正（避免合併換行）
+            score, reasons = self.score_line(translated_text, source_text, target_lang=target_lang)
+            return translated_text, [LineRisk(0, score, reasons)] if score else []
+
+        page_terms = extract_page_terms(source_lines)
+        risks = []
+        corrected_lines = []
+        for i, (original, translation) in enumerate(zip(source_lines, translated_lines)):
+            if not translation.strip():
+                corrected_lines.append(translation)
+                continue
+            score, reasons = self.score_line(translation, original, page_terms[i], target_lang)
+            if score:
+                risks.append(LineRisk(i, score, reasons))
+            corrected_lines.append(self.fix_line(translation, original, page_terms[i]))
+
+        return '\n'.join(corrected_lines), risks
+
+
+_quality_checker = QualityChecker()
+
+
+def get_quality_checker() -> QualityChecker:
+    """返回共享的質量檢查器（規則在模塊載入時已編譯）"""
+    return _quality_checker
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+服務調度模塊
+進程內所有節點實例共享一個調度器：按服務限制每秒請求數和token（字符）數，
+不同任務之間公平排隊，互動式單文檔優先於批量任務
+"""
+
+import io
+import os
+import json
+import time
+import logging
+import threading
+import itertools
+from typing import Dict, Optional
+
+try:
+    from .text_chunker import estimate_tokens, utf8_size
+except ImportError:
+    from text_chunker import estimate_tokens, utf8_size
+
+logger = logging.getLogger(__name__)
+
+# 服務: (每秒請求數, 每秒token數)；token 單位 translate 為UTF-8字節，bedrock-runtime 為token
+# （請求時按估算的輸入token預扣，響應後按 usage 的實際輸入+輸出token結算）
+# 默認值低於常見賬號默認配額，可用環境變量 BUDGETS_ENV 或 get_scheduler().configure() 按賬號配額調整
+SERVICE_BUDGETS = {
+    "translate": (20.0, 10000.0),
+    "textract": (5.0, None),
+    "bedrock-runtime": (1.5, 3000.0),
+}
+
+# 例如 "bedrock-runtime=4:20000,translate=50:25000"（服務=每秒請求數[:每秒token數]）
+BUDGETS_ENV = "AWS_PDF_TRANSLATOR_BUDGETS"
+
+JOB_PRIORITIES = ["interactive", "bulk"]
+_PRIORITY_RANK = {name: rank for rank, name in enumerate(JOB_PRIORITIES)}
+
+# 客戶端上不計入配額的輔助屬性
+_UNMETERED_ATTRIBUTES = {"meta", "exceptions", "get_paginator", "get_waiter", "can_paginate", "close"}
+
+# 非隊首的等待者最長等待時間（防止丟失喚醒）
+_MAX_IDLE_WAIT = 1.0
+
+
+class TokenBucket:
+    """令牌桶：容量為一秒的配額，單次成本超過容量時按容量計"""
+
+    def __init__(self, rate: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = rate
+        self.level = rate
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """還需等待多少秒才能取出 cost"""
+        self._refill()
+        cost = min(cost, self.capacity)
+        return 0.0 if self.level >= cost else (cost - self.level) / self.rate
+
+    def take(self, cost: float):
+        self.level -= min(cost, self.capacity)
+
+    def settle(self, amount: float):
+        """按實際用量補扣（amount > 0，可以透支，之後的請求等待還清）或退還（amount < 0）"""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ScheduledJob:
+    """一次節點執行在調度器中的身份和統計"""
+
+    def __init__(self, scheduler: "ServiceScheduler", job_id: int, priority: str, name: str):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.priority = priority if priority in _PRIORITY_RANK else "interactive"
+        self.name = name
+        self.finish_tags: Dict[str, float] = {}
+        self.requests: Dict[str, int] = {}
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.peak_queue_depth = 0
+        self.peak_concurrent_jobs = 1
+
+    def finish(self):
+        self.scheduler.finish_job(self)
+
+    def summary(self) -> dict:
+        return {"priority": self.priority, "requests": dict(self.requests), "wait_seconds": self.wait_seconds,
+                "max_wait": self.max_wait, "peak_queue_depth": self.peak_queue_depth,
+                "peak_concurrent_jobs": self.peak_concurrent_jobs}
+
+
+class _Ticket:
+    __slots__ = ("job", "tokens", "start_tag", "sequence")
+
+    def __init__(self, job: ScheduledJob, tokens: float, start_tag: float, sequence: int):
+        self.job = job
+        self.tokens = tokens
+        self.start_tag = start_tag
+        self.sequence = sequence
+
+    def order(self):
+        # 嚴格優先級，同優先級內按開始標籤做公平排隊（start-time fair queuing）
+        return (_PRIORITY_RANK[self.job.priority], self.start_tag, self.sequence)
+
+
+class ServiceScheduler:
+    """進程級服務調度器"""
+
+    def __init__(self, budgets: dict = None, clock=time.monotonic):
+        self._cond = threading.Condition()
+        self._clock = clock
+        self._buckets = {}
+        self._waiting: Dict[str, list] = {}
+        self._virtual_time: Dict[str, float] = {}
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+        self._sequence = itertools.count()
+        for service, (requests_per_second, tokens_per_second) in (budgets or SERVICE_BUDGETS).items():
+            self.configure(service, requests_per_second, tokens_per_second)
+
+    def configure(self, service: str, requests_per_second: float, tokens_per_second: Optional[float] = None):
+        """設置（或調整）某服務的配額"""
+        with self._cond:
+            self._buckets[service] = (TokenBucket(requests_per_second, self._clock),
+                                      TokenBucket(tokens_per_second, self._clock) if tokens_per_second else None)
+            self._cond.notify_all()
+
+    def settle(self, service: str, amount: float):
+        """按響應中的實際用量結算token配額：amount 為實際用量減去請求時預扣的數量"""
+        with self._cond:
+            buckets = self._buckets.get(service)
+            if not buckets or not buckets[1] or not amount:
+                return
+            buckets[1].settle(amount)
+            self._cond.notify_all()
+
+    def is_metered(self, service: str) -> bool:
+        return service in self._buckets
+
+    def start_job(self, priority: str = "interactive", name: str = "") -> ScheduledJob:
+        with self._cond:
+            job = ScheduledJob(self, next(self._job_ids), priority, name)
+            self._jobs[job.job_id] = job
+            for active in self._jobs.values():
+                active.peak_concurrent_jobs = max(active.peak_concurrent_jobs, len(self._jobs))
+        logger.info(f"🚦 Scheduler job {job.job_id} started ({job.priority}, {len(self._jobs)} active)")
+        return job
+
+    def finish_job(self, job: ScheduledJob):
+        with self._cond:
+            self._jobs.pop(job.job_id, None)
+
+    def acquire(self, job: ScheduledJob, service: str, tokens: float = 0) -> float:
+        """阻塞直到 job 可以向 service 發出一個請求，返回等待秒數"""
+        if service not in self._buckets:
+            return 0.0
+        start = time.perf_counter()
+        with self._cond:
+            request_bucket, token_bucket = self._buckets[service]
+            # 公平排隊的成本：有token配額的服務按token計，否則每個請求計1
+            cost = max(tokens, 1.0) if token_bucket else 1.0
+            start_tag = max(self._virtual_time.get(service, 0.0), job.finish_tags.get(service, 0.0))
+            job.finish_tags[service] = start_tag + cost
+            ticket = _Ticket(job, tokens, start_tag, next(self._sequence))
+            queue = self._waiting.setdefault(service, [])
+            queue.append(ticket)
+            job.peak_queue_depth = max(job.peak_queue_depth, len(queue))
+
+            while True:
+                if min(queue, key=_Ticket.order) is ticket:
+                    delay = request_bucket.wait_time(1)
+                    if token_bucket:
+                        delay = max(delay, token_bucket.wait_time(tokens))
+                    if delay <= 0:
+                        request_bucket.take(1)
+                        if token_bucket:
+                            token_bucket.take(tokens)
+                        queue.remove(ticket)
+                        self._virtual_time[service] = ticket.start_tag
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait(_MAX_IDLE_WAIT)
+
+            waited = time.perf_counter() - start
+            job.requests[service] = job.requests.get(service, 0) + 1
+            job.wait_seconds += waited
+            job.max_wait = max(job.max_wait, waited)
+        return waited
+
+
+def parse_budgets(text: str) -> dict:
+    """解析 "服務=每秒請求數[:每秒token數],..." 格式的配額設置"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(','))):
+        service, _, values = item.partition('=')
+        requests_per_second, _, tokens_per_second = values.partition(':')
+        try:
+            budgets[service.strip()] = (float(requests_per_second),
+                                        float(tokens_per_second) if tokens_per_second.strip() else None)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring invalid service budget '{item}' in {BUDGETS_ENV}")
+    return budgets
+
+
+def default_budgets() -> dict:
+    """默認配額，環境變量中指定的服務覆蓋默認值"""
+    return dict(SERVICE_BUDGETS, **parse_budgets(os.environ.get(BUDGETS_ENV, "")))
+
+
+def request_tokens(service: str, operation: str, kwargs: dict) -> float:
+    """估算一次請求預扣的token配額（bedrock-runtime 只計輸入，輸出在響應後按 usage 結算）"""
+    if service == "translate":
+        return utf8_size(kwargs.get("Text", ""))
+    if service == "bedrock-runtime":
+        body = kwargs.get("body", "")
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="ignore")
+        return estimate_tokens(body)
+    return 0
+
+
+def _usage_tokens(usage: dict) -> int:
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+
+def _metered_stream(event_stream, settle):
+    """透傳Bedrock事件流，讀完（或關閉）時按 usage 結算"""
+    usage = {}
+    try:
+        for event in event_stream:
+            chunk = event.get('chunk')
+            if chunk:
+                try:
+                    payload = json.loads(chunk['bytes'])
+                except ValueError:
+                    payload = {}
+                if payload.get('type') == 'message_start':
+                    usage.update(payload['message'].get('usage', {}))
+                elif payload.get('type') == 'message_delta':
+                    usage.update(payload.get('usage', {}))
+            yield event
+    finally:
+        settle(usage)
+
+
+class ScheduledClient:
+    """包裝boto3客戶端：每個API調用先向調度器取得配額"""
+
+    def __init__(self, client, service: str, job: ScheduledJob):
+        self._client = client
+        self._service = service
+        self._job = job
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name in _UNMETERED_ATTRIBUTES or name.startswith('_') or not callable(attribute):
+            return attribute
+
+        def scheduled_call(*args, **kwargs):
+            charged = request_tokens(self._service, name, kwargs)
+            self._job.scheduler.acquire(self._job, self._service, charged)
+            response = attribute(*args, **kwargs)
+            if self._service == "bedrock-runtime" and isinstance(response, dict) and "body" in response:
+                response = self._settle_bedrock(name, response, charged)
+            return response
+        return scheduled_call
+
+    def _settle_bedrock(self, operation: str, response: dict, charged: float) -> dict:
+        """按Bedrock響應的 usage 結算預扣的token（響應體讀出後換成內存流，調用方照常 read()）"""
+        def settle(usage: dict):
+            if usage:
+                self._job.scheduler.settle(self._service, _usage_tokens(usage) - charged)
+
+        if operation == "invoke_model_with_response_stream":
+            response["body"] = _metered_stream(response["body"], settle)
+            return response
+        payload = response["body"].read()
+        response["body"] = io.BytesIO(payload)
+        try:
+            settle(json.loads(payload).get("usage") or {})
+        except (ValueError, AttributeError):
+            pass
+        return response
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ServiceScheduler:
+    """進程內共享的調度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ServiceScheduler(default_budgets())
+        return _scheduler
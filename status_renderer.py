@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+狀態圖像渲染模塊
+字體和靜態背景只創建一次，整張狀態圖按內容記憶化，重複調用幾乎沒有成本
+"""
+
+import logging
+from functools import lru_cache
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SIZE = (512, 256)
+
+# 跨平台字體候選（macOS / Linux / Windows）
+FONT_PATHS = [
+    "/System/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+
+STATUS_STYLES = {
+    "success": {"background": "lightgreen", "color": "darkgreen", "title": "PDF Translation Completed"},
+    "error": {"background": "lightcoral", "color": "darkred", "title": "Translation Failed"},
+}
+
+BAR_COLORS = ["#2e7d32", "#1565c0", "#6a1b9a", "#ef6c00", "#00838f", "#ad1457"]
+BAR_LEFT = 130
+BAR_RIGHT = 440
+BAR_HEIGHT = 12
+
+
+@lru_cache(maxsize=None)
+def _load_font(size: int):
+    """載入字體（每個大小只嘗試一次）"""
+    from PIL import ImageFont
+
+    for font_path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            continue
+    logger.info("ℹ️ No TrueType font found for status image, using default font")
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def _base_image(kind: str):
+    """狀態圖的靜態部分：背景和標題"""
+    from PIL import Image, ImageDraw
+
+    style = STATUS_STYLES[kind]
+    img = Image.new('RGB', IMAGE_SIZE, color=style["background"])
+    draw = ImageDraw.Draw(img)
+    draw.text((20, 16), style["title"], fill=style["color"], font=_load_font(24))
+    draw.line((20, 50, IMAGE_SIZE[0] - 20, 50), fill=style["color"], width=2)
+    return img
+
+
+@lru_cache(maxsize=256)
+def render_status(kind: str, lines: Tuple[str, ...] = (), bars: Tuple[Tuple[str, float, str], ...] = ()):
+    """渲染狀態圖並轉換為ComfyUI IMAGE張量 (1, H, W, 3)
+
+    lines: 統計文字行；bars: (階段名稱, 比例0-1, 標籤)。
+    相同內容直接返回緩存的張量，調用方不應原地修改。
+    """
+    import numpy as np
+    import torch
+    from PIL import ImageDraw
+
+    style = STATUS_STYLES[kind]
+    img = _base_image(kind).copy()
+    draw = ImageDraw.Draw(img)
+    font = _load_font(14)
+
+    y = 62
+    for line in lines:
+        draw.text((20, y), line, fill=style["color"], font=font)
+        y += 20
+
+    # 各階段耗時條
+    y += 6
+    for i, (name, ratio, label) in enumerate(bars):
+        draw.text((20, y - 2), name, fill=style["color"], font=font)
+        width = int((BAR_RIGHT - BAR_LEFT) * max(0.0, min(ratio, 1.0)))
+        draw.rectangle((BAR_LEFT, y, BAR_LEFT + max(width, 1), y + BAR_HEIGHT), fill=BAR_COLORS[i % len(BAR_COLORS)])
+        draw.text((BAR_LEFT + width + 6, y - 2), label, fill=style["color"], font=font)
+        y += BAR_HEIGHT + 8
+
+    img_array = np.asarray(img, dtype=np.float32) / 255.0
+    return torch.from_numpy(img_array)[None,]
+
+
+def render_job_status(job_stats: dict, pages_count: int):
+    """根據一次執行的統計渲染成功狀態圖（數值先格式化，使緩存鍵只取決於顯示內容）"""
+    stages = job_stats.get("stages", {})
+    total_seconds = sum(stages.values())
+    lookups = job_stats.get("cache_lookups", 0)
+    hit_rate = job_stats.get("cache_hits", 0) / lookups if lookups else 0.0
+
+    lines = (
+        f"Pages: {pages_count}",
+        f"Throughput: {pages_count / total_seconds * 60:.1f} pages/min" if total_seconds else "Throughput: -",
+        f"Cache hit rate: {hit_rate:.0%} ({lookups} lookups)",
+    )
+
+    longest = max(stages.values(), default=0.0)
+    bars = tuple(
+        (name, round(seconds / longest, 2) if longest else 0.0, f"{seconds:.1f}s")
+        for name, seconds in stages.items()
+    )
+    return render_status("success", lines, bars)
+
+
+def render_error_status(error_message: str):
+    """渲染錯誤狀態圖"""
+    return render_status("error", (error_message[:60],))
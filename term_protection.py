@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+排除詞彙保護模塊
+排除詞彙替換為不可翻譯的標記 <x id="N"/>，翻譯後一次遍歷恢復；
+標記丟失或無法識別時記錄為逐行診斷，不再掃描全文猜測殘缺標記
+"""
+
+import re
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MARKER_TEMPLATE = '<x id="{}"/>'
+# 容忍翻譯服務改動空白、引號或改用全角尖括號
+MARKER = re.compile(r'[<＜]\s*x\s+id\s*=\s*["\'“”]?\s*(\d+)\s*["\'“”]?\s*/?\s*[>＞]', re.IGNORECASE)
+
+
+class MarkerIssue:
+    """一行譯文中未能恢復的排除詞彙"""
+
+    __slots__ = ("page_index", "line_index", "missing", "unknown")
+
+    def __init__(self, line_index: int, missing: List[str], unknown: List[str]):
+        self.page_index = None
+        self.line_index = line_index
+        self.missing = missing
+        self.unknown = unknown
+
+    def describe(self) -> str:
+        parts = []
+        if self.missing:
+            parts.append(f"lost {', '.join(self.missing)}")
+        if self.unknown:
+            parts.append(f"unknown marker id {', '.join(self.unknown)}")
+        return "; ".join(parts)
+
+    def __repr__(self):
+        return f"MarkerIssue(line={self.line_index + 1}, {self.describe()})"
+
+
+def sorted_terms(excluded_words) -> Tuple[str, ...]:
+    """去掉空白、去重並按長度排序（標記編號依賴這個順序，同一行每次都得到相同的保護結果）"""
+    return tuple(sorted(dict.fromkeys(word.strip() for word in excluded_words if word.strip()), key=len, reverse=True))
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """把詞表編譯成前綴樹正則（共享前綴，匹配時間與詞數基本無關），貪婪優先匹配最長的詞"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class TermMatcher:
+    """預編譯的排除詞彙匹配器（不分大小寫，詞兩端是字母數字時要求詞邊界）"""
+
+    __slots__ = ("terms", "digest", "_pattern", "_ids")
+
+    def __init__(self, excluded_words):
+        self.terms = sorted_terms(excluded_words)
+        self.digest = hashlib.sha1('\n'.join(self.terms).encode('utf-8')).hexdigest()
+        self._ids = {}
+        for index, term in enumerate(self.terms):
+            self._ids.setdefault(term.lower(), index)
+        self._pattern = re.compile(fr"(?<!\w){_trie_pattern(list(self._ids))}(?!\w)",
+                                   re.IGNORECASE) if self.terms else None
+
+    def __len__(self):
+        return len(self.terms)
+
+    def protect(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """一次遍歷把排除詞彙替換為標記，返回 (保護後文字, {標記編號: 原詞})"""
+        if self._pattern is None:
+            return text, {}
+        used = {}
+
+        def replace(match) -> str:
+            index = self._ids.get(match.group(0).lower())
+            if index is None:
+                return match.group(0)
+            used[str(index)] = self.terms[index]
+            return MARKER_TEMPLATE.format(index)
+
+        return self._pattern.sub(replace, text), used
+
+    def count_hits(self, text: str, hits: Counter):
+        """統計文字中每個排除詞彙出現的次數（累加到 hits）"""
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            index = self._ids.get(match.group(0).lower())
+            if index is not None:
+                hits[self.terms[index]] += 1
+
+
+def restore_markers(translated_text: str, protected_text: str,
+                    term_map: Dict[str, str]) -> Tuple[str, List[MarkerIssue]]:
+    """一次遍歷恢復所有標記；與保護後原文的標記數量不一致時逐行生成診斷"""
+    if not term_map:
+        return translated_text, []
+    found = Counter()
+
+    def replace(match) -> str:
+        marker_id = str(int(match.group(1)))
+        found[marker_id] += 1
+        return term_map.get(marker_id, match.group(0))
+
+    restored = MARKER.sub(replace, translated_text)
+    expected = Counter(str(int(marker_id)) for marker_id in MARKER.findall(protected_text))
+    if found == expected:
+        return restored, []
+    return restored, _line_issues(translated_text, protected_text, term_map)
+
+
+def _line_issues(translated_text: str, protected_text: str, term_map: Dict[str, str]) -> List[MarkerIssue]:
+    """逐行比較標記（只在整體數量不一致時執行）；行數不一致時整段作為第0行"""
+    source_lines = protected_text.split('\n')
+    translated_lines = translated_text.split('\n')
+    if len(source_lines) != len(translated_lines):
+        source_lines, translated_lines = [protected_text], [translated_text]
+
+    issues = []
+    for index, (source, translation) in enumerate(zip(source_lines, translated_lines)):
+        expected = Counter(str(int(marker_id)) for marker_id in MARKER.findall(source))
+        found = Counter(str(int(marker_id)) for marker_id in MARKER.findall(translation))
+        missing = [term_map[marker_id] for marker_id in (expected - found).elements() if marker_id in term_map]
+        unknown = sorted(marker_id for marker_id in found if marker_id not in term_map)
+        if missing or unknown:
+            issues.append(MarkerIssue(index, missing, unknown))
+    return issues
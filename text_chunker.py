@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+文本分塊模塊
+按句子邊界把過長的頁面和行切成符合服務限制的塊，並行處理後按原順序重組
+"""
+
+import re
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+# 服務限制
+TRANSLATE_MAX_BYTES = 10000        # Amazon Translate TranslateText 單次請求上限（UTF-8字節）
+FILTER_CHUNK_TOKENS = 3000         # Bedrock內容過濾每塊輸入上限，確保輸出不被 max_tokens 截斷
+FILTER_MAX_OUTPUT_TOKENS = 4096
+CHUNK_WORKERS = 4
+
+# CJK字符大約每字一個token，其他文字大約每4個字符一個token
+CJK_CHARS = re.compile(r'[　-ヿ㐀-鿿가-힯豈-﫿＀-￯]')
+# 在句末標點或換行之後切分（零寬度，拼接後與原文完全一致）
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?。！？；\n])')
+WORD_BOUNDARY = re.compile(r'(?<=\s)')
+
+
+def estimate_tokens(text: str) -> int:
+    """估算Claude tokenizer的token數"""
+    cjk_count = len(CJK_CHARS.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def utf8_size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+def _fits(text: str, max_tokens: int, max_bytes: int) -> bool:
+    if max_tokens and estimate_tokens(text) > max_tokens:
+        return False
+    if max_bytes and utf8_size(text) > max_bytes:
+        return False
+    return True
+
+
+def _hard_split(text: str, max_tokens: int, max_bytes: int) -> List[str]:
+    """單個句子仍然超限時，按空白再按字符切分"""
+    pieces = []
+    current = ""
+    for word in WORD_BOUNDARY.split(text):
+        if _fits(current + word, max_tokens, max_bytes):
+            current += word
+            continue
+        if current:
+            pieces.append(current)
+            current = ""
+        if _fits(word, max_tokens, max_bytes):
+            current = word
+            continue
+        # 沒有空白的超長片段（如CJK長句）按字符切分
+        for char in word:
+            if not _fits(current + char, max_tokens, max_bytes):
+                pieces.append(current)
+                current = ""
+            current += char
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int = None, max_bytes: int = None) -> List[str]:
+    """按句子邊界貪心打包，每塊都不超過 max_tokens / max_bytes；''.join(結果) == text"""
+    if _fits(text, max_tokens, max_bytes):
+        return [text]
+
+    chunks = []
+    current = ""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        if not sentence:
+            continue
+        if _fits(current + sentence, max_tokens, max_bytes):
+            current += sentence
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        if _fits(sentence, max_tokens, max_bytes):
+            current = sentence
+        else:
+            pieces = _hard_split(sentence, max_tokens, max_bytes)
+            chunks.extend(pieces[:-1])
+            current = pieces[-1]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def map_chunks(func: Callable[[str], str], chunks: List[str], max_workers: int = CHUNK_WORKERS) -> List[str]:
+    """並行處理各塊，結果保持原順序"""
+    if len(chunks) == 1:
+        return [func(chunks[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        return list(executor.map(func, chunks))
+
+
+def join_translated_chunks(chunks: List[str], target_lang: str) -> str:
+    """重組分塊翻譯結果（中文/日文不需要空格分隔）"""
+    joiner = '' if target_lang.split('-')[0] in ('zh', 'ja') else ' '
+    return joiner.join(chunk.strip() for chunk in chunks)
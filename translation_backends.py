@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+翻譯後端模塊
+統一的批量翻譯接口：Amazon Translate、Bedrock Claude、本地CPU模型（MarianMT / CTranslate2）
+緩存和排除詞彙保護由節點統一處理，後端只負責把一批行翻譯成同樣數量的行
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, List
+
+try:
+    from .text_chunker import estimate_tokens, utf8_size, TRANSLATE_MAX_BYTES, FILTER_CHUNK_TOKENS
+except ImportError:
+    from text_chunker import estimate_tokens, utf8_size, TRANSLATE_MAX_BYTES, FILTER_CHUNK_TOKENS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BEDROCK_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+BEDROCK_MAX_OUTPUT_TOKENS = 4096
+LOCAL_BATCH_SIZE = 16
+LOCAL_MAX_NEW_TOKENS = 512
+# Marian模型輸入上限512 token：調用方把超過此字節數的行先按句子分塊（CJK每字3字節，約500字）
+LOCAL_MAX_LINE_BYTES = 1500
+
+# Amazon Translate 支持正式度設置的目標語言（其他語言帶 Formality 的請求會失敗）
+TRANSLATE_FORMALITIES = ("FORMAL", "INFORMAL")
+FORMALITY_TARGETS = {"de", "es", "es-mx", "fr", "fr-ca", "hi", "it", "ja", "ko", "nl", "pt", "pt-pt"}
+
+# 單行請求時模型可能改用 "1. 譯文" / "1) 譯文" 等編號格式
+NUMBER_PREFIX = re.compile(r'^\s*1\s*[\t.:)、]\s*')
+
+
+class TranslationBackend(ABC):
+    """翻譯後端基類"""
+
+    name = "base"
+    # 單行超過此字節數時由調用方先分塊
+    max_line_bytes = TRANSLATE_MAX_BYTES
+
+    def __init__(self):
+        # 實際發出的請求（批次）數，報告使用
+        self.calls = 0
+
+    @abstractmethod
+    def translate_batch(self, lines: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """翻譯一批行，返回數量和順序都相同的譯文"""
+
+    def candidate_variants(self, target_lang: str) -> List[str]:
+        """多候選模式中此後端能為目標語言額外產生的譯文變體（默認沒有）"""
+        return []
+
+    def translate_variant(self, line: str, source_lang: str, target_lang: str, variant: str) -> str:
+        """用 candidate_variants() 中的一個變體翻譯一行"""
+        raise ValueError(f"{self.name} backend has no variant {variant}")
+
+    def _pack(self, lines: List[str], fits: Callable[[List[str]], bool]) -> List[List[str]]:
+        """按請求限制把行貪心打包成多個批次"""
+        batches = []
+        current = []
+        for line in lines:
+            if current and not fits(current + [line]):
+                batches.append(current)
+                current = []
+            current.append(line)
+        if current:
+            batches.append(current)
+        return batches
+
+
+class AmazonTranslateBackend(TranslationBackend):
+    """Amazon Translate：多行用換行拼接成一個請求，行數對不上時逐行重試"""
+
+    name = "amazon_translate"
+
+    def __init__(self, translate_client):
+        super().__init__()
+        self.client = translate_client
+
+    def _translate(self, text: str, source_lang: str, target_lang: str, **options) -> str:
+        self.calls += 1
+        response = self.client.translate_text(
+            Text=text,
+            SourceLanguageCode=source_lang,
+            TargetLanguageCode=target_lang,
+            **options
+        )
+        return response['TranslatedText']
+
+    def candidate_variants(self, target_lang: str) -> List[str]:
+        """正式 / 非正式變體（只限支持正式度的目標語言）"""
+        if (target_lang or "").lower() in FORMALITY_TARGETS:
+            return list(TRANSLATE_FORMALITIES)
+        return []
+
+    def translate_variant(self, line: str, source_lang: str, target_lang: str, variant: str) -> str:
+        if variant not in TRANSLATE_FORMALITIES:
+            return super().translate_variant(line, source_lang, target_lang, variant)
+        return self._translate(line, source_lang, target_lang, Settings={'Formality': variant})
+
+    def translate_batch(self, lines: List[str], source_lang: str, target_lang: str) -> List[str]:
+        results = []
+        for batch in self._pack(lines, lambda group: utf8_size('\n'.join(group)) <= TRANSLATE_MAX_BYTES):
+            if len(batch) == 1:
+                results.append(self._translate(batch[0], source_lang, target_lang))
+                continue
+            translated = self._translate('\n'.join(batch), source_lang, target_lang).split('\n')
+            if len(translated) == len(batch):
+                results.extend(translated)
+            else:
+                logger.info(f"    ℹ️ Batch returned {len(translated)} lines for {len(batch)}, retrying line by line")
+                results.extend(self._translate(line, source_lang, target_lang) for line in batch)
+        return results
+
+
+class BedrockTranslateBackend(TranslationBackend):
+    """Bedrock Claude：編號行批量翻譯，按編號對齊結果"""
+
+    name = "bedrock"
+
+    def __init__(self, bedrock_client, model_id: str = DEFAULT_BEDROCK_MODEL_ID):
+        super().__init__()
+        self.client = bedrock_client
+        self.model_id = model_id
+
+    def _invoke(self, prompt: str) -> str:
+        self.calls += 1
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": BEDROCK_MAX_OUTPUT_TOKENS,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        response = self.client.invoke_model(modelId=self.model_id, body=json.dumps(body))
+        return json.loads(response['body'].read())['content'][0]['text']
+
+    def _translate_group(self, group: List[str], source_lang: str, target_lang: str) -> List[str]:
+        numbered = '\n'.join(f"{i + 1}\t{line}" for i, line in enumerate(group))
+        prompt = f"""Translate each numbered line from {source_lang} to {target_lang}.
+Keep markup tags such as <x id="0"/> exactly as they are.
+Output exactly {len(group)} lines in the same "number<TAB>translation" format and nothing else.
+
+{numbered}"""
+        output = self._invoke(prompt).strip()
+        translations = {}
+        for output_line in output.split('\n'):
+            number, _, translation = output_line.partition('\t')
+            if number.strip().isdigit():
+                translations[int(number) - 1] = translation.strip()
+
+        if len(group) > 1 and len(translations) != len(group):
+            logger.info(f"    ℹ️ Bedrock returned {len(translations)} lines for {len(group)}, retrying line by line")
+            return [self._translate_group([line], source_lang, target_lang)[0] for line in group]
+        if len(group) == 1 and not translations.get(0):
+            # 單行沒有按編號格式返回時使用模型的原始輸出
+            translations[0] = NUMBER_PREFIX.sub('', output).strip()
+            if not translations[0] and group[0].strip():
+                raise ValueError(f"Bedrock returned no translation for line: {group[0][:80]}")
+        return [translations.get(i, "") for i in range(len(group))]
+
+    def candidate_variants(self, target_lang: str) -> List[str]:
+        """不帶編號格式的自由翻譯提示（與批量翻譯的輸出互為候選）"""
+        return ["freeform"]
+
+    def translate_variant(self, line: str, source_lang: str, target_lang: str, variant: str) -> str:
+        if variant != "freeform":
+            return super().translate_variant(line, source_lang, target_lang, variant)
+        prompt = f"""Translate the following text from {source_lang} to {target_lang}.
+Keep markup tags such as <x id="0"/> exactly as they are.
+Output only the translation.
+
+{line}"""
+        return self._invoke(prompt).strip()
+
+    def translate_batch(self, lines: List[str], source_lang: str, target_lang: str) -> List[str]:
+        results = []
+        for group in self._pack(lines, lambda group: estimate_tokens('\n'.join(group)) <= FILTER_CHUNK_TOKENS):
+            results.extend(self._translate_group(group, source_lang, target_lang))
+        return results
+
+
+_local_models = {}
+_local_models_lock = threading.Lock()
+
+
+def _marian_language(lang: str) -> str:
+    """zh-TW → zh，Helsinki-NLP 模型只使用主語言代碼"""
+    return lang.split('-')[0].lower()
+
+
+def _load_local_model(model_name: str):
+    """載入本地模型（每個進程只載入一次）：CTranslate2 目錄優先，否則使用 transformers"""
+    with _local_models_lock:
+        if model_name in _local_models:
+            return _local_models[model_name]
+
+        if os.path.isfile(os.path.join(model_name, "model.bin")):
+            import ctranslate2
+            from transformers import AutoTokenizer
+
+            model = ("ctranslate2",
+                     ctranslate2.Translator(model_name, device="cpu", compute_type="int8"),
+                     AutoTokenizer.from_pretrained(model_name))
+        else:
+            from transformers import MarianMTModel, MarianTokenizer
+
+            model = ("transformers",
+                     MarianMTModel.from_pretrained(model_name).eval(),
+                     MarianTokenizer.from_pretrained(model_name))
+        logger.info(f"🧠 Loaded local translation model ({model[0]}): {model_name}")
+        _local_models[model_name] = model
+        return model
+
+
+class LocalMarianBackend(TranslationBackend):
+    """本地CPU翻譯（MarianMT / CTranslate2），離線且沒有逐次調用成本"""
+
+    name = "local_marian"
+    max_line_bytes = LOCAL_MAX_LINE_BYTES
+
+    def __init__(self, model_name: str = ""):
+        super().__init__()
+        self.model_name = model_name
+
+    def _resolve_model(self, source_lang: str, target_lang: str) -> str:
+        if self.model_name:
+            return self.model_name
+        return f"Helsinki-NLP/opus-mt-{_marian_language(source_lang)}-{_marian_language(target_lang)}"
+
+    def translate_batch(self, lines: List[str], source_lang: str, target_lang: str) -> List[str]:
+        engine, model, tokenizer = _load_local_model(self._resolve_model(source_lang, target_lang))
+        results = []
+        for start in range(0, len(lines), LOCAL_BATCH_SIZE):
+            batch = lines[start:start + LOCAL_BATCH_SIZE]
+            self.calls += 1
+            if engine == "ctranslate2":
+                tokens = [tokenizer.convert_ids_to_tokens(tokenizer.encode(line)) for line in batch]
+                for result in model.translate_batch(tokens, max_decoding_length=LOCAL_MAX_NEW_TOKENS):
+                    ids = tokenizer.convert_tokens_to_ids(result.hypotheses[0])
+                    results.append(tokenizer.decode(ids, skip_special_tokens=True))
+            else:
+                import torch
+
+                inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True)
+                if inputs["input_ids"].shape[1] >= tokenizer.model_max_length:
+                    logger.warning(f"⚠️ Local model input reached {tokenizer.model_max_length} tokens, "
+                                   f"the end of a long line may be truncated")
+                with torch.no_grad():
+                    outputs = model.generate(**inputs, max_new_tokens=LOCAL_MAX_NEW_TOKENS)
+                results.extend(tokenizer.batch_decode(outputs, skip_special_tokens=True))
+        return results
+
+
+BACKEND_NAMES = ["amazon_translate", "bedrock", "local_marian"]
+
+
+def create_backend(name: str, get_client: Callable[[str], object], local_model: str = "",
+                   bedrock_model_id: str = DEFAULT_BEDROCK_MODEL_ID) -> TranslationBackend:
+    """按名稱創建翻譯後端；get_client(服務名) 返回（可重用的）AWS客戶端"""
+    if name == "amazon_translate":
+        return AmazonTranslateBackend(get_client('translate'))
+    if name == "bedrock":
+        return BedrockTranslateBackend(get_client('bedrock-runtime'), bedrock_model_id)
+    if name == "local_marian":
+        return LocalMarianBackend(local_model)
+    raise ValueError(f"Unknown translation backend: {name}")
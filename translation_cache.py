@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+翻譯緩存模塊
+進程內共享的逐行翻譯LRU緩存，批量工作流中重複的行不再重複調用翻譯服務
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MAX_ENTRIES = 50000
+
+
+class TranslationCache:
+    """線程安全的LRU翻譯緩存，鍵為 (翻譯後端, 源語言, 目標語言, 原文行)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source_lang: str, target_lang: str, text: str, backend: str = "") -> Optional[str]:
+        key = (backend, source_lang, target_lang, text)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, source_lang: str, target_lang: str, text: str, translation: str, backend: str = ""):
+        """寫入緩存；非空原文的空譯文是失敗結果，不緩存（否則之後每次執行都會丟失這一行）"""
+        if text.strip() and not translation.strip():
+            return
+        key = (backend, source_lang, target_lang, text)
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_translation_cache = TranslationCache()
+
+
+def get_translation_cache() -> TranslationCache:
+    """返回進程共享的翻譯緩存"""
+    return _translation_cache
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+翻譯檢查點模塊
+記錄每頁內容指紋、清理後原文、譯文和OCR行位置；新版本PDF只重新處理有變化的頁面和行
+"""
+
+import os
+import json
+import hashlib
+import difflib
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_SUFFIX = "_checkpoint.json"
+
+
+def checkpoint_path(pdf_target_path: str) -> str:
+    """檢查點與翻譯輸出文件放在一起"""
+    return os.path.splitext(pdf_target_path)[0] + CHECKPOINT_SUFFIX
+
+
+def page_fingerprint(page, text: str) -> str:
+    """頁面內容指紋：文字層 + 圖片摘要和位置 + 頁面尺寸"""
+    digest = hashlib.sha1()
+    digest.update(f"{page.rect.width:.1f}x{page.rect.height:.1f}\n".encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    for info in page.get_image_info(hashes=True):
+        digest.update(info.get("digest", b""))
+        digest.update(repr(tuple(round(v, 1) for v in info["bbox"])).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def ocr_lines_to_json(ocr_lines) -> list:
+    return [[line.text, line.x0, line.y0, line.x1, line.y1, line.confidence] for line in ocr_lines]
+
+
+def align_lines(old_source: List[str], old_translated: List[str], new_source: List[str]) -> Dict[int, str]:
+    """按行對齊新舊原文，返回 {新行索引: 沿用的譯文}（只沿用完全相同的行）"""
+    if len(old_source) != len(old_translated):
+        return {}
+    old_keys = [line.strip() for line in old_source]
+    new_keys = [line.strip() for line in new_source]
+    carried = {}
+    matcher = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag != 'equal':
+            continue
+        for offset in range(new_end - new_start):
+            if new_keys[new_start + offset]:
+                carried[new_start + offset] = old_translated[old_start + offset]
+    return carried
+
+
+class TranslationCheckpoint:
+    """一次翻譯的檢查點：settings 相同時才可沿用"""
+
+    def __init__(self, settings: dict, pages: List[dict] = None):
+        self.settings = settings
+        # 每頁: {"hash", "page_index", "text", "translation", "ocr_lines"}
+        self.pages = pages or []
+        self._by_hash = None
+
+    def find(self, page_hash: str) -> Optional[dict]:
+        """按內容指紋查找上一版本中完全相同的頁面（頁面順序變化也能命中）"""
+        if self._by_hash is None:
+            self._by_hash = {page["hash"]: page for page in self.pages}
+        return self._by_hash.get(page_hash)
+
+    def page_at(self, position: int) -> Optional[dict]:
+        return self.pages[position] if position < len(self.pages) else None
+
+    @classmethod
+    def load(cls, path: str, settings: dict) -> Optional["TranslationCheckpoint"]:
+        """讀取上一次的檢查點；文件不存在、版本或翻譯設置不同時返回None"""
+        if not os.path.exists(path):
+            logger.info(f"♻️ No checkpoint at {path}, running full translation")
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Unreadable checkpoint {path}: {e}")
+            return None
+        if data.get("version") != CHECKPOINT_VERSION or data.get("settings") != settings:
+            logger.info("♻️ Checkpoint settings differ (languages, backend or excluded words), running full translation")
+            return None
+        logger.info(f"♻️ Loaded checkpoint with {len(data['pages'])} pages: {path}")
+        return cls(settings, data["pages"])
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CHECKPOINT_VERSION, "settings": self.settings, "pages": self.pages},
+                      f, ensure_ascii=False)
+        logger.info(f"💾 Checkpoint saved: {path} ({len(self.pages)} pages)")